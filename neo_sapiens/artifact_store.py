@@ -0,0 +1,184 @@
+import hashlib
+import os
+import re
+from typing import Optional
+
+from loguru import logger
+
+_HANDLE_PATTERN = re.compile(r"^[0-9a-f]{12}$")
+
+
+class ArtifactStore:
+    """
+    On-disk store for tool outputs too large to put in an agent's
+    context.
+
+    Oversized outputs are written to `root` under a short content
+    derived handle and replaced by a head/tail preview. The full
+    output can then be paged through or grepped on demand.
+
+    Args:
+        root (str, optional): The directory the artifacts are stored in. Defaults to "agent_workspace/artifacts".
+        max_chars (int, optional): Outputs longer than this are spilled. Defaults to 8000.
+        preview_chars (int, optional): Characters of head and tail kept in the preview. Defaults to 1000.
+        page_size (int, optional): Bytes returned per page by `read`. Defaults to 4000.
+
+    Examples:
+        >>> store = ArtifactStore()
+        >>> preview = store.spill(big_output, source="cat build.log")
+        >>> store.grep("3f2a9c0b1d4e", "ERROR")
+    """
+
+    def __init__(
+        self,
+        root: str = "agent_workspace/artifacts",
+        max_chars: int = 8000,
+        preview_chars: int = 1000,
+        page_size: int = 4000,
+    ):
+        self.root = root
+        self.max_chars = max_chars
+        self.preview_chars = preview_chars
+        self.page_size = page_size
+
+    def path(self, handle: str) -> str:
+        """
+        Return the path of an artifact.
+
+        Args:
+            handle (str): The artifact handle.
+
+        Returns:
+            str: The path of the artifact file.
+        """
+        if not _HANDLE_PATTERN.match(handle or ""):
+            raise ValueError(f"Invalid artifact handle: {handle}")
+        return os.path.join(self.root, f"{handle}.txt")
+
+    def put(self, content: str) -> str:
+        """
+        Store a text and return its handle.
+
+        Args:
+            content (str): The text.
+
+        Returns:
+            str: The content derived handle of the artifact.
+        """
+        data = content.encode("utf-8")
+        handle = hashlib.sha1(data).hexdigest()[:12]
+        path = self.path(handle)
+        if not os.path.exists(path):
+            os.makedirs(self.root, exist_ok=True)
+            with open(path, "wb") as file:
+                file.write(data)
+        return handle
+
+    def spill(self, output: str, source: Optional[str] = None) -> str:
+        """
+        Store an oversized output and return a preview in its place.
+
+        Args:
+            output (str): The tool output.
+            source (str, optional): What produced the output, shown in the preview.
+
+        Returns:
+            str: The output itself if small enough, otherwise the preview.
+        """
+        if len(output) <= self.max_chars:
+            return output
+
+        handle = self.put(output)
+        logger.info(
+            f"Spilled {len(output)} chars of tool output to"
+            f" {self.path(handle)}"
+        )
+
+        lines = output.count("\n") + 1
+        origin = f" of `{source}`" if source else ""
+        head = output[: self.preview_chars]
+        tail = output[
+            max(len(head), len(output) - self.preview_chars) :
+        ]
+        return (
+            f"[Output{origin} is {len(output)} chars and {lines} lines,"
+            f" stored as artifact {handle}. Use read_artifact or"
+            " grep_artifact with this handle to see more.]\n"
+            f"{head}\n"
+            f"[... {len(output) - len(head) - len(tail)} chars"
+            " omitted ...]\n"
+            f"{tail}"
+        )
+
+    def read(self, handle: str, page: int = 0) -> str:
+        """
+        Read one page of a stored artifact.
+
+        Pages are `page_size` bytes, each boundary moved forward to the
+        start of the next UTF-8 character, so no character is split.
+
+        Args:
+            handle (str): The artifact handle.
+            page (int, optional): The zero-based page number. Defaults to 0.
+
+        Returns:
+            str: The page content with its position in the artifact.
+        """
+        path = self.path(handle)
+        size = os.path.getsize(path)
+        pages = max(1, -(-size // self.page_size))
+        if not 0 <= page < pages:
+            return f"Error: Page {page} out of range, {pages} pages"
+        with open(path, "rb") as file:
+            file.seek(page * self.page_size)
+            # A UTF-8 character spans at most 3 more bytes
+            chunk = file.read(self.page_size + 3)
+        start = _char_start(chunk, 0)
+        end = _char_start(chunk, self.page_size)
+        return f"[Page {page + 1} of {pages}]\n" + chunk[
+            start:end
+        ].decode("utf-8", errors="replace")
+
+    def grep(
+        self, handle: str, pattern: str, max_matches: int = 50
+    ) -> str:
+        """
+        Search a stored artifact line by line with a regular expression.
+
+        Args:
+            handle (str): The artifact handle.
+            pattern (str): The regular expression.
+            max_matches (int, optional): The maximum number of matching lines. Defaults to 50.
+
+        Returns:
+            str: The matching lines prefixed by their line numbers.
+        """
+        try:
+            regex = re.compile(pattern)
+        except re.error as e:
+            return f"Error: Invalid pattern {pattern}: {e}"
+
+        matches = []
+        with open(
+            self.path(handle), encoding="utf-8", errors="replace"
+        ) as file:
+            for number, line in enumerate(file, start=1):
+                if regex.search(line):
+                    matches.append(f"{number}: {line.rstrip()}")
+                    if len(matches) >= max_matches:
+                        matches.append(
+                            f"[Stopped after {max_matches} matches]"
+                        )
+                        break
+        return "\n".join(matches) or f"No lines match {pattern}"
+
+
+def _char_start(data: bytes, offset: int) -> int:
+    """Return the first offset from `offset` not inside a character."""
+    while offset < len(data) and data[offset] & 0xC0 == 0x80:
+        offset += 1
+    return min(offset, len(data))
+
+
+# Process-wide store the preset tools spill into
+artifact_store = ArtifactStore()
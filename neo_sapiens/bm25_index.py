@@ -0,0 +1,449 @@
+import json
+import os
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Identifiers, file names and error codes are kept whole
+_TOKEN = re.compile(r"[A-Za-z0-9_]+(?:[./:\-][A-Za-z0-9_]+)*")
+_PART = re.compile(r"[A-Za-z0-9]+")
+
+
+def tokenize(text: str) -> Iterator[str]:
+    """
+    Split text into lowercase terms for keyword search.
+
+    Compound tokens such as `chroma_db_s.py` or `E-1042` are yielded
+    whole and then as their alphanumeric parts, so both exact and
+    partial identifiers match.
+
+    Args:
+        text (str): The text.
+
+    Yields:
+        str: The terms.
+    """
+    for token in _TOKEN.findall(text.lower()):
+        yield token
+        if not token.isalnum():
+            parts = _PART.findall(token)
+            if len(parts) > 1:
+                yield from parts
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]], k: int = 60
+) -> List[Tuple[str, float]]:
+    """
+    Merge ranked lists of IDs by reciprocal rank fusion.
+
+    Args:
+        rankings (Sequence[Sequence[str]]): The ranked lists, best first.
+        k (int, optional): The rank smoothing constant. Defaults to 60.
+
+    Returns:
+        List[Tuple[str, float]]: The IDs and fused scores, best first.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (
+                k + rank + 1
+            )
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+class BM25Scorer:
+    """
+    In-memory BM25 scoring of a small, fixed set of texts.
+
+    For ranking a handful of texts against a query, such as example
+    teams against an objective or chunks of a task against a role,
+    where the persistent `BM25Index` is not needed.
+
+    Args:
+        texts (Sequence[str]): The texts to score.
+        k1 (float, optional): The term frequency saturation. Defaults to 1.2.
+        b (float, optional): The document length normalization. Defaults to 0.75.
+
+    Examples:
+        >>> scorer = BM25Scorer(["hotel front desk", "code review"])
+        >>> scorer.scores("review the code")
+    """
+
+    def __init__(
+        self, texts: Sequence[str], k1: float = 1.2, b: float = 0.75
+    ):
+        self.k1 = k1
+        self.b = b
+        self._terms = [Counter(tokenize(text)) for text in texts]
+        self._lengths = [sum(terms.values()) for terms in self._terms]
+        frequencies = Counter(
+            term for terms in self._terms for term in terms
+        )
+        n = len(self._terms)
+        self._idf = {
+            term: np.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in frequencies.items()
+        }
+
+    def scores(self, query: Optional[str]) -> np.ndarray:
+        """
+        Score every text against a query.
+
+        Args:
+            query (str): The query text, None scoring every text 0.
+
+        Returns:
+            np.ndarray: One score per text, higher is more relevant.
+        """
+        average = sum(self._lengths) / max(len(self._lengths), 1)
+        query_terms = set(tokenize(query or ""))
+        scores = np.zeros(len(self._terms))
+        for i, (terms, length) in enumerate(
+            zip(self._terms, self._lengths)
+        ):
+            norm = self.k1 * (1 - self.b + self.b * length / average)
+            for term in query_terms & terms.keys():
+                frequency = terms[term]
+                scores[i] += (
+                    self._idf[term]
+                    * frequency
+                    * (self.k1 + 1)
+                    / (frequency + norm)
+                )
+        return scores
+
+
+class BM25Index:
+    """
+    Persistent inverted index with BM25 scoring.
+
+    Each term has a posting list of document rows and term frequencies
+    held in two `array("I")` buffers, scored as NumPy views without
+    copying. Documents are appended to a JSON lines log as their term
+    counts, so the index is built incrementally; once the log outgrows
+    the index it is folded into a binary snapshot of concatenated
+    posting lists, and the index is reloaded from the snapshot plus the
+    log. Deletions are tombstones masked at query time until more than
+    half of the rows are dead and the index compacts.
+
+    Args:
+        name (str): The name of the index.
+        persist_dir (str, optional): The directory of the index files. Defaults to "chroma".
+        k1 (float, optional): The term frequency saturation. Defaults to 1.2.
+        b (float, optional): The document length normalization. Defaults to 0.75.
+        snapshot_every (int, optional): The minimum number of log records before a snapshot. Defaults to 10000.
+
+    Examples:
+        >>> index = BM25Index("memories")
+        >>> index.add(["a"], ["ValueError in chroma_db_s.py"])
+        >>> index.search("chroma_db_s.py", k=5)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        persist_dir: str = "chroma",
+        k1: float = 1.2,
+        b: float = 0.75,
+        snapshot_every: int = 10000,
+    ):
+        self.name = name
+        self.k1 = k1
+        self.b = b
+        self.snapshot_every = snapshot_every
+        self.directory = os.path.join(persist_dir, f"{name}.bm25")
+        self._log_path = os.path.join(self.directory, "docs.jsonl")
+        self._snapshot_path = os.path.join(
+            self.directory, "snapshot.npz"
+        )
+        self._lock = threading.RLock()
+        self._reset()
+        self._load()
+
+    def _reset(self):
+        self._terms: Dict[str, int] = {}
+        self._postings: List[array] = []
+        self._frequencies: List[array] = []
+        self._ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._lengths = array("I")
+        self._alive = bytearray()
+        self._live_length = 0
+        self._logged = 0
+
+    def _load(self):
+        if os.path.exists(self._snapshot_path):
+            with np.load(self._snapshot_path) as snapshot:
+                offsets = snapshot["offsets"]
+                rows = snapshot["rows"]
+                frequencies = snapshot["frequencies"]
+                self._terms = {
+                    term: term_id
+                    for term_id, term in enumerate(
+                        snapshot["terms"].tolist()
+                    )
+                }
+                self._ids = snapshot["ids"].tolist()
+                self._lengths.frombytes(snapshot["lengths"].tobytes())
+            for start, end in zip(offsets[:-1], offsets[1:]):
+                self._postings.append(
+                    array("I", rows[start:end].tobytes())
+                )
+                self._frequencies.append(
+                    array("I", frequencies[start:end].tobytes())
+                )
+            # Dead rows were saved with an empty ID
+            self._ids = [doc_id or None for doc_id in self._ids]
+            self._rows = {
+                doc_id: row
+                for row, doc_id in enumerate(self._ids)
+                if doc_id is not None
+            }
+            self._alive = bytearray(
+                doc_id is not None for doc_id in self._ids
+            )
+            self._live_length = int(sum(self._lengths))
+
+        if not os.path.exists(self._log_path):
+            return
+        with open(self._log_path) as file:
+            for line in file:
+                record = json.loads(line)
+                if "delete" in record:
+                    self._remove(record["delete"])
+                else:
+                    self._insert(record["id"], record["terms"])
+                self._logged += 1
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._rows
+
+    def _insert(self, doc_id: str, terms: Dict[str, int]):
+        self._remove(doc_id)
+        row = len(self._ids)
+        for term, frequency in terms.items():
+            term_id = self._terms.get(term)
+            if term_id is None:
+                term_id = self._terms[term] = len(self._postings)
+                self._postings.append(array("I"))
+                self._frequencies.append(array("I"))
+            self._postings[term_id].append(row)
+            self._frequencies[term_id].append(frequency)
+        length = sum(terms.values())
+        self._rows[doc_id] = row
+        self._ids.append(doc_id)
+        self._lengths.append(length)
+        self._alive.append(1)
+        self._live_length += length
+
+    def _remove(self, doc_id: str) -> bool:
+        row = self._rows.pop(doc_id, None)
+        if row is None:
+            return False
+        self._ids[row] = None
+        self._alive[row] = 0
+        self._live_length -= self._lengths[row]
+        return True
+
+    def _log(self, records: List[dict]):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._log_path, "a") as file:
+            for record in records:
+                file.write(json.dumps(record) + "\n")
+        self._logged += len(records)
+        if self._logged >= max(
+            self.snapshot_every, len(self._ids) // 2
+        ):
+            self.save()
+
+    def add(self, ids: List[str], documents: List[Optional[str]]):
+        """
+        Index documents, replacing existing documents with the same IDs.
+
+        Args:
+            ids (List[str]): The document IDs.
+            documents (List[str]): The documents, None for records without text.
+        """
+        with self._lock:
+            records = []
+            for doc_id, document in zip(ids, documents):
+                if document is None:
+                    continue
+                terms = dict(Counter(tokenize(document)))
+                self._insert(doc_id, terms)
+                records.append({"id": doc_id, "terms": terms})
+            self._log(records)
+
+    def delete(self, ids: List[str]):
+        """
+        Remove documents from the index.
+
+        Args:
+            ids (List[str]): The document IDs.
+        """
+        with self._lock:
+            removed = [
+                doc_id for doc_id in ids if self._remove(doc_id)
+            ]
+            if not removed:
+                return
+            if len(self._rows) < len(self._ids) // 2:
+                self.compact()
+            else:
+                self._log([{"delete": doc_id} for doc_id in removed])
+
+    def compact(self):
+        """Drop the deleted documents from the posting lists and save."""
+        with self._lock:
+            alive = np.frombuffer(self._alive, dtype=np.uint8) > 0
+            renumber = (np.cumsum(alive) - 1).astype(np.uint32)
+            terms, postings, frequencies = {}, [], []
+            for term, term_id in self._terms.items():
+                rows = np.frombuffer(
+                    self._postings[term_id], dtype=np.uint32
+                )
+                keep = alive[rows]
+                if not keep.any():
+                    continue
+                terms[term] = len(postings)
+                postings.append(
+                    array("I", renumber[rows[keep]].tobytes())
+                )
+                frequencies.append(
+                    array(
+                        "I",
+                        np.frombuffer(
+                            self._frequencies[term_id],
+                            dtype=np.uint32,
+                        )[keep].tobytes(),
+                    )
+                )
+            lengths = np.frombuffer(self._lengths, dtype=np.uint32)[
+                alive
+            ]
+            ids = [
+                doc_id for doc_id in self._ids if doc_id is not None
+            ]
+
+            self._terms = terms
+            self._postings = postings
+            self._frequencies = frequencies
+            self._ids = ids
+            self._rows = {
+                doc_id: row for row, doc_id in enumerate(ids)
+            }
+            self._lengths = array("I", lengths.tobytes())
+            self._alive = bytearray(b"\x01" * len(ids))
+            self.save()
+
+    def save(self):
+        """Write the index to a snapshot and truncate the log."""
+        with self._lock:
+            if not self._ids and not os.path.exists(self.directory):
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            sizes = np.fromiter(
+                (len(rows) for rows in self._postings),
+                dtype=np.int64,
+                count=len(self._postings),
+            )
+            offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+            np.cumsum(sizes, out=offsets[1:])
+            terms = sorted(self._terms, key=self._terms.get)
+            # Dead rows are saved with an empty ID and a zero length
+            ids = [doc_id or "" for doc_id in self._ids]
+            lengths = np.frombuffer(self._lengths, dtype=np.uint32)
+            lengths = np.where(
+                np.frombuffer(self._alive, dtype=np.uint8) > 0,
+                lengths,
+                0,
+            ).astype(np.uint32)
+
+            tmp_path = f"{self._snapshot_path}.tmp.npz"
+            np.savez(
+                tmp_path,
+                offsets=offsets,
+                rows=np.frombuffer(
+                    b"".join(self._postings), dtype=np.uint32
+                ),
+                frequencies=np.frombuffer(
+                    b"".join(self._frequencies), dtype=np.uint32
+                ),
+                terms=np.array(terms, dtype=str),
+                ids=np.array(ids, dtype=str),
+                lengths=lengths,
+            )
+            os.replace(tmp_path, self._snapshot_path)
+            open(self._log_path, "w").close()
+            self._logged = 0
+
+    def search(
+        self, query: str, k: int = 10
+    ) -> List[Tuple[str, float]]:
+        """
+        Return the `k` documents with the highest BM25 score.
+
+        Args:
+            query (str): The query text.
+            k (int, optional): The number of results. Defaults to 10.
+
+        Returns:
+            List[Tuple[str, float]]: The IDs and scores, best first.
+        """
+        with self._lock:
+            n_docs = len(self._rows)
+            if not n_docs:
+                return []
+            term_ids = {
+                self._terms[term]
+                for term in tokenize(query)
+                if term in self._terms
+            }
+            if not term_ids:
+                return []
+
+            alive = np.frombuffer(self._alive, dtype=np.uint8)
+            lengths = np.frombuffer(self._lengths, dtype=np.uint32)
+            average = self._live_length / n_docs or 1.0
+            scores = np.zeros(len(self._ids), dtype=np.float32)
+            for term_id in term_ids:
+                rows = np.frombuffer(
+                    self._postings[term_id], dtype=np.uint32
+                )
+                frequencies = np.frombuffer(
+                    self._frequencies[term_id], dtype=np.uint32
+                ).astype(np.float32)
+                frequency = int(alive[rows].sum())
+                if not frequency:
+                    continue
+                idf = np.log(
+                    1 + (n_docs - frequency + 0.5) / (frequency + 0.5)
+                )
+                norm = self.k1 * (
+                    1 - self.b + self.b * lengths[rows] / average
+                )
+                scores[rows] += (
+                    idf
+                    * frequencies
+                    * (self.k1 + 1)
+                    / (frequencies + norm)
+                )
+            scores[alive == 0] = 0
+
+            k = min(k, int(np.count_nonzero(scores)))
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [
+                (self._ids[row], float(scores[row])) for row in top
+            ]
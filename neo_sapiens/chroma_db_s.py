@@ -1,18 +1,276 @@
+import functools
+import hashlib
+import itertools
+import json
 import logging
 import os
+import threading
+import time
 import uuid
-from typing import List, Optional
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 
-import chromadb
 import numpy as np
 from dotenv import load_dotenv
 
+try:
+    import chromadb
+except ImportError:
+    print(
+        "Warning: chromadb not available - only the numpy backend works"
+    )
+    chromadb = None
+
+from neo_sapiens.bm25_index import BM25Index, reciprocal_rank_fusion
+from neo_sapiens.chunker import (
+    chunk_stream,
+    is_streamable,
+    iter_blocks,
+)
+from neo_sapiens import image_pipeline
+from neo_sapiens.embedding_cache import (
+    EmbeddingCache,
+    embedding_model_id,
+    get_embedding_cache,
+)
+from neo_sapiens.index_manifest import (
+    IndexManifest,
+    document_id,
+    file_hash,
+)
+from neo_sapiens.memory_manager import count_tokens
+from neo_sapiens.tool_cache import ToolCache
+from neo_sapiens.vector_index import NumpyCollection
 from swarms.utils.data_to_text import data_to_text
 from swarms.utils.markdown_message import display_markdown_message
 
 # Load environment variables
 load_dotenv()
 
+image_extensions = [
+    ".jpg",
+    ".jpeg",
+    ".png",
+]
+
+
+# Process-wide clients and collection handles, shared by every instance
+_clients: Dict[str, "chromadb.ClientAPI"] = {}
+_collections: Dict[tuple, "chromadb.Collection"] = {}
+_text_indexes: Dict[tuple, BM25Index] = {}
+_pool_lock = threading.Lock()
+
+# Query results of every collection, tagged with its write version
+retrieval_cache = ToolCache(max_entries=2048, default_ttl=600.0)
+_versions: Dict[tuple, int] = {}
+
+
+def collection_version(persist_dir: str, name: str) -> int:
+    """Return the number of writes to a collection in this process."""
+    return _versions.get((os.path.abspath(persist_dir), name), 0)
+
+
+def bump_version(persist_dir: str, name: str) -> int:
+    """
+    Record a write to a collection, invalidating its cached queries.
+
+    Args:
+        persist_dir (str): The persist directory.
+        name (str): The name of the collection.
+
+    Returns:
+        int: The new version of the collection.
+    """
+    key = (os.path.abspath(persist_dir), name)
+    with _pool_lock:
+        _versions[key] = _versions.get(key, 0) + 1
+        return _versions[key]
+
+
+def _texts(
+    documents: List[Optional[str]], metadatas: List[Optional[dict]]
+) -> List[str]:
+    # Images have no document, their source path stands in
+    return [
+        doc if doc is not None else (metadata or {}).get("source", "")
+        for doc, metadata in zip(
+            documents, metadatas or [None] * len(documents)
+        )
+    ]
+
+
+def get_client(persist_dir: str = "chroma"):
+    """
+    Return the persistent client of a directory, creating it once per
+    process.
+
+    Args:
+        persist_dir (str, optional): The persist directory. Defaults to "chroma".
+
+    Returns:
+        ClientAPI: The shared client.
+    """
+    key = os.path.abspath(persist_dir)
+    with _pool_lock:
+        if key not in _clients:
+            _clients[key] = chromadb.PersistentClient(
+                path=persist_dir
+            )
+        return _clients[key]
+
+
+def _embedding_key(embedding_function: Optional[Callable]):
+    # Equivalent embedding functions share a handle, whatever instance
+    if embedding_function is None:
+        return None
+    if isinstance(embedding_function, EmbeddingCache):
+        return (
+            "cache",
+            os.path.abspath(embedding_function.cache_dir),
+            embedding_function.model_id,
+        )
+    return embedding_model_id(embedding_function)
+
+
+def get_collection(
+    persist_dir: str,
+    name: str,
+    metric: str = "cosine",
+    embedding_function: Optional[Callable] = None,
+    data_loader=None,
+    backend: str = "chroma",
+    **kwargs,
+):
+    """
+    Return a collection handle shared across instances and threads.
+
+    Handles are keyed by the backend, directory, name and embedding
+    model, so instances creating their own embedding function still
+    share one handle. Data loaders are shared process-wide by
+    `image_pipeline.get_thumbnail_loader`.
+
+    Args:
+        persist_dir (str): The persist directory.
+        name (str): The name of the collection.
+        metric (str, optional): The similarity metric of a new collection. Defaults to "cosine".
+        embedding_function (Callable, optional): The embedding function of the collection.
+        data_loader (optional): The data loader for URIs.
+        backend (str, optional): "chroma" or "numpy". Defaults to "chroma".
+        **kwargs: Passed to the collection when the handle is created.
+
+    Returns:
+        Collection: The shared collection handle.
+    """
+    key = (
+        backend,
+        os.path.abspath(persist_dir),
+        name,
+        _embedding_key(embedding_function),
+        id(data_loader),
+    )
+    if backend == "numpy":
+        with _pool_lock:
+            if key not in _collections:
+                _collections[key] = NumpyCollection(
+                    name,
+                    persist_dir=persist_dir,
+                    metric=metric,
+                    embedding_function=embedding_function,
+                    **kwargs,
+                )
+            return _collections[key]
+    if backend != "chroma":
+        raise ValueError(f"Unknown backend: {backend}")
+
+    client = get_client(persist_dir)
+    with _pool_lock:
+        if key not in _collections:
+            _collections[key] = client.get_or_create_collection(
+                name=name,
+                metadata={"hnsw:space": metric},
+                embedding_function=embedding_function,
+                data_loader=data_loader,
+                **kwargs,
+            )
+        return _collections[key]
+
+
+def get_text_index(persist_dir: str, name: str) -> BM25Index:
+    """
+    Return the keyword index of a collection, loading it once per process.
+
+    Args:
+        persist_dir (str): The persist directory.
+        name (str): The name of the collection.
+
+    Returns:
+        BM25Index: The shared index.
+    """
+    key = (os.path.abspath(persist_dir), name)
+    with _pool_lock:
+        if key not in _text_indexes:
+            _text_indexes[key] = BM25Index(
+                name, persist_dir=persist_dir
+            )
+        return _text_indexes[key]
+
+
+def _read_chunks(path: str, chunk_tokens: int, overlap_tokens: int):
+    """
+    Hash a file and split its text into chunks, run in the ingestion
+    worker pool.
+
+    Plain text files are hashed and decoded from the same blocks, so
+    they are read once. Other files are hashed and then converted.
+    """
+    try:
+        if is_streamable(path):
+            digest = hashlib.sha256()
+            chunks = list(
+                chunk_stream(
+                    iter_blocks(path, digest=digest),
+                    chunk_tokens,
+                    overlap_tokens,
+                )
+            )
+            return path, digest.hexdigest(), chunks
+        content_hash = file_hash(path)
+        chunks = list(
+            chunk_stream(
+                [data_to_text(path)], chunk_tokens, overlap_tokens
+            )
+        )
+        return path, content_hash, chunks
+    except Exception as e:
+        print(f"Failed to extract text from {path}: {e}")
+        return path, None, None
+
+
+def bounded_map(
+    pool, func: Callable, items: Iterable, window: int
+) -> Iterator:
+    """
+    Map `func` over `items` in `pool`, in order, with at most `window`
+    tasks in flight so the input is consumed as a stream.
+
+    Args:
+        pool (Executor): The executor.
+        func (Callable): The function to map.
+        items (Iterable): The inputs.
+        window (int): The maximum number of pending tasks.
+
+    Yields:
+        The results of `func`, in input order.
+    """
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(func, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
 
 # Results storage using local ChromaDB
 class ChromaDB:
@@ -23,12 +281,29 @@ class ChromaDB:
     Args:
         metric (str): The similarity metric to use.
         output (str): The name of the collection to store the results in.
-        limit_tokens (int, optional): The maximum number of tokens to use for the query. Defaults to 1000.
+        limit_tokens (int, optional): The maximum number of tokens returned by a query. Defaults to 1000.
         n_results (int, optional): The number of results to retrieve. Defaults to 2.
+        docs_folder (str, optional): A folder of documents to ingest on creation.
+        batch_size (int, optional): The number of documents per `collection.add` call. Defaults to 256.
+        workers (int, optional): The number of text extraction processes. Defaults to the CPU count.
+        chunk_tokens (int, optional): The maximum size of a stored chunk in tokens. Defaults to 500.
+        chunk_overlap (int, optional): The overlap between consecutive chunks in tokens. Defaults to 50.
+        embedding_function (Callable, optional): The embedding function. Defaults to Chroma's default embedding function.
+        cache_embeddings (bool, optional): Whether to cache embeddings on disk by content hash. Defaults to True.
+        persist_dir (str, optional): The directory of the shared persistent client. Defaults to "chroma".
+        backend (str, optional): "chroma", or "numpy" for a memory-mapped exact index that does not need chromadb. Defaults to "chroma".
+        hybrid (bool, optional): Whether to fuse BM25 keyword hits with vector hits in queries. Defaults to True.
+        rrf_k (int, optional): The rank smoothing constant of the fusion. Defaults to 60.
+        cache_results (bool, optional): Whether to cache query results until the collection is next written. Defaults to True.
+        image_size (int, optional): The side in pixels images are downsampled to before embedding. Defaults to 224.
 
     Methods:
-        add: _description_
-        query: _description_
+        add: Add a document to the collection.
+        add_many: Add a batch of documents in a single call.
+        add_images: Add image files in batches, storing URIs and thumbnails.
+        query: Query the collection.
+        query_many: Run a batch of queries in a single call.
+        traverse_directory: Ingest every file of `docs_folder`.
 
     Examples:
         >>> chromadb = ChromaDB(
@@ -48,6 +323,18 @@ class ChromaDB:
         n_results: int = 2,
         docs_folder: Optional[str] = None,
         verbose: bool = False,
+        batch_size: int = 256,
+        workers: Optional[int] = None,
+        chunk_tokens: int = 500,
+        chunk_overlap: int = 50,
+        embedding_function: Optional[Callable] = None,
+        cache_embeddings: bool = True,
+        persist_dir: str = "chroma",
+        backend: str = "chroma",
+        hybrid: bool = True,
+        rrf_k: int = 60,
+        cache_results: bool = True,
+        image_size: int = image_pipeline.THUMBNAIL_SIZE,
         *args,
         **kwargs,
     ):
@@ -57,32 +344,76 @@ class ChromaDB:
         self.n_results = n_results
         self.docs_folder = docs_folder
         self.verbose = verbose
+        self.batch_size = batch_size
+        self.workers = workers
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap = chunk_overlap
+        self.persist_dir = persist_dir
+        self.backend = backend
+        self.rrf_k = rrf_k
+        self.cache_results = cache_results
+        self.image_size = image_size
+
+        # Embed through the content-addressed cache shared by collections
+        if embedding_function is None:
+            if chromadb is None:
+                raise ValueError(
+                    "An embedding_function is required without chromadb"
+                )
+            embedding_function = (
+                chromadb.utils.embedding_functions.DefaultEmbeddingFunction()
+            )
+        if cache_embeddings:
+            embedding_function = get_embedding_cache(
+                embedding_function,
+                cache_dir=os.path.join(
+                    persist_dir, "embedding_cache"
+                ),
+            )
+        self.embedding_function = embedding_function
 
         # Disable ChromaDB logging
         if verbose:
             logging.getLogger("chromadb").setLevel(logging.INFO)
 
-        # Create Chroma collection
-        chroma_persist_dir = "chroma"
-        chroma_client = chromadb.PersistentClient(
-            settings=chromadb.config.Settings(
-                persist_directory=chroma_persist_dir,
-            ),
-            *args,
-            **kwargs,
+        self.manifest = IndexManifest(
+            os.path.join(persist_dir, f"{output_dir}_manifest.json")
         )
-        # Create ChromaDB client
-        self.client = chromadb.Client()
 
-        # Create Chroma collection
-        self.collection = chroma_client.get_or_create_collection(
-            name=output_dir,
-            metadata={"hnsw:space": metric},
+        # Image URIs are loaded as cached thumbnails when embedded
+        self.data_loader = None
+        if backend == "chroma" and image_pipeline.Image is not None:
+            self.data_loader = image_pipeline.get_thumbnail_loader(
+                os.path.join(persist_dir, "thumbnails"),
+                size=image_size,
+                workers=workers,
+            )
+
+        # Reuse the process-wide client and collection handle
+        self.client = (
+            get_client(persist_dir) if backend == "chroma" else None
+        )
+        self.collection = get_collection(
+            persist_dir,
+            output_dir,
+            metric=metric,
             embedding_function=self.embedding_function,
             data_loader=self.data_loader,
-            *args,
+            backend=backend,
             **kwargs,
         )
+
+        # Keyword index kept in step with the collection by `add`
+        self.text_index = None
+        if hybrid:
+            self.text_index = get_text_index(persist_dir, output_dir)
+            # Built once, even if the collection holds no text at all
+            if not self.manifest.text_indexed:
+                if not len(self.text_index):
+                    self._backfill_text_index()
+                self.manifest.text_indexed = True
+                self.manifest.save()
+
         display_markdown_message(
             "ChromaDB collection created:"
             f" {self.collection.name} with metric: {self.metric} and"
@@ -107,15 +438,46 @@ class ChromaDB:
         """
         Add a document to the ChromaDB collection.
 
+        Documents longer than `chunk_tokens` are stored as overlapping
+        chunks with IDs `{doc_id}:{n}`. Images are downsampled to
+        `image_size` before they are embedded.
+
         Args:
             document (str): The document to be added.
-            condition (bool, optional): The condition to check before adding the document. Defaults to True.
+            images (List[np.ndarray], optional): Images to add with the document.
+            img_urls (List[str], optional): URIs of images to add with the document.
 
         Returns:
             str: The ID of the added document.
         """
+        doc_id = str(uuid.uuid4())
+        if images is not None:
+            images = [
+                image_pipeline.downsample(image, self.image_size)
+                for image in images
+            ]
+        if (
+            isinstance(document, str)
+            and images is None
+            and img_urls is None
+            and count_tokens(document) > self.chunk_tokens
+        ):
+            chunks = list(self.chunk([document]))
+            self.add_many(
+                [chunk.text for chunk in chunks],
+                [
+                    {
+                        "parent": doc_id,
+                        "chunk": n,
+                        "start": chunk.start,
+                        "end": chunk.end,
+                    }
+                    for n, chunk in enumerate(chunks)
+                ],
+                [f"{doc_id}:{n}" for n in range(len(chunks))],
+            )
+            return doc_id
         try:
-            doc_id = str(uuid.uuid4())
             self.collection.add(
                 ids=[doc_id],
                 documents=[document],
@@ -124,6 +486,11 @@ class ChromaDB:
                 *args,
                 **kwargs,
             )
+            if self.text_index is not None and isinstance(
+                document, str
+            ):
+                self.text_index.add([doc_id], [document])
+            bump_version(self.persist_dir, self.output_dir)
             return doc_id
         except Exception as e:
             raise Exception(f"Failed to add document: {str(e)}")
@@ -131,57 +498,512 @@ class ChromaDB:
     def query(
         self,
         query_text: str,
-        query_images: List[np.ndarray],
+        query_images: List[np.ndarray] = None,
         *args,
         **kwargs,
     ):
         """
         Query documents from the ChromaDB collection.
 
+        Text queries are answered by fusing vector and BM25 keyword
+        hits unless `hybrid` is disabled, and served from the result
+        cache until the collection is written.
+
         Args:
-            query (str): The query string.
-            n_docs (int, optional): The number of documents to retrieve. Defaults to 1.
+            query_text (str): The query string.
+            query_images (List[np.ndarray], optional): Images to query with.
 
         Returns:
-            dict: The retrieved documents.
+            List[str]: The `n_results` best documents that fit within `limit_tokens`.
         """
+        if query_images is not None:
+            query_images = [
+                image_pipeline.downsample(image, self.image_size)
+                for image in query_images
+            ]
+        if (
+            query_images is None
+            and not args
+            and set(kwargs) <= {"where"}
+        ):
+            return self.query_many(
+                [query_text], where=kwargs.get("where")
+            )[0]
         try:
-            docs = self.collection.query(
-                query_texts=[query_text],
+            results = self.collection.query(
+                query_texts=(
+                    [query_text] if query_images is None else None
+                ),
                 query_images=query_images,
-                n_results=self.n_docs,
+                n_results=self.n_results,
                 *args,
                 **kwargs,
-            )["documents"]
-            return docs[0]
+            )
+            return self.fit_to_limit(
+                _texts(
+                    results["documents"][0], results["metadatas"][0]
+                )
+            )
+        except Exception as e:
+            raise Exception(f"Failed to query documents: {str(e)}")
+
+    def query_many(
+        self,
+        texts: List[str],
+        n_results: Optional[int] = None,
+        where: Optional[dict] = None,
+        dedupe: bool = False,
+    ) -> List[List[str]]:
+        """
+        Run several queries with one embedding pass and one collection query.
+
+        With `hybrid` enabled, each query's vector hits are fused with
+        its BM25 keyword hits by reciprocal rank fusion. Results are
+        cached per normalized query text, `n_results` and filter, and
+        only the queries missing from the cache are run.
+
+        Args:
+            texts (List[str]): The query strings.
+            n_results (int, optional): The number of results per query. Defaults to `n_results`.
+            where (dict, optional): A metadata filter applied to every query.
+            dedupe (bool, optional): Return each document only for the query it matches best. Defaults to False.
+
+        Returns:
+            List[List[str]]: The documents of each query, in query order.
+        """
+        if not texts:
+            return []
+        n_results = n_results or self.n_results
+        version = collection_version(
+            self.persist_dir, self.output_dir
+        )
+        keys = [
+            (
+                os.path.abspath(self.persist_dir),
+                self.output_dir,
+                version,
+                self.text_index is not None,
+                " ".join(text.lower().split()),
+                n_results,
+                json.dumps(where, sort_keys=True),
+            )
+            for text in texts
+        ]
+
+        rows, missing = [None] * len(texts), {}
+        for q, key in enumerate(keys):
+            found, row = (
+                retrieval_cache.get(key)
+                if self.cache_results
+                else (False, None)
+            )
+            if found:
+                rows[q] = row
+            else:
+                missing.setdefault(key, []).append(q)
+        if missing:
+            queries = [texts[qs[0]] for qs in missing.values()]
+            results = zip(*self._search(queries, n_results, where))
+            for key, row in zip(missing, results):
+                # Cached rows are shared, so they are made immutable
+                row = tuple(tuple(column) for column in row)
+                for q in missing[key]:
+                    rows[q] = row
+                if self.cache_results:
+                    retrieval_cache.put(key, row)
+
+        ids, docs, distances = (list(column) for column in zip(*rows))
+        if dedupe:
+            best = {}
+            for q, (row_ids, row_distances) in enumerate(
+                zip(ids, distances)
+            ):
+                for doc_id, distance in zip(row_ids, row_distances):
+                    if (
+                        doc_id not in best
+                        or distance < best[doc_id][1]
+                    ):
+                        best[doc_id] = (q, distance)
+            docs = [
+                [
+                    doc
+                    for doc_id, doc in zip(row_ids, row_docs)
+                    if best[doc_id][0] == q
+                ]
+                for q, (row_ids, row_docs) in enumerate(
+                    zip(ids, docs)
+                )
+            ]
+        return [
+            self.fit_to_limit(list(row_docs)) for row_docs in docs
+        ]
+
+    def _search(
+        self,
+        texts: List[str],
+        n_results: int,
+        where: Optional[dict] = None,
+    ):
+        """
+        Query the collection, fusing keyword hits when `hybrid` is enabled.
+
+        Returns:
+            tuple: The IDs, documents and distances of each query, best first.
+        """
+        try:
+            results = self.collection.query(
+                query_embeddings=self.embedding_function(texts),
+                n_results=(
+                    n_results * 4
+                    if self.text_index is not None
+                    else n_results
+                ),
+                where=where,
+            )
         except Exception as e:
             raise Exception(f"Failed to query documents: {str(e)}")
+        if self.text_index is not None:
+            return self._fuse(texts, results, n_results, where)
+        return (
+            results["ids"],
+            [
+                _texts(row_docs, row_metadatas)
+                for row_docs, row_metadatas in zip(
+                    results["documents"], results["metadatas"]
+                )
+            ],
+            results["distances"],
+        )
 
-    def traverse_directory(self):
+    def _fuse(
+        self,
+        texts: List[str],
+        results: dict,
+        n_results: int,
+        where: Optional[dict] = None,
+    ):
         """
-        Traverse through every file in the given directory and its subdirectories,
-        and return the paths of all files.
-        Parameters:
-        - directory_name (str): The name of the directory to traverse.
+        Fuse vector results with BM25 hits of the same queries.
+
         Returns:
-        - list: A list of paths to each file in the directory and its subdirectories.
+            tuple: The IDs, documents and negated fused scores of each query, best first.
         """
-        image_extensions = [
-            ".jpg",
-            ".jpeg",
-            ".png",
+        found = {}
+        for row_ids, row_docs, row_metadatas in zip(
+            results["ids"], results["documents"], results["metadatas"]
+        ):
+            found.update(
+                zip(row_ids, _texts(row_docs, row_metadatas))
+            )
+        keyword_ids = [
+            [
+                doc_id
+                for doc_id, _ in self.text_index.search(
+                    text, k=n_results * 4
+                )
+            ]
+            for text in texts
         ]
-        images = []
-        for root, dirs, files in os.walk(self.docs_folder):
+
+        # Fetch keyword-only hits once, applying the filter
+        missing = list(
+            {
+                doc_id
+                for row in keyword_ids
+                for doc_id in row
+                if doc_id not in found
+            }
+        )
+        if missing:
+            fetched = self.collection.get(
+                ids=missing,
+                where=where,
+                include=["documents", "metadatas"],
+            )
+            found.update(
+                zip(
+                    fetched["ids"],
+                    _texts(
+                        fetched["documents"], fetched["metadatas"]
+                    ),
+                )
+            )
+
+        ids, docs, distances = [], [], []
+        for vector_row, keyword_row in zip(
+            results["ids"], keyword_ids
+        ):
+            fused = reciprocal_rank_fusion(
+                [
+                    vector_row,
+                    [
+                        doc_id
+                        for doc_id in keyword_row
+                        if doc_id in found
+                    ],
+                ],
+                k=self.rrf_k,
+            )[:n_results]
+            ids.append([doc_id for doc_id, _ in fused])
+            docs.append([found[doc_id] for doc_id, _ in fused])
+            distances.append([-score for _, score in fused])
+        return ids, docs, distances
+
+    def _backfill_text_index(self, page_size: int = 1000) -> None:
+        # Index documents added before the keyword index existed
+        offset = 0
+        while True:
+            page = self.collection.get(
+                limit=page_size, offset=offset, include=["documents"]
+            )
+            if not page["ids"]:
+                return
+            self.text_index.add(page["ids"], page["documents"])
+            offset += len(page["ids"])
+
+    def chunk(self, blocks: Iterable[str]):
+        """Split a stream of text into chunks of `chunk_tokens`."""
+        return chunk_stream(
+            blocks, self.chunk_tokens, self.chunk_overlap
+        )
+
+    def fit_to_limit(self, documents: List[str]) -> List[str]:
+        """
+        Keep the best ranked documents that fit within `limit_tokens`.
+
+        Args:
+            documents (List[str]): The documents, best first.
+
+        Returns:
+            List[str]: The documents that fit, the first one truncated if it alone exceeds the limit.
+        """
+        if not self.limit_tokens:
+            return documents
+        kept, used = [], 0
+        for document in documents:
+            tokens = count_tokens(document)
+            if used + tokens > self.limit_tokens:
+                if not kept:
+                    kept.append(document[: self.limit_tokens * 4])
+                break
+            kept.append(document)
+            used += tokens
+        return kept
+
+    def add_many(
+        self,
+        documents: List[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        Add a batch of documents with a single embedding and insert call.
+
+        Args:
+            documents (List[str]): The documents to be added.
+            metadatas (List[dict], optional): One metadata dict per document.
+            ids (List[str], optional): One ID per document, random when omitted.
+
+        Returns:
+            List[str]: The IDs of the added documents.
+        """
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in documents]
+        try:
+            self.collection.add(
+                ids=ids,
+                documents=documents,
+                metadatas=metadatas,
+            )
+            if self.text_index is not None:
+                self.text_index.add(ids, documents)
+            bump_version(self.persist_dir, self.output_dir)
+            return ids
+        except Exception as e:
+            raise Exception(f"Failed to add documents: {str(e)}")
+
+    def add_images(self, paths: Iterable[str]) -> List[str]:
+        """
+        Add image files in batches of `batch_size`.
+
+        Only the URIs are stored, with the path of a thumbnail in the
+        metadata. Each batch is decoded and downsampled by the data
+        loader when it is embedded, so at most one batch of thumbnails
+        is in memory. IDs derive from the content, replacing earlier
+        versions of the files.
+
+        Args:
+            paths (Iterable[str]): The paths of the images, consumed lazily.
+
+        Returns:
+            List[str]: The IDs of the added images.
+        """
+        if self.data_loader is None:
+            raise ValueError(
+                "Images need the chroma backend and Pillow"
+            )
+        added = []
+        paths = iter(paths)
+        while True:
+            batch = [
+                os.path.abspath(path)
+                for path in itertools.islice(paths, self.batch_size)
+            ]
+            if not batch:
+                return added
+            hashes = [file_hash(path) for path in batch]
+            for path in batch:
+                self._replace(path)
+            batch_ids = [
+                document_id(path, content_hash)
+                for path, content_hash in zip(batch, hashes)
+            ]
+            self.collection.add(
+                ids=batch_ids,
+                uris=batch,
+                metadatas=[
+                    {
+                        "source": path,
+                        "thumbnail": self.data_loader.thumbnail_path(
+                            path
+                        ),
+                    }
+                    for path in batch
+                ],
+            )
+            bump_version(self.persist_dir, self.output_dir)
+            for path, content_hash, doc_id in zip(
+                batch, hashes, batch_ids
+            ):
+                self.manifest.record(
+                    path, os.stat(path), content_hash, [doc_id]
+                )
+            added += batch_ids
+
+    def _iter_changed_files(
+        self, images: List[str], seen: set
+    ) -> Iterator[str]:
+        for root, dirs, files in os.walk(
+            os.path.abspath(self.docs_folder)
+        ):
             for file in files:
+                path = os.path.join(root, file)
+                seen.add(path)
+                if self.manifest.unchanged(path, os.stat(path)):
+                    continue
                 _, ext = os.path.splitext(file)
                 if ext.lower() in image_extensions:
-                    images.append(os.path.join(root, file))
+                    images.append(path)
                 else:
-                    data = data_to_text(file)
-                    added_to_db = self.add([data])
-                    print(f"{file} added to Database")
-        if images:
-            added_to_db = self.add(img_urls=[images])
-            print(f"{len(images)} images added to Database ")
-        return added_to_db
+                    yield path
+
+    def _replace(self, path: str) -> None:
+        old_ids = self.manifest.remove(path)
+        if old_ids:
+            self.collection.delete(ids=old_ids)
+            if self.text_index is not None:
+                self.text_index.delete(old_ids)
+            bump_version(self.persist_dir, self.output_dir)
+
+    def traverse_directory(self) -> int:
+        """
+        Incrementally index every file in `docs_folder` and its
+        subdirectories.
+
+        Files whose mtime and size match the manifest are skipped,
+        changed files are re-embedded under IDs derived from their
+        content, and the documents of removed files are deleted. Files
+        are known by their absolute paths. Text is read and split into
+        chunks of `chunk_tokens` in a process pool while the directory
+        is walked, and added in batches of `batch_size`.
+
+        Returns:
+            int: The number of chunks added.
+        """
+        start = time.perf_counter()
+        added = 0
+        documents, metadatas, ids, records = [], [], [], []
+        images, seen = [], set()
+
+        def flush():
+            nonlocal added
+            if not documents:
+                return
+            self.add_many(documents, metadatas, ids)
+            for path, stat, content_hash, chunk_ids in records:
+                self.manifest.record(
+                    path, stat, content_hash, chunk_ids
+                )
+            added += len(documents)
+            for pending in (documents, metadatas, ids, records):
+                pending.clear()
+            elapsed = time.perf_counter() - start
+            print(
+                f"{added} documents added to Database"
+                f" ({added / elapsed:.1f} docs/s)"
+            )
+
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.workers
+            ) as pool:
+                for path, content_hash, chunks in bounded_map(
+                    pool,
+                    functools.partial(
+                        _read_chunks,
+                        chunk_tokens=self.chunk_tokens,
+                        overlap_tokens=self.chunk_overlap,
+                    ),
+                    self._iter_changed_files(images, seen),
+                    window=2 * self.batch_size,
+                ):
+                    if content_hash is None:
+                        continue
+                    stat = os.stat(path)
+                    entry = self.manifest.get(path)
+                    if entry and entry["hash"] == content_hash:
+                        self.manifest.record(
+                            path, stat, content_hash, entry["ids"]
+                        )
+                        continue
+                    self._replace(path)
+                    chunk_ids = []
+                    for n, chunk in enumerate(chunks):
+                        chunk_ids.append(
+                            document_id(path, content_hash, n)
+                        )
+                        documents.append(chunk.text)
+                        metadatas.append(
+                            {
+                                "source": path,
+                                "chunk": n,
+                                "start": chunk.start,
+                                "end": chunk.end,
+                            }
+                        )
+                        ids.append(chunk_ids[-1])
+                        if len(documents) >= self.batch_size:
+                            flush()
+                    # Recorded once all of the file's chunks are queued
+                    records.append(
+                        (path, stat, content_hash, chunk_ids)
+                    )
+                flush()
+
+            if images:
+                self.add_images(images)
+                print(f"{len(images)} images added to Database ")
+
+            root = os.path.join(os.path.abspath(self.docs_folder), "")
+            removed = [
+                path
+                for path in list(self.manifest.files)
+                if path.startswith(root) and path not in seen
+            ]
+            for path in removed:
+                self._replace(path)
+            if removed:
+                print(f"{len(removed)} removed files deleted")
+        finally:
+            self.manifest.save()
+        return added + len(images)
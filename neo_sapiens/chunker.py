@@ -0,0 +1,138 @@
+import codecs
+import io
+import os
+from typing import Iterable, Iterator, NamedTuple
+
+# Files read incrementally instead of converted in one piece
+TEXT_EXTENSIONS = frozenset(
+    {
+        ".txt",
+        ".md",
+        ".rst",
+        ".log",
+        ".py",
+        ".js",
+        ".ts",
+        ".html",
+        ".css",
+        ".yaml",
+        ".yml",
+        ".toml",
+        ".cfg",
+        ".ini",
+        ".sh",
+    }
+)
+
+# Matches the estimate of `memory_manager.count_tokens`
+CHARS_PER_TOKEN = 4
+
+# Preferred split points, best first
+_BOUNDARIES = ("\n\n", "\n", ". ", " ")
+
+
+class Chunk(NamedTuple):
+    text: str
+    start: int
+    end: int
+
+
+def is_streamable(path: str) -> bool:
+    """Return whether a file is plain text that can be read in blocks."""
+    return os.path.splitext(path)[1].lower() in TEXT_EXTENSIONS
+
+
+def iter_blocks(
+    path: str, block_size: int = 1 << 16, digest=None
+) -> Iterator[str]:
+    """
+    Read a text file in blocks of `block_size` bytes.
+
+    Args:
+        path (str): The path of the file.
+        block_size (int, optional): The read size in bytes. Defaults to 65536.
+        digest (optional): A hashlib object updated with the raw bytes, to hash the file in the same pass.
+
+    Yields:
+        str: The decoded blocks of the file, with universal newlines.
+    """
+    decoder = io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder("utf-8")(errors="replace"),
+        translate=True,
+    )
+    with open(path, "rb") as file:
+        for raw in iter(lambda: file.read(block_size), b""):
+            if digest is not None:
+                digest.update(raw)
+            block = decoder.decode(raw)
+            if block:
+                yield block
+    block = decoder.decode(b"", final=True)
+    if block:
+        yield block
+
+
+def chunk_stream(
+    blocks: Iterable[str],
+    chunk_tokens: int = 500,
+    overlap_tokens: int = 50,
+) -> Iterator[Chunk]:
+    """
+    Split a stream of text into overlapping chunks of at most
+    `chunk_tokens` tokens.
+
+    Chunks end at the best paragraph, line, sentence or word boundary
+    in their second half. Runs of whitespace longer than a chunk are
+    skipped, so no chunk is blank. Only the current block and one chunk
+    are held in memory, whatever the length of the stream.
+
+    Args:
+        blocks (Iterable[str]): The text, in pieces of any size.
+        chunk_tokens (int, optional): The maximum chunk size in tokens. Defaults to 500.
+        overlap_tokens (int, optional): The overlap between chunks in tokens. Defaults to 50.
+
+    Yields:
+        Chunk: The chunk text and its start and end offsets in characters.
+    """
+    chunk_chars = max(1, chunk_tokens * CHARS_PER_TOKEN)
+    overlap_chars = min(
+        overlap_tokens * CHARS_PER_TOKEN, chunk_chars // 2
+    )
+    buffer = ""
+    offset = 0
+    exhausted = False
+    blocks = iter(blocks)
+
+    while True:
+        while not exhausted and len(buffer) <= chunk_chars:
+            block = next(blocks, None)
+            if block is None:
+                exhausted = True
+            else:
+                buffer += block
+        if exhausted and not buffer.strip():
+            return
+
+        if exhausted and len(buffer) <= chunk_chars:
+            yield Chunk(buffer, offset, offset + len(buffer))
+            return
+
+        cut = chunk_chars
+        for boundary in _BOUNDARIES:
+            position = buffer.rfind(
+                boundary, chunk_chars // 2, chunk_chars
+            )
+            if position != -1:
+                cut = position + len(boundary)
+                break
+        if not buffer[:cut].strip():
+            # Skip whitespace runs rather than yield them as chunks
+            skip = len(buffer) - len(buffer.lstrip())
+            buffer = buffer[skip:]
+            offset += skip
+            continue
+        yield Chunk(buffer[:cut], offset, offset + cut)
+
+        advance = max(1, cut - overlap_chars)
+        buffer = buffer[advance:]
+        offset += advance
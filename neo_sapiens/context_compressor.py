@@ -0,0 +1,175 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+
+from neo_sapiens.artifact_store import ArtifactStore, artifact_store
+from neo_sapiens.bm25_index import BM25Scorer
+from neo_sapiens.chunker import CHARS_PER_TOKEN, chunk_stream
+from neo_sapiens.memory_manager import count_tokens
+
+extract_prompt = (
+    "Copy verbatim only the parts of the following excerpt that an"
+    " agent with this role needs to do its job, or reply NONE if"
+    " nothing is relevant.\n\nRole: {role}\n\nExcerpt:\n{chunk}"
+)
+
+
+class ContextCompressor:
+    """
+    Map-reduce compression of task context too large to forward whole
+    to every worker.
+
+    An oversized task is stored in the artifact store and split into
+    chunks. In the map step, the chunks most relevant to each role are
+    found with BM25 and, given an extractor LLM, narrowed down to their
+    relevant parts by parallel extraction calls; the reduce step joins
+    them in document order into a per-role digest within
+    `digest_tokens`. Every digest ends with the artifact handle of the
+    full task.
+
+    Args:
+        max_tokens (int, optional): Tasks up to this size are passed unchanged. Defaults to 1500.
+        chunk_tokens (int, optional): The size of the chunks in tokens. Defaults to 300.
+        digest_tokens (int, optional): The maximum size of a digest in tokens. Defaults to 800.
+        workers (int, optional): The number of parallel map calls. Defaults to 8.
+        store (ArtifactStore, optional): Where the full tasks are stored. Defaults to the shared artifact store.
+
+    Examples:
+        >>> compressor = ContextCompressor()
+        >>> digests = compressor.compress(
+        ...     kaggle, {"Data Agent": "Collect and clean the data"}
+        ... )
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 1500,
+        chunk_tokens: int = 300,
+        digest_tokens: int = 800,
+        workers: int = 8,
+        store: Optional[ArtifactStore] = None,
+    ):
+        self.max_tokens = max_tokens
+        self.chunk_tokens = chunk_tokens
+        self.digest_tokens = digest_tokens
+        self.workers = workers
+        self.store = store or artifact_store
+
+    def _reduce(
+        self, parts: List[str], handle: str, size: int
+    ) -> str:
+        digest, used = [], 0
+        for part in parts:
+            tokens = count_tokens(part)
+            if used + tokens > self.digest_tokens:
+                if not digest:
+                    digest.append(
+                        part[: self.digest_tokens * CHARS_PER_TOKEN]
+                    )
+                break
+            digest.append(part)
+            used += tokens
+        return (
+            "\n...\n".join(digest)
+            + f"\n\n[Excerpt of a {size}-token task. The full task is"
+            f" stored as artifact {handle}; use read_artifact or"
+            " grep_artifact with this handle to see more.]"
+        )
+
+    def _extract(self, extractor: Callable, role: str, chunk: str):
+        try:
+            part = str(
+                extractor(
+                    extract_prompt.format(role=role, chunk=chunk)
+                )
+            )
+        except Exception as e:
+            logger.warning(f"Context extraction failed: {e}")
+            return chunk
+        return (
+            None if part.strip().upper() == "NONE" else part.strip()
+        )
+
+    def compress(
+        self,
+        task: str,
+        roles: Dict[str, str],
+        extractor: Optional[Callable[[str], str]] = None,
+    ) -> Dict[str, str]:
+        """
+        Compress a task into a digest per role.
+
+        The boss keeps the whole task; only the workers get digests.
+
+        Args:
+            task (str): The task.
+            roles (Dict[str, str]): The role description of every agent, by name.
+            extractor (Callable, optional): An LLM called with an extraction prompt per role and candidate chunk.
+
+        Returns:
+            Dict[str, str]: The digests by name, empty when the task is small enough to forward whole.
+        """
+        size = count_tokens(task)
+        if size <= self.max_tokens:
+            return {}
+
+        handle = self.store.put(task)
+        chunks = [
+            chunk.text
+            for chunk in chunk_stream(
+                [task], self.chunk_tokens, overlap_tokens=0
+            )
+        ]
+        index = BM25Scorer(chunks)
+        # Extraction shrinks chunks, so it is given more candidates
+        limit = max(1, self.digest_tokens // self.chunk_tokens)
+        if extractor is not None:
+            limit *= 2
+
+        def select(role: str) -> List[int]:
+            # The best chunks for the role, in document order
+            scores = index.scores(role)
+            if not scores.any():
+                return list(range(min(limit, len(chunks))))
+            best = scores.argsort()[::-1][:limit]
+            return sorted(int(i) for i in best if scores[i] > 0)
+
+        selected = {
+            name: select(role) for name, role in roles.items()
+        }
+        if extractor is None:
+            parts = {
+                name: [chunks[i] for i in selected[name]]
+                for name in roles
+            }
+        else:
+            # Map step: one extraction call per role and chunk
+            pairs = [
+                (name, i) for name in roles for i in selected[name]
+            ]
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                extracts = list(
+                    pool.map(
+                        lambda pair: self._extract(
+                            extractor, roles[pair[0]], chunks[pair[1]]
+                        ),
+                        pairs,
+                    )
+                )
+            parts = {name: [] for name in roles}
+            for (name, _), part in zip(pairs, extracts):
+                if part:
+                    parts[name].append(part)
+
+        logger.info(
+            f"Compressed a {size}-token task into {len(roles)} digests"
+            f" (artifact {handle})"
+        )
+        return {
+            name: self._reduce(parts[name] or chunks, handle, size)
+            for name in roles
+        }
+
+
+context_compressor = ContextCompressor()
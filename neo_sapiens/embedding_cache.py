@@ -0,0 +1,287 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    # Windows, appends are then only serialized within a process
+    fcntl = None
+
+_DIGEST_SIZE = 16
+
+
+def embedding_model_id(embedding_function: Callable) -> str:
+    """
+    Return an identifier of the model behind an embedding function.
+
+    Args:
+        embedding_function (Callable): The embedding function.
+
+    Returns:
+        str: The qualified name of the function, or of its class plus the model name when it exposes one.
+    """
+    model_name = getattr(
+        embedding_function, "model_name", None
+    ) or getattr(embedding_function, "_model_name", None)
+    owner = (
+        embedding_function
+        if hasattr(embedding_function, "__qualname__")
+        else type(embedding_function)
+    )
+    name = f"{owner.__module__}.{owner.__qualname__}"
+    return f"{name}:{model_name}" if model_name else name
+
+
+class EmbeddingCache:
+    """
+    Content-addressed on-disk cache wrapping an embedding function.
+
+    Embeddings are keyed by a hash of the model ID and the input, the
+    text or the dtype, shape and bytes of an image array, so the same
+    input is only embedded once per model, whatever collection it is
+    added to. Vectors are appended to a flat `dtype` file read back
+    through a memory map, and the keys to a sidecar file of 16-byte
+    digests whose position gives the row of the vector. Appends hold
+    an exclusive lock on the cache files and first pick up the rows
+    other processes appended, and vectors whose dimension differs from
+    the stored one are rejected.
+
+    Args:
+        embedding_function (Callable): Embeds a list of texts.
+        model_id (str, optional): The ID of the embedding model. Defaults to `embedding_model_id(embedding_function)`.
+        cache_dir (str, optional): The directory of the cache files. Defaults to "chroma/embedding_cache".
+        dtype (str, optional): The storage type, "float16" or "float32". Defaults to "float16".
+
+    Examples:
+        >>> ef = EmbeddingCache(DefaultEmbeddingFunction())
+        >>> ef(["some text", "some text"])
+    """
+
+    def __init__(
+        self,
+        embedding_function: Callable,
+        model_id: Optional[str] = None,
+        cache_dir: str = "chroma/embedding_cache",
+        dtype: str = "float16",
+    ):
+        self.embedding_function = embedding_function
+        self.model_id = model_id or embedding_model_id(
+            embedding_function
+        )
+        self.cache_dir = cache_dir
+        self.dtype = np.dtype(dtype)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", self.model_id)
+        self._keys_path = os.path.join(cache_dir, f"{slug}.keys")
+        self._vectors_path = os.path.join(cache_dir, f"{slug}.vec")
+        self._meta_path = os.path.join(cache_dir, f"{slug}.json")
+        self._lock_path = os.path.join(cache_dir, f"{slug}.lock")
+        self._rows: Dict[bytes, int] = {}
+        self._n_rows = 0
+        self._vectors = None
+        self.dim = None
+
+        if os.path.exists(self._meta_path):
+            self._load_meta()
+            self._load_rows()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getattr__(self, name):
+        # Forward name(), get_config() and the like to the wrapped function
+        if name == "embedding_function":
+            raise AttributeError(name)
+        return getattr(self.embedding_function, name)
+
+    def key(self, item: Any) -> bytes:
+        """Return the cache key of a text or an image array."""
+        digest = hashlib.blake2b(digest_size=_DIGEST_SIZE)
+        if isinstance(item, np.ndarray):
+            # str() of a large array elides most of its values
+            array = np.ascontiguousarray(item)
+            digest.update(
+                f"{self.model_id}\0array\0{array.dtype.str}"
+                f"\0{array.shape}\0".encode("utf-8")
+            )
+            digest.update(array.tobytes())
+        else:
+            digest.update(f"{self.model_id}\0{item}".encode("utf-8"))
+        return digest.digest()
+
+    def _load_meta(self):
+        with open(self._meta_path) as file:
+            meta = json.load(file)
+        self.dim = meta["dim"]
+        self.dtype = np.dtype(meta["dtype"])
+
+    def _complete_rows(self) -> int:
+        # Rows whose key and vector were both fully written
+        if not os.path.exists(self._keys_path):
+            return 0
+        return min(
+            os.path.getsize(self._keys_path) // _DIGEST_SIZE,
+            os.path.getsize(self._vectors_path)
+            // (self.dim * self.dtype.itemsize),
+        )
+
+    def _load_rows(self):
+        """Index the rows appended since the last load."""
+        n_rows = self._complete_rows()
+        if n_rows <= self._n_rows:
+            return
+        with open(self._keys_path, "rb") as file:
+            file.seek(self._n_rows * _DIGEST_SIZE)
+            keys = file.read((n_rows - self._n_rows) * _DIGEST_SIZE)
+        for row in range(self._n_rows, n_rows):
+            start = (row - self._n_rows) * _DIGEST_SIZE
+            self._rows[keys[start : start + _DIGEST_SIZE]] = row
+        self._n_rows = n_rows
+
+    @contextmanager
+    def _file_lock(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self._lock_path, "a") as file:
+            if fcntl is not None:
+                fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(file, fcntl.LOCK_UN)
+
+    def _row(self, row: int) -> np.ndarray:
+        if self._vectors is None or row >= len(self._vectors):
+            self._vectors = np.memmap(
+                self._vectors_path,
+                dtype=self.dtype,
+                mode="r",
+                shape=(self._n_rows, self.dim),
+            )
+        return np.asarray(self._vectors[row], dtype=np.float32)
+
+    def _append(self, keys: List[bytes], vectors: np.ndarray):
+        with self._file_lock():
+            if self.dim is None and os.path.exists(self._meta_path):
+                self._load_meta()
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                with open(self._meta_path, "w") as file:
+                    json.dump(
+                        {
+                            "model_id": self.model_id,
+                            "dim": self.dim,
+                            "dtype": self.dtype.name,
+                        },
+                        file,
+                    )
+            if vectors.shape[1] != self.dim:
+                raise ValueError(
+                    f"Embeddings of {vectors.shape[1]} dimensions do"
+                    f" not match the {self.dim} dimensions cached for"
+                    f" {self.model_id}"
+                )
+
+            self._load_rows()
+            # Drop a partial row left by an interrupted append
+            for path, row_size in (
+                (self._keys_path, _DIGEST_SIZE),
+                (self._vectors_path, self.dim * self.dtype.itemsize),
+            ):
+                with open(path, "ab") as file:
+                    file.truncate(self._n_rows * row_size)
+            with open(self._vectors_path, "ab") as file:
+                file.write(vectors.astype(self.dtype).tobytes())
+            with open(self._keys_path, "ab") as file:
+                file.write(b"".join(keys))
+            for offset, key in enumerate(keys):
+                self._rows[key] = self._n_rows + offset
+            self._n_rows += len(keys)
+
+    def __call__(self, input: List[Any]) -> List[np.ndarray]:
+        """
+        Embed inputs, only calling the wrapped function for cache misses.
+
+        Args:
+            input (List[Any]): The texts or image arrays.
+
+        Returns:
+            List[np.ndarray]: One float32 vector per input.
+        """
+        keys = [self.key(item) for item in input]
+        with self._lock:
+            missing = {}
+            for key, item in zip(keys, input):
+                if key not in self._rows and key not in missing:
+                    missing[key] = item
+            self.misses += len(missing)
+            self.hits += len(keys) - len(missing)
+
+            if missing:
+                embedded = np.asarray(
+                    self.embedding_function(list(missing.values())),
+                    dtype=np.float32,
+                )
+                # Return what later hits will read back from disk
+                embedded = embedded.astype(self.dtype).astype(
+                    np.float32
+                )
+                self._append(list(missing), embedded)
+                fresh = dict(zip(missing, embedded))
+            else:
+                fresh = {}
+
+            return [
+                (
+                    fresh[key]
+                    if key in fresh
+                    else self._row(self._rows[key])
+                )
+                for key in keys
+            ]
+
+    def embed_query(self, input: List[str]) -> List[np.ndarray]:
+        """Embed query texts through the cache."""
+        return self(input)
+
+
+_caches: Dict[tuple, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(
+    embedding_function: Callable,
+    model_id: Optional[str] = None,
+    cache_dir: str = "chroma/embedding_cache",
+    dtype: str = "float16",
+) -> EmbeddingCache:
+    """
+    Return the process-wide cache for a model, creating it on first use.
+
+    Args:
+        embedding_function (Callable): Embeds a list of texts.
+        model_id (str, optional): The ID of the embedding model.
+        cache_dir (str, optional): The directory of the cache files.
+        dtype (str, optional): The storage type.
+
+    Returns:
+        EmbeddingCache: The cache shared by every collection using the model.
+    """
+    model_id = model_id or embedding_model_id(embedding_function)
+    key = (os.path.abspath(cache_dir), model_id)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = EmbeddingCache(
+                embedding_function, model_id, cache_dir, dtype
+            )
+        return _caches[key]
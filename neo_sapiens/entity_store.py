@@ -0,0 +1,178 @@
+from typing import Tuple
+
+import numpy as np
+
+from neo_sapiens.spatial_hash import point_box_hits
+
+
+class EntityStore:
+    """
+    Struct-of-arrays store of equally sized moving boxes.
+
+    Positions and velocities live in preallocated (capacity, 2) NumPy
+    arrays whose first `len(store)` rows are the live entities, so
+    movement, culling and collisions are a few vectorized operations
+    per frame however many entities there are. Removed entities are
+    replaced by live ones from the end of the arrays (swap-remove),
+    which keeps the live rows contiguous without shifting them.
+
+    Args:
+        size (Tuple[float, float]): The width and height of every entity.
+        capacity (int, optional): The initial number of rows, doubled when full. Defaults to 1024.
+        dtype (optional): The dtype of the arrays. Defaults to np.float32.
+
+    Examples:
+        >>> enemies = EntityStore(size=(50, 30))
+        >>> enemies.spawn(100, -30, 0, 2)
+        >>> enemies.move()
+        >>> enemies.cull(y1=600)
+    """
+
+    def __init__(
+        self,
+        size: Tuple[float, float],
+        capacity: int = 1024,
+        dtype=np.float32,
+    ):
+        self.size = size
+        self.n = 0
+        self._positions = np.zeros((capacity, 2), dtype=dtype)
+        self._velocities = np.zeros((capacity, 2), dtype=dtype)
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def positions(self) -> np.ndarray:
+        """The (n, 2) top-left corners of the live entities, as a view."""
+        return self._positions[: self.n]
+
+    @property
+    def velocities(self) -> np.ndarray:
+        """The (n, 2) velocities of the live entities, as a view."""
+        return self._velocities[: self.n]
+
+    def clear(self):
+        """Remove every entity."""
+        self.n = 0
+
+    def _reserve(self, extra: int):
+        needed = self.n + extra
+        capacity = len(self._positions)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("_positions", "_velocities"):
+            old = getattr(self, name)
+            new = np.zeros((capacity, 2), dtype=old.dtype)
+            new[: self.n] = old[: self.n]
+            setattr(self, name, new)
+
+    def spawn(self, x: float, y: float, vx: float = 0, vy: float = 0):
+        """
+        Add an entity.
+
+        Args:
+            x (float): The left edge.
+            y (float): The top edge.
+            vx (float, optional): The horizontal velocity. Defaults to 0.
+            vy (float, optional): The vertical velocity. Defaults to 0.
+        """
+        self._reserve(1)
+        self._positions[self.n] = x, y
+        self._velocities[self.n] = vx, vy
+        self.n += 1
+
+    def spawn_many(self, positions, velocities=None):
+        """
+        Add entities in bulk.
+
+        Args:
+            positions: The (k, 2) top-left corners.
+            velocities (optional): The (k, 2) velocities. Defaults to zero.
+        """
+        positions = np.asarray(positions).reshape(-1, 2)
+        k = len(positions)
+        self._reserve(k)
+        self._positions[self.n : self.n + k] = positions
+        self._velocities[self.n : self.n + k] = (
+            0 if velocities is None else velocities
+        )
+        self.n += k
+
+    def remove(self, indices):
+        """
+        Remove entities by swap-remove.
+
+        Each hole below the new length is filled with one of the live
+        entities past it, so the order of the survivors changes but no
+        row is moved more than once.
+
+        Args:
+            indices: The indices of the live entities to remove.
+        """
+        indices = np.unique(np.asarray(indices, dtype=np.intp))
+        if not len(indices):
+            return
+        n = self.n - len(indices)
+        holes = indices[indices < n]
+        tail = np.ones(self.n - n, dtype=bool)
+        tail[indices[indices >= n] - n] = False
+        fillers = n + np.flatnonzero(tail)
+        self._positions[holes] = self._positions[fillers]
+        self._velocities[holes] = self._velocities[fillers]
+        self.n = n
+
+    def move(self, dt: float = 1):
+        """
+        Advance every entity by its velocity.
+
+        Args:
+            dt (float, optional): The time step in frames. Defaults to 1.
+        """
+        self.positions[:] += self.velocities * dt
+
+    def cull(
+        self,
+        x0: float = -np.inf,
+        y0: float = -np.inf,
+        x1: float = np.inf,
+        y1: float = np.inf,
+    ) -> int:
+        """
+        Remove the entities whose top-left corner left a rectangle.
+
+        Args:
+            x0 (float, optional): The smallest allowed left edge.
+            y0 (float, optional): The smallest allowed top edge.
+            x1 (float, optional): The largest allowed left edge.
+            y1 (float, optional): The largest allowed top edge.
+
+        Returns:
+            int: The number of removed entities.
+        """
+        x, y = self.positions[:, 0], self.positions[:, 1]
+        outside = np.flatnonzero(
+            (x < x0) | (x > x1) | (y < y0) | (y > y1)
+        )
+        self.remove(outside)
+        return len(outside)
+
+    def collide(
+        self, boxes: "EntityStore", cell_size: float = 64
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Match these entities, as points at their top-left corner, with
+        the boxes they are strictly inside of.
+
+        Args:
+            boxes (EntityStore): The entities to hit, no larger than `cell_size`.
+            cell_size (float, optional): The side of a grid cell. Defaults to 64.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The indices of the hitting entities and of the boxes they hit, at most one each.
+        """
+        return point_box_hits(
+            self.positions, boxes.positions, boxes.size, cell_size
+        )
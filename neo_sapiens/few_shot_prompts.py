@@ -1,4 +1,9 @@
-from typing import List
+from typing import List, Optional
+
+from neo_sapiens.few_shot_selector import (
+    FewShotSelector,
+    load_examples,
+)
 
 # Example usage
 data = """
@@ -185,7 +190,31 @@ self_driving_car_prompt = """
 """
 
 
-def orchestrator_prompt_agent(objective: str):
+# Every example team, selected by relevance to the objective
+few_shot_selector = FewShotSelector(
+    {
+        "data1": data1,
+        "data2": data2,
+        "data3": data3,
+        "data5": data5,
+        "self_driving_car_prompt": self_driving_car_prompt,
+        **load_examples(),
+    }
+)
+
+
+def orchestrator_prompt_agent(
+    objective: Optional[str] = None,
+    tools: Optional[str] = None,
+    k: int = 2,
+    token_budget: int = 600,
+):
+    examples = few_shot_selector.select(
+        objective,
+        k=k,
+        token_budget=token_budget,
+        default=["data5", "data3"],
+    )
     prompt = (
         "Create an instruction prompt for an swarm orchestrator to"
         " create a series of personalized, agents for the following"
@@ -198,8 +227,14 @@ def orchestrator_prompt_agent(objective: str):
         " and then the rules of the swarm,  compact the prompt, and"
         " say only return JSON data in markdown and nothing"
         f" else.Follow the schema here: {data} *############ Here are"
-        f" some examples:{data5} and another example{data3} "
+        f" some examples:{' and another example'.join(examples)} "
     )
+    if tools:
+        prompt += (
+            " Give each agent only the tools it needs with a"
+            ' "tools" list such as [{"tool": "terminal"}], choosing'
+            f" from these tools:\n{tools}"
+        )
     return str(prompt)
 
 
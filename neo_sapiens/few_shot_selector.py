@@ -0,0 +1,150 @@
+import ast
+import os
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from neo_sapiens.bm25_index import BM25Scorer
+from neo_sapiens.memory_manager import count_tokens
+
+# Example teams shipped next to the package in a source checkout
+USE_CASE_EXAMPLES = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "examples",
+    "use_case_examples.py",
+)
+
+
+def load_examples(path: str = USE_CASE_EXAMPLES) -> Dict[str, str]:
+    """
+    Read the `*_example` string constants of a Python file without
+    importing it.
+
+    Args:
+        path (str, optional): The path of the file. Defaults to examples/use_case_examples.py.
+
+    Returns:
+        Dict[str, str]: The examples by variable name, empty when the file does not exist.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as file:
+        tree = ast.parse(file.read())
+    examples = {}
+    for node in tree.body:
+        if (
+            isinstance(node, ast.Assign)
+            and len(node.targets) == 1
+            and isinstance(node.targets[0], ast.Name)
+            and node.targets[0].id.endswith("_example")
+            and isinstance(node.value, ast.Constant)
+            and isinstance(node.value.value, str)
+        ):
+            examples[node.targets[0].id] = node.value.value
+    return examples
+
+
+class FewShotSelector:
+    """
+    Pick the example teams most relevant to an objective.
+
+    Examples are scored against the objective with BM25 over their
+    plan, agent names and prompts, or by cosine similarity when an
+    embedding function is given, and the best ones are taken greedily
+    until `k` examples or the token budget is reached.
+
+    Args:
+        examples (Dict[str, str]): The example teams by name.
+        embedding_function (Callable, optional): Embeds a list of texts for semantic scoring.
+        k1 (float, optional): The BM25 term frequency saturation. Defaults to 1.2.
+        b (float, optional): The BM25 length normalization. Defaults to 0.75.
+
+    Examples:
+        >>> selector = FewShotSelector({"hotel": data5, "research": data2})
+        >>> selector.select("Run a hotel front desk", k=1)
+    """
+
+    def __init__(
+        self,
+        examples: Dict[str, str],
+        embedding_function: Optional[Callable] = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.names = list(examples)
+        self.examples = list(examples.values())
+        self.embedding_function = embedding_function
+        self.k1 = k1
+        self.b = b
+        self.tokens = [
+            count_tokens(example) for example in self.examples
+        ]
+        self._scorer = BM25Scorer(self.examples, k1, b)
+        self._vectors = None
+
+    def scores(self, objective: Optional[str]) -> np.ndarray:
+        """
+        Score every example against an objective.
+
+        Args:
+            objective (str): The objective of the swarm, None scoring every example 0.
+
+        Returns:
+            np.ndarray: One score per example, higher is more relevant.
+        """
+        objective = objective or ""
+        if self.embedding_function is not None:
+            if self._vectors is None:
+                self._vectors = self._normalize(
+                    self.embedding_function(self.examples)
+                )
+            query = self._normalize(
+                self.embedding_function([objective])
+            )
+            return self._vectors @ query[0]
+
+        return self._scorer.scores(objective)
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def select(
+        self,
+        objective: Optional[str],
+        k: int = 2,
+        token_budget: int = 600,
+        default: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        Return up to `k` of the most relevant examples within a budget.
+
+        The most relevant example is always selected, even when it alone
+        exceeds the budget.
+
+        Args:
+            objective (str): The objective of the swarm.
+            k (int, optional): The maximum number of examples. Defaults to 2.
+            token_budget (int, optional): The maximum total size of the examples in tokens. Defaults to 600.
+            default (List[str], optional): The names of the examples to use when none is relevant.
+
+        Returns:
+            List[str]: The selected examples, most relevant first.
+        """
+        scores = self.scores(objective)
+        if not scores.any() and default:
+            order = [self.names.index(name) for name in default]
+        else:
+            order = list(np.argsort(-scores, kind="stable"))
+
+        selected, used = [], 0
+        for i in order:
+            if len(selected) == k:
+                break
+            if selected and used + self.tokens[i] > token_budget:
+                continue
+            selected.append(self.examples[i])
+            used += self.tokens[i]
+        return selected
@@ -0,0 +1,161 @@
+import csv
+import time
+from contextlib import nullcontext
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+_NULL_SECTION = nullcontext()
+
+
+class _Section:
+    """Context manager adding its elapsed time to a frame slot."""
+
+    __slots__ = ("totals", "slot", "start")
+
+    def __init__(self, totals: List[int], slot: int):
+        self.totals = totals
+        self.slot = slot
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc):
+        self.totals[self.slot] += time.perf_counter_ns() - self.start
+
+
+class FrameProfiler:
+    """
+    Per-frame timings of game subsystems, kept in a ring buffer.
+
+    Each subsystem is timed with `perf_counter_ns` by a preallocated
+    context manager that adds to a plain list, and `end_frame` copies
+    the frame's totals into a fixed-size (frames, sections) NumPy ring
+    buffer, so the cost per section is two clock reads and a list
+    update, far below 1% of a 60 FPS frame. Statistics, histograms and
+    CSV dumps are computed from the buffer on demand.
+
+    Args:
+        sections (Sequence[str]): The names of the timed subsystems.
+        frames (int, optional): The number of most recent frames kept. Defaults to 600.
+
+    Examples:
+        >>> profiler = FrameProfiler(["update", "render"])
+        >>> with profiler.time("update"):
+        ...     game.step()
+        >>> profiler.end_frame()
+        >>> profiler.stats()["update"]["p95"]
+    """
+
+    def __init__(self, sections: Sequence[str], frames: int = 600):
+        self.names = list(sections)
+        self.samples = np.zeros(
+            (frames, len(self.names)), dtype=np.int64
+        )
+        self.frames = 0
+        self._totals = [0] * len(self.names)
+        self._sections = {
+            name: _Section(self._totals, slot)
+            for slot, name in enumerate(self.names)
+        }
+
+    def time(self, name: str):
+        """Return the context manager timing a section."""
+        return self._sections[name]
+
+    def end_frame(self):
+        """Store the timings of the current frame and start the next."""
+        self.samples[self.frames % len(self.samples)] = self._totals
+        self.frames += 1
+        for slot in range(len(self._totals)):
+            self._totals[slot] = 0
+
+    def recent(self) -> np.ndarray:
+        """Return the buffered (frames, sections) timings in ns, oldest first."""
+        size = len(self.samples)
+        if self.frames <= size:
+            return self.samples[: self.frames]
+        return np.roll(self.samples, -(self.frames % size), axis=0)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summarize the buffered frames.
+
+        Returns:
+            Dict[str, Dict[str, float]]: The mean, median, 95th percentile and maximum in ms of every section and of their total.
+        """
+        recent = self.recent()
+        if not len(recent):
+            return {}
+        columns = dict(zip(self.names, recent.T))
+        columns["total"] = recent.sum(axis=1)
+        return {
+            name: {
+                "mean": float(values.mean()) / 1e6,
+                "p50": float(np.percentile(values, 50)) / 1e6,
+                "p95": float(np.percentile(values, 95)) / 1e6,
+                "max": float(values.max()) / 1e6,
+            }
+            for name, values in columns.items()
+        }
+
+    def histogram(
+        self, name: str, bins: Optional[np.ndarray] = None
+    ) -> tuple:
+        """
+        Return the rolling histogram of a section.
+
+        Args:
+            name (str): The section, or "total".
+            bins (np.ndarray, optional): The bin edges in ms. Defaults to log-spaced edges from 1 µs to 100 ms.
+
+        Returns:
+            tuple: The counts and the bin edges.
+        """
+        recent = self.recent()
+        values = (
+            recent.sum(axis=1)
+            if name == "total"
+            else recent[:, self.names.index(name)]
+        )
+        if bins is None:
+            bins = np.logspace(-3, 2, 21)
+        return np.histogram(values / 1e6, bins=bins)
+
+    def overlay_lines(self) -> List[str]:
+        """Return one line of statistics per section, for display."""
+        return [
+            f"{name:<16}{s['mean']:6.2f} {s['p95']:6.2f} {s['max']:6.2f} ms"
+            for name, s in self.stats().items()
+        ]
+
+    def to_csv(self, path: str):
+        """
+        Write the buffered frames as CSV, one row per frame in µs.
+
+        Args:
+            path (str): The path of the file.
+        """
+        recent = self.recent()
+        first = self.frames - len(recent)
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(
+                [
+                    "frame",
+                    *(f"{name}_us" for name in self.names),
+                    "total_us",
+                ]
+            )
+            for i, row in enumerate(recent // 1000):
+                writer.writerow(
+                    [first + i, *row.tolist(), int(row.sum())]
+                )
+
+
+def section(profiler: Optional[FrameProfiler], name: str):
+    """Time a section with a profiler, or do nothing without one."""
+    if profiler is None:
+        return _NULL_SECTION
+    return profiler.time(name)
@@ -1,8 +1,28 @@
-import pygame
-import time
+import hashlib
 import random
+from collections import deque
+from typing import Optional
+
+import pygame
 
-pygame.init()
+from neo_sapiens.frame_profiler import FrameProfiler
+from neo_sapiens.game_runtime import (
+    DOWN,
+    KEY_COMMANDS,
+    LEFT,
+    RESTART,
+    RIGHT,
+    UP,
+    DirtyScreen,
+    InputLog,
+    ProfilerOverlay,
+    TextCache,
+    parse_game_args,
+    replay,
+    run_fixed_timestep,
+    run_headless,
+    use_dummy_display,
+)
 
 # Colors
 white = (255, 255, 255)
@@ -15,138 +35,308 @@ blue = (50, 153, 213)
 # Display window size
 dis_width = 800
 dis_height = 600
-dis = pygame.display.set_mode((dis_width, dis_height))
 
 # Game specific variables
 snake_block = 10
 snake_speed = 30
+step_time = 0.07  # Seconds per simulation step
+
+# Subsystems timed by the frame profiler
+sections = ("input", "step", "render")
+
+# Display, sprites and fonts, created by init_display
+dis = None
+dirty_dis = None
+snake_img = None
+food_img = None
+font_style = None
+score_font = None
+
+
+# Game states
+PLAYING, LOST, WON = "playing", "lost", "won"
+
+# Food cells, as in round(randrange(0, dis_width - snake_block) / 10)
+food_columns = (dis_width - snake_block) // snake_block + 1
+food_rows = (dis_height - snake_block) // snake_block + 1
+
+
+class SnakeGame:
+    """
+    State and rules of the snake game, without any rendering.
+
+    Every call to `step` moves the snake by one block. The body is a
+    deque of cells from tail to head with a set of the occupied cells,
+    so a move and its self-collision check take constant time however
+    long the snake is, and food is only placed on free cells.
+
+    The game is a state machine: it starts PLAYING, becomes LOST when
+    the snake hits a wall or itself, or WON when no free cell is left
+    for food, and returns to PLAYING on `reset` or a RESTART command.
+    Steps do nothing else outside of PLAYING. Food is placed by the
+    game's own random generator, so games with the same seed and
+    commands are identical.
 
-# Fonts
-font_style = pygame.font.SysFont(None, 50)
-score_font = pygame.font.SysFont(None, 35)
+    Args:
+        seed (int, optional): The seed of the random generator.
+
+    Examples:
+        >>> game = SnakeGame(seed=7)
+        >>> game.step([LEFT])
+        >>> game.state, game.score
+        ('playing', 0)
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self.random = random.Random(seed)
+        self.reset()
+
+    def reset(self):
+        """Start a new game."""
+        self.state = PLAYING
+        self.x1 = dis_width / 2
+        self.y1 = dis_height / 2
+        self.x1_change = 0
+        self.y1_change = 0
+        self.body = deque()
+        self.occupied = set()
+        self.length_of_snake = 1
+        self.place_food()
+        self.frame = 0
+
+    @property
+    def score(self) -> int:
+        return self.length_of_snake - 1
+
+    def place_food(self):
+        """Put the food on a random free cell, or win if there is none."""
+        cells = food_columns * food_rows
+        # Rejection sampling is constant time until the board fills up
+        for _ in range(8):
+            cell = self.random.randrange(cells)
+            food = (
+                cell % food_columns * snake_block,
+                cell // food_columns * snake_block,
+            )
+            if food not in self.occupied:
+                self.foodx, self.foody = food
+                return
+        free = [
+            (column * snake_block, row * snake_block)
+            for row in range(food_rows)
+            for column in range(food_columns)
+            if (column * snake_block, row * snake_block)
+            not in self.occupied
+        ]
+        if not free:
+            self.state = WON
+            return
+        self.foodx, self.foody = self.random.choice(free)
+
+    def step(self, commands=()):
+        """
+        Apply the commands of a tick and move the snake.
+
+        Args:
+            commands (optional): LEFT, RIGHT, UP and DOWN commands, the last one winning, or RESTART once the game is over.
+        """
+        if self.state != PLAYING:
+            if RESTART in commands:
+                self.reset()
+            return
+        for command in commands:
+            if command == LEFT:
+                self.x1_change = -snake_block
+                self.y1_change = 0
+            elif command == RIGHT:
+                self.x1_change = snake_block
+                self.y1_change = 0
+            elif command == UP:
+                self.y1_change = -snake_block
+                self.x1_change = 0
+            elif command == DOWN:
+                self.y1_change = snake_block
+                self.x1_change = 0
+
+        if (
+            self.x1 >= dis_width
+            or self.x1 < 0
+            or self.y1 >= dis_height
+            or self.y1 < 0
+        ):
+            self.state = LOST
+        self.x1 += self.x1_change
+        self.y1 += self.y1_change
+        snake_head = (self.x1, self.y1)
+        # The tail moves out of the way before the head moves in
+        if len(self.body) >= self.length_of_snake:
+            self.occupied.discard(self.body.popleft())
+        if snake_head in self.occupied:
+            self.state = LOST
+        self.body.append(snake_head)
+        self.occupied.add(snake_head)
+
+        if self.x1 == self.foodx and self.y1 == self.foody:
+            self.length_of_snake += 1
+            self.place_food()
+        self.frame += 1
+
+    def state_hash(self) -> str:
+        """Return a short hash of the whole game state."""
+        state = (
+            self.state,
+            self.frame,
+            self.length_of_snake,
+            self.x1_change,
+            self.y1_change,
+            self.foodx,
+            self.foody,
+            tuple(self.body),
+        )
+        return hashlib.blake2b(
+            repr(state).encode("utf-8"), digest_size=8
+        ).hexdigest()
+
+
+def autopilot(game: SnakeGame):
+    """Return a policy heading straight for the food, for benchmarks."""
+
+    def policy(frame: int):
+        if game.state != PLAYING:
+            return [RESTART]
+        if game.x1 != game.foodx:
+            return [LEFT if game.foodx < game.x1 else RIGHT]
+        return [UP if game.foody < game.y1 else DOWN]
+
+    return policy
+
+
+def init_display():
+    global dis, dirty_dis, snake_img, food_img, font_style, score_font
+    pygame.init()
+    dis = pygame.display.set_mode((dis_width, dis_height))
+    dirty_dis = DirtyScreen(dis, blue)
+    snake_img = pygame.Surface((snake_block, snake_block)).convert()
+    snake_img.fill(black)
+    food_img = pygame.Surface((snake_block, snake_block)).convert()
+    food_img.fill(green)
+    font_style = TextCache(pygame.font.SysFont(None, 50))
+    score_font = TextCache(pygame.font.SysFont(None, 35))
 
 
 def message(msg, color):
-    mesg = font_style.render(msg, True, color)
-    dis.blit(mesg, [dis_width / 6, dis_height / 3])
+    mesg = font_style.render(msg, color)
+    return mesg, [(dis_width / 6, dis_height / 3)]
 
 
 # Score Function
 def your_score(score):
-    value = score_font.render(
-        "Your Score: " + str(score), True, yellow
-    )
-    dis.blit(value, [0, 0])
+    value = score_font.render("Your Score: " + str(score), yellow)
+    return value, [(0, 0)]
 
 
 # Our snake function
 def our_snake(snake_block, snake_list):
-    for x in snake_list:
-        pygame.draw.rect(
-            dis, black, [x[0], x[1], snake_block, snake_block]
-        )
-
+    return snake_img, snake_list
 
-# Main function
-def gameLoop():
-    game_over = False
-    game_close = False
 
-    x1 = dis_width / 2
-    y1 = dis_height / 2
+def render(
+    game: SnakeGame, overlay: Optional[ProfilerOverlay] = None
+):
+    if game.state == LOST:
+        batches = [
+            message("You Lost! Press Q-Quit or C-Play Again", red)
+        ]
+    elif game.state == WON:
+        batches = [
+            message("You Won! Press Q-Quit or C-Play Again", yellow)
+        ]
+    else:
+        batches = [
+            (food_img, [(game.foodx, game.foody)]),
+            our_snake(snake_block, game.body),
+        ]
+    batches.append(your_score(game.score))
+    if overlay is not None:
+        batches += overlay.batches()
+    dirty_dis.draw(batches)
 
-    x1_change = 0
-    y1_change = 0
 
-    snake_list = []
-    length_of_snake = 1
+# Main function
+def gameLoop(
+    game: SnakeGame,
+    step=None,
+    profiler: Optional[FrameProfiler] = None,
+):
+    def poll():
+        commands = []
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return None
+            if event.type != pygame.KEYDOWN:
+                continue
+            if game.state != PLAYING:
+                if event.key == pygame.K_q:
+                    return None
+                if event.key == pygame.K_c:
+                    commands.append(RESTART)
+            elif event.key in KEY_COMMANDS:
+                commands.append(KEY_COMMANDS[event.key])
+        return commands
 
-    foodx = (
-        round(random.randrange(0, dis_width - snake_block) / 10.0)
-        * 10.0
-    )
-    foody = (
-        round(random.randrange(0, dis_height - snake_block) / 10.0)
-        * 10.0
+    overlay = ProfilerOverlay(profiler, white) if profiler else None
+    run_fixed_timestep(
+        step or game.step,
+        lambda: render(game, overlay),
+        poll,
+        1 / step_time,
+        profiler=profiler,
     )
 
-    while not game_over:
-        while game_close:
-            dis.fill(blue)
-            message("You Lost! Press Q-Quit or C-Play Again", red)
-            your_score(length_of_snake - 1)
-            pygame.display.update()
 
-            for event in pygame.event.get():
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_q:
-                        game_over = True
-                        game_close = False
-                    if event.key == pygame.K_c:
-                        gameLoop()
+def main():
+    args = parse_game_args("Snake")
+    if args.replay:
+        log = InputLog.load(args.replay)
+        rate = replay(SnakeGame(log.seed), log)
+        print(f"Replayed {log.frames} frames at {rate:.0f} frames/s")
+        return
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                game_over = True
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_LEFT:
-                    x1_change = -snake_block
-                    y1_change = 0
-                elif event.key == pygame.K_RIGHT:
-                    x1_change = snake_block
-                    y1_change = 0
-                elif event.key == pygame.K_UP:
-                    y1_change = -snake_block
-                    x1_change = 0
-                elif event.key == pygame.K_DOWN:
-                    y1_change = snake_block
-                    x1_change = 0
-
-        if x1 >= dis_width or x1 < 0 or y1 >= dis_height or y1 < 0:
-            game_close = True
-        x1 += x1_change
-        y1 += y1_change
-        dis.fill(blue)
-        pygame.draw.rect(
-            dis, green, [foodx, foody, snake_block, snake_block]
-        )
-        snake_head = []
-        snake_head.append(x1)
-        snake_head.append(y1)
-        snake_list.append(snake_head)
-        if len(snake_list) > length_of_snake:
-            del snake_list[0]
-
-        for x in snake_list[:-1]:
-            if x == snake_head:
-                game_close = True
-
-        our_snake(snake_block, snake_list)
-        your_score(length_of_snake - 1)
-
-        pygame.display.update()
-
-        if x1 == foodx and y1 == foody:
-            foodx = (
-                round(
-                    random.randrange(0, dis_width - snake_block)
-                    / 10.0
-                )
-                * 10.0
-            )
-            foody = (
-                round(
-                    random.randrange(0, dis_height - snake_block)
-                    / 10.0
-                )
-                * 10.0
-            )
-            length_of_snake += 1
+    seed = (
+        args.seed if args.seed is not None else random.getrandbits(32)
+    )
+    game = SnakeGame(seed)
+    log = InputLog("snake", seed)
+    step = log.recorder(game) if args.record else game.step
+    profiler = FrameProfiler(sections) if args.profile else None
+    if profiler is not None:
+        untimed_step = step
 
-        time.sleep(0.07)
+        def step(commands):
+            with profiler.time("step"):
+                untimed_step(commands)
 
+    if args.headless:
+        use_dummy_display()
+    init_display()
+    if args.headless:
+        rate = run_headless(
+            step,
+            args.frames,
+            autopilot(game),
+            (lambda: render(game)) if args.render else None,
+            profiler,
+        )
+        print(f"{args.frames} frames at {rate:.0f} frames/s")
+        if profiler is not None:
+            profiler.to_csv(args.profile)
+            print("\n".join(profiler.overlay_lines()))
+    else:
+        gameLoop(game, step, profiler)
+    if args.record:
+        log.save(args.record)
     pygame.quit()
-    quit()
 
 
-gameLoop()
+if __name__ == "__main__":
+    main()
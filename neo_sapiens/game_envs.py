@@ -0,0 +1,527 @@
+import multiprocessing as mp
+import os
+import random
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from neo_sapiens import game as snake
+from neo_sapiens import swarm_game as swarm
+from neo_sapiens.entity_store import EntityStore
+from neo_sapiens.game_runtime import DOWN, FIRE, LEFT, NOOP, RIGHT, UP
+
+# Discrete actions of the environments, as game commands
+SWARM_ACTIONS = (NOOP, LEFT, RIGHT, FIRE)
+SNAKE_ACTIONS = (NOOP, LEFT, RIGHT, UP, DOWN)
+
+# Enemy counts on a coarse grid of the screen, observed by agents
+RADAR_COLUMNS, RADAR_ROWS = 8, 6
+
+
+def swarm_observation(
+    player_x: np.ndarray,
+    enemies: np.ndarray,
+    env_ids: np.ndarray,
+    n: int,
+) -> np.ndarray:
+    """
+    Observe swarm games as the player position and an enemy radar.
+
+    Args:
+        player_x (np.ndarray): The (n,) left edges of the players.
+        enemies (np.ndarray): The (m, 2) top-left corners of the enemies, in screen coordinates.
+        env_ids (np.ndarray): The (m,) game of every enemy.
+        n (int): The number of games.
+
+    Returns:
+        np.ndarray: The (n, 1 + RADAR_ROWS * RADAR_COLUMNS) observations.
+    """
+    observations = np.zeros(
+        (n, 1 + RADAR_ROWS * RADAR_COLUMNS), dtype=np.float32
+    )
+    observations[:, 0] = np.asarray(player_x) / (
+        swarm.SCREEN_WIDTH - 50
+    )
+    if len(enemies):
+        centers = enemies + (
+            swarm.ENEMY_WIDTH / 2,
+            swarm.ENEMY_HEIGHT / 2,
+        )
+        columns = np.clip(
+            (
+                centers[:, 0] * RADAR_COLUMNS // swarm.SCREEN_WIDTH
+            ).astype(np.intp),
+            0,
+            RADAR_COLUMNS - 1,
+        )
+        rows = np.clip(
+            (
+                centers[:, 1] * RADAR_ROWS // swarm.SCREEN_HEIGHT
+            ).astype(np.intp),
+            0,
+            RADAR_ROWS - 1,
+        )
+        cells = (
+            env_ids * RADAR_ROWS + rows
+        ) * RADAR_COLUMNS + columns
+        observations[:, 1:] = np.bincount(
+            cells, minlength=n * RADAR_ROWS * RADAR_COLUMNS
+        ).reshape(n, -1)
+    return observations
+
+
+class SwarmEnv:
+    """
+    Gym-style environment of one Robot Swarm Attack game, without
+    rendering.
+
+    Actions are indices into SWARM_ACTIONS. The reward of a step is the
+    number of enemies destroyed minus the number that got past the
+    player, and an episode lasts `max_steps` ticks.
+
+    Args:
+        max_steps (int, optional): The length of an episode. Defaults to 1000.
+        seed (int, optional): The seed of the episode seeds.
+
+    Examples:
+        >>> env = SwarmEnv(seed=0)
+        >>> observation = env.reset()
+        >>> observation, reward, done, info = env.step(3)
+    """
+
+    n_actions = len(SWARM_ACTIONS)
+    observation_size = 1 + RADAR_ROWS * RADAR_COLUMNS
+
+    def __init__(
+        self, max_steps: int = 1000, seed: Optional[int] = None
+    ):
+        self.max_steps = max_steps
+        self.random = random.Random(seed)
+        self.game = None
+
+    def _observe(self) -> np.ndarray:
+        enemies = self.game.enemies.positions
+        return swarm_observation(
+            np.array([self.game.player_x]),
+            enemies,
+            np.zeros(len(enemies), dtype=np.intp),
+            1,
+        )[0]
+
+    def reset(self) -> np.ndarray:
+        """Start a new episode and return its first observation."""
+        self.game = swarm.SwarmGame(self.random.getrandbits(32))
+        return self._observe()
+
+    def step(
+        self, action: int
+    ) -> Tuple[np.ndarray, float, bool, Dict]:
+        """
+        Play one tick.
+
+        Args:
+            action (int): The index of the action in SWARM_ACTIONS.
+
+        Returns:
+            Tuple[np.ndarray, float, bool, Dict]: The observation, reward, end of episode flag and kill and escape counts.
+        """
+        kills, escaped = self.game.kills, self.game.escaped
+        command = SWARM_ACTIONS[action]
+        self.game.step([command] if command != NOOP else [])
+        kills = self.game.kills - kills
+        escaped = self.game.escaped - escaped
+        return (
+            self._observe(),
+            float(kills - escaped),
+            self.game.frame >= self.max_steps,
+            {"kills": kills, "escaped": escaped},
+        )
+
+
+class SwarmVectorEnv:
+    """
+    N independent swarm games stepped in lock-step on NumPy arrays.
+
+    The games share two EntityStores, each game shifted into its own
+    horizontal lane of a wide virtual screen, so moving, culling and
+    colliding the entities of every game takes the same few vectorized
+    calls as for one game. Finished games are reset automatically, and
+    the observation then returned is the first of the new episode.
+
+    Args:
+        n (int): The number of games.
+        max_steps (int, optional): The length of an episode. Defaults to 1000.
+        seed (int, optional): The seed of the enemy spawns.
+
+    Examples:
+        >>> envs = SwarmVectorEnv(256)
+        >>> observations = envs.reset()
+        >>> actions = np.random.randint(0, SwarmEnv.n_actions, 256)
+        >>> observations, rewards, dones, info = envs.step(actions)
+    """
+
+    n_actions = SwarmEnv.n_actions
+    observation_size = SwarmEnv.observation_size
+
+    # Lanes are wider than the screen, so no bullet hits another game
+    lane_width = swarm.SCREEN_WIDTH + 2 * swarm.CELL_SIZE
+
+    def __init__(
+        self,
+        n: int,
+        max_steps: int = 1000,
+        seed: Optional[int] = None,
+    ):
+        self.n = n
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(seed)
+        self.lanes = np.arange(n) * self.lane_width
+        # float32 loses whole pixels past 2**24, about 18k lanes in
+        self.bullets = EntityStore(
+            (swarm.BULLET_WIDTH, swarm.BULLET_HEIGHT),
+            capacity=16 * n,
+            dtype=np.float64,
+        )
+        self.enemies = EntityStore(
+            (swarm.ENEMY_WIDTH, swarm.ENEMY_HEIGHT),
+            capacity=16 * n,
+            dtype=np.float64,
+        )
+        self.player_x = np.full(n, swarm.SCREEN_WIDTH // 2)
+        self.player_y = swarm.SCREEN_HEIGHT - 60
+        self.frames = np.zeros(n, dtype=np.int64)
+
+    def _env_ids(self, store: EntityStore) -> np.ndarray:
+        return (store.positions[:, 0] // self.lane_width).astype(
+            np.intp
+        )
+
+    def _observe(self) -> np.ndarray:
+        env_ids = self._env_ids(self.enemies)
+        local = self.enemies.positions.copy()
+        local[:, 0] -= self.lanes[env_ids]
+        return swarm_observation(
+            self.player_x, local, env_ids, self.n
+        )
+
+    def reset(self) -> np.ndarray:
+        """Start new episodes in every game and return the observations."""
+        self.bullets.clear()
+        self.enemies.clear()
+        self.player_x[:] = swarm.SCREEN_WIDTH // 2
+        self.frames[:] = 0
+        return self._observe()
+
+    def step(
+        self, actions
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict]:
+        """
+        Play one tick of every game.
+
+        Args:
+            actions: The (n,) indices of the actions in SWARM_ACTIONS.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray, Dict]: The observations, rewards, end of episode flags and kill and escape counts.
+        """
+        commands = np.asarray(SWARM_ACTIONS)[np.asarray(actions)]
+        self.player_x += swarm.PLAYER_SPEED * (
+            (commands == RIGHT).astype(np.int64) - (commands == LEFT)
+        )
+        np.clip(
+            self.player_x,
+            0,
+            swarm.SCREEN_WIDTH - 50,
+            out=self.player_x,
+        )
+        firing = np.flatnonzero(commands == FIRE)
+        self.bullets.spawn_many(
+            np.c_[
+                self.lanes[firing] + self.player_x[firing] + 25,
+                np.full(len(firing), self.player_y - 20),
+            ],
+            (0, -swarm.BULLET_SPEED),
+        )
+
+        self.bullets.move()
+        self.bullets.cull(y0=0)
+
+        spawning = np.flatnonzero(
+            self.rng.integers(1, swarm.ENEMY_SPAWN_RATE + 1, self.n)
+            == 1
+        )
+        enemy_x = self.rng.integers(
+            0, swarm.SCREEN_WIDTH - 50 + 1, len(spawning)
+        )
+        self.enemies.spawn_many(
+            np.c_[
+                self.lanes[spawning] + enemy_x,
+                np.full(len(spawning), -30),
+            ],
+            (0, swarm.ENEMY_SPEED),
+        )
+
+        self.enemies.move()
+        gone = np.flatnonzero(
+            self.enemies.positions[:, 1] > swarm.SCREEN_HEIGHT
+        )
+        escaped = np.bincount(
+            self._env_ids(self.enemies)[gone], minlength=self.n
+        )
+        self.enemies.remove(gone)
+
+        hit_bullets, hit_enemies = self.bullets.collide(
+            self.enemies, swarm.CELL_SIZE
+        )
+        kills = np.bincount(
+            self._env_ids(self.enemies)[hit_enemies], minlength=self.n
+        )
+        self.bullets.remove(hit_bullets)
+        self.enemies.remove(hit_enemies)
+
+        self.frames += 1
+        dones = self.frames >= self.max_steps
+        if dones.any():
+            self._reset_games(np.flatnonzero(dones))
+        return (
+            self._observe(),
+            (kills - escaped).astype(np.float32),
+            dones,
+            {"kills": kills, "escaped": escaped},
+        )
+
+    def _reset_games(self, games: np.ndarray):
+        for store in (self.bullets, self.enemies):
+            store.remove(
+                np.flatnonzero(np.isin(self._env_ids(store), games))
+            )
+        self.player_x[games] = swarm.SCREEN_WIDTH // 2
+        self.frames[games] = 0
+
+
+class SnakeEnv:
+    """
+    Gym-style environment of one snake game, without rendering.
+
+    Actions are indices into SNAKE_ACTIONS. The reward is 1 per food
+    eaten and -1 for losing, and an episode ends when the game does or
+    after `max_steps` ticks. Observations are the head position, the
+    offset to the food, the direction, the length and whether each of
+    the four neighbouring cells is a wall or part of the body.
+
+    Args:
+        max_steps (int, optional): The maximum length of an episode. Defaults to 2000.
+        seed (int, optional): The seed of the episode seeds.
+
+    Examples:
+        >>> env = SnakeEnv(seed=0)
+        >>> observation = env.reset()
+        >>> observation, reward, done, info = env.step(1)
+    """
+
+    n_actions = len(SNAKE_ACTIONS)
+    observation_size = 11
+
+    def __init__(
+        self, max_steps: int = 2000, seed: Optional[int] = None
+    ):
+        self.max_steps = max_steps
+        self.random = random.Random(seed)
+        self.game = None
+
+    def _observe(self) -> np.ndarray:
+        game, block = self.game, snake.snake_block
+        danger = [
+            not (
+                0 <= game.x1 + dx < snake.dis_width
+                and 0 <= game.y1 + dy < snake.dis_height
+            )
+            or (game.x1 + dx, game.y1 + dy) in game.occupied
+            for dx, dy in (
+                (-block, 0),
+                (block, 0),
+                (0, -block),
+                (0, block),
+            )
+        ]
+        return np.array(
+            [
+                game.x1 / snake.dis_width,
+                game.y1 / snake.dis_height,
+                (game.foodx - game.x1) / snake.dis_width,
+                (game.foody - game.y1) / snake.dis_height,
+                game.x1_change / block,
+                game.y1_change / block,
+                game.length_of_snake
+                / (snake.food_columns * snake.food_rows),
+                *danger,
+            ],
+            dtype=np.float32,
+        )
+
+    def reset(self) -> np.ndarray:
+        """Start a new episode and return its first observation."""
+        self.game = snake.SnakeGame(self.random.getrandbits(32))
+        return self._observe()
+
+    def step(
+        self, action: int
+    ) -> Tuple[np.ndarray, float, bool, Dict]:
+        """
+        Play one tick.
+
+        Args:
+            action (int): The index of the action in SNAKE_ACTIONS.
+
+        Returns:
+            Tuple[np.ndarray, float, bool, Dict]: The observation, reward, end of episode flag and game state.
+        """
+        score = self.game.score
+        command = SNAKE_ACTIONS[action]
+        self.game.step([command] if command != NOOP else [])
+        reward = self.game.score - score
+        if self.game.state == snake.LOST:
+            reward -= 1
+        done = (
+            self.game.state != snake.PLAYING
+            or self.game.frame >= self.max_steps
+        )
+        return (
+            self._observe(),
+            float(reward),
+            done,
+            {"state": self.game.state},
+        )
+
+
+def _run_envs(envs, command: str, data=None):
+    if command == "reset":
+        return np.stack([env.reset() for env in envs])
+    observations, rewards, dones = [], [], []
+    for env, action in zip(envs, data):
+        observation, reward, done, _ = env.step(int(action))
+        if done:
+            observation = env.reset()
+        observations.append(observation)
+        rewards.append(reward)
+        dones.append(done)
+    return (
+        np.stack(observations),
+        np.array(rewards, dtype=np.float32),
+        np.array(dones),
+    )
+
+
+def _worker(pipe, env_fn: Callable, seeds: List[Optional[int]]):
+    envs = [env_fn(seed=seed) for seed in seeds]
+    while True:
+        command, data = pipe.recv()
+        if command == "close":
+            pipe.close()
+            return
+        pipe.send(_run_envs(envs, command, data))
+
+
+class ProcessVectorEnv:
+    """
+    N environments with Python game logic stepped across processes.
+
+    The environments are split into one contiguous slice per worker
+    process, so a step costs one message round trip per worker instead
+    of one per environment. Finished environments are reset
+    automatically, and the observation then returned is the first of
+    the new episode. With `workers=0`, the environments are stepped in
+    the calling process.
+
+    Args:
+        env_fn (Callable): Creates an environment from a `seed` keyword; must be picklable, like an environment class.
+        n (int): The number of environments.
+        workers (int, optional): The number of processes. Defaults to the number of CPUs, at most `n`.
+        seed (int, optional): The seed of the first environment, incremented for the next ones.
+
+    Examples:
+        >>> with ProcessVectorEnv(SnakeEnv, 64) as envs:
+        ...     observations = envs.reset()
+        ...     observations, rewards, dones = envs.step(np.zeros(64, int))
+    """
+
+    def __init__(
+        self,
+        env_fn: Callable,
+        n: int,
+        workers: Optional[int] = None,
+        seed: Optional[int] = None,
+    ):
+        self.n = n
+        seeds = [None if seed is None else seed + i for i in range(n)]
+        if workers is None:
+            workers = min(n, os.cpu_count() or 1)
+        self.slices = [
+            s
+            for s in np.array_split(np.arange(n), max(workers, 1))
+            if len(s)
+        ]
+        self.envs = None
+        self.pipes, self.processes = [], []
+        if workers == 0:
+            self.envs = [env_fn(seed=seed) for seed in seeds]
+            return
+        for indices in self.slices:
+            parent, child = mp.Pipe()
+            process = mp.Process(
+                target=_worker,
+                args=(child, env_fn, [seeds[i] for i in indices]),
+                daemon=True,
+            )
+            process.start()
+            child.close()
+            self.pipes.append(parent)
+            self.processes.append(process)
+
+    def _call(self, command: str, actions=None):
+        if self.envs is not None:
+            return _run_envs(self.envs, command, actions)
+        for pipe, indices in zip(self.pipes, self.slices):
+            pipe.send(
+                (
+                    command,
+                    None if actions is None else actions[indices],
+                )
+            )
+        results = [pipe.recv() for pipe in self.pipes]
+        if command == "reset":
+            return np.concatenate(results)
+        return tuple(np.concatenate(parts) for parts in zip(*results))
+
+    def reset(self) -> np.ndarray:
+        """Start new episodes in every environment and return the observations."""
+        return self._call("reset")
+
+    def step(
+        self, actions
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Step every environment.
+
+        Args:
+            actions: The (n,) actions.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: The observations, rewards and end of episode flags.
+        """
+        return self._call("step", np.asarray(actions))
+
+    def close(self):
+        """Stop the worker processes."""
+        for pipe in self.pipes:
+            pipe.send(("close", None))
+            pipe.close()
+        for process in self.processes:
+            process.join()
+        self.pipes, self.processes = [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
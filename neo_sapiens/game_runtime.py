@@ -0,0 +1,452 @@
+import argparse
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import pygame
+
+from neo_sapiens.frame_profiler import FrameProfiler, section
+
+# Commands understood by the games, independent of the keyboard
+NOOP, LEFT, RIGHT, UP, DOWN, FIRE, RESTART = range(7)
+
+KEY_COMMANDS = {
+    pygame.K_LEFT: LEFT,
+    pygame.K_RIGHT: RIGHT,
+    pygame.K_UP: UP,
+    pygame.K_DOWN: DOWN,
+    pygame.K_SPACE: FIRE,
+}
+
+# Ticks between the state hashes of an input log
+HASH_EVERY = 60
+
+
+def use_dummy_display():
+    """
+    Select the SDL dummy drivers, so pygame runs without a display or
+    sound card. Must be called before the display is initialized.
+    """
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+
+class TextCache:
+    """
+    Rendered text surfaces of a font, keyed by string and color.
+
+    Text such as a score changes far less often than frames are drawn,
+    so each distinct string is rendered once and reused; the least
+    recently used surfaces are dropped beyond `size`.
+
+    Args:
+        font (pygame.font.Font): The font.
+        size (int, optional): The maximum number of cached surfaces. Defaults to 64.
+
+    Examples:
+        >>> score_text = TextCache(pygame.font.SysFont(None, 35))
+        >>> screen.blit(score_text.render("Your Score: 3", (255, 255, 0)), (0, 0))
+    """
+
+    def __init__(self, font, size: int = 64):
+        self.font = font
+        self.size = size
+        self._surfaces = OrderedDict()
+
+    def render(self, text: str, color, antialias: bool = True):
+        """Return the surface of a text, rendering it on first use."""
+        key = (text, tuple(color), antialias)
+        surface = self._surfaces.get(key)
+        if surface is None:
+            surface = self.font.render(text, antialias, color)
+            self._surfaces[key] = surface
+            if len(self._surfaces) > self.size:
+                self._surfaces.popitem(last=False)
+        else:
+            self._surfaces.move_to_end(key)
+        return surface
+
+
+class DirtyScreen:
+    """
+    Draw sprites on a solid background, updating only changed areas.
+
+    Every frame, the sprites of the previous frame are erased by
+    copying the background over them, the new sprites are blitted in
+    one `Surface.blits` batch per image, and only the union of the old
+    and new rectangles is sent to the display. Beyond `max_rects`
+    rectangles, the whole screen is cleared and flipped instead, which
+    is then cheaper than handling them one by one.
+
+    Args:
+        surface (pygame.Surface): The display surface.
+        color: The background color.
+        max_rects (int, optional): The most rectangles updated individually. Defaults to 400.
+
+    Examples:
+        >>> dirty = DirtyScreen(screen, (0, 0, 0))
+        >>> dirty.draw([(enemy_img, [(10, 20), (80, 20)])])
+    """
+
+    def __init__(self, surface, color, max_rects: int = 400):
+        self.surface = surface
+        self.max_rects = max_rects
+        self.background = pygame.Surface(surface.get_size())
+        self.background.fill(color)
+        self._previous: List[pygame.Rect] = []
+        self._full = True
+
+    def invalidate(self):
+        """Redraw and update the whole screen on the next frame."""
+        self._full = True
+
+    def draw(
+        self, batches: Iterable[Tuple[pygame.Surface, Sequence]]
+    ) -> List[pygame.Rect]:
+        """
+        Replace the sprites of the previous frame by new ones.
+
+        Args:
+            batches (Iterable): (image, positions) pairs, each image blitted at its top-left positions.
+
+        Returns:
+            List[pygame.Rect]: The rectangles of the new sprites.
+        """
+        # Many small erasures cost more than one full clear
+        if self._full or len(self._previous) > self.max_rects:
+            self.surface.blit(self.background, (0, 0))
+        else:
+            self.surface.blits(
+                [
+                    (self.background, rect, rect)
+                    for rect in self._previous
+                ],
+                doreturn=False,
+            )
+        rects = []
+        for image, positions in batches:
+            rects.extend(
+                self.surface.blits(
+                    [(image, position) for position in positions]
+                )
+            )
+
+        dirty = self._previous + rects
+        if self._full or len(dirty) > self.max_rects:
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty)
+        self._previous = rects
+        self._full = False
+        return rects
+
+
+class ProfilerOverlay:
+    """
+    On-screen table of the statistics of a frame profiler.
+
+    The text is refreshed every `refresh` frames rather than every
+    frame, which keeps it readable and lets the rendered lines be
+    reused from a text cache in between.
+
+    Args:
+        profiler (FrameProfiler): The profiler.
+        color: The text color.
+        position (Tuple[int, int], optional): The top-left corner of the table. Defaults to (8, 8).
+        refresh (int, optional): The frames between refreshes. Defaults to 30.
+
+    Examples:
+        >>> overlay = ProfilerOverlay(profiler, (255, 255, 255))
+        >>> dirty.draw(sprites + overlay.batches())
+    """
+
+    def __init__(
+        self,
+        profiler: FrameProfiler,
+        color,
+        position=(8, 8),
+        refresh: int = 30,
+    ):
+        self.profiler = profiler
+        self.color = color
+        self.position = position
+        self.refresh = refresh
+        self.text = TextCache(pygame.font.SysFont("monospace", 14))
+        self._lines: List[str] = []
+        self._updated = None
+
+    def batches(
+        self,
+    ) -> List[Tuple[pygame.Surface, List[Tuple[int, int]]]]:
+        """Return the (surface, positions) batches of the table."""
+        frames = self.profiler.frames
+        if (
+            self._updated is None
+            or frames - self._updated >= self.refresh
+        ):
+            self._lines = [
+                f"{'section':<16}{'mean':>6} {'p95':>6} {'max':>6}"
+            ]
+            self._lines += self.profiler.overlay_lines()
+            self._updated = frames
+        x, y = self.position
+        height = self.text.font.get_linesize()
+        return [
+            (
+                self.text.render(line, self.color),
+                [(x, y + i * height)],
+            )
+            for i, line in enumerate(self._lines)
+        ]
+
+
+def run_fixed_timestep(
+    step: Callable[[List[int]], None],
+    render: Callable[[], None],
+    poll: Callable[[], Optional[List[int]]],
+    tick_rate: float,
+    fps: int = 60,
+    max_steps_per_frame: int = 5,
+    profiler: Optional[FrameProfiler] = None,
+):
+    """
+    Run a game in real time with a fixed simulation timestep.
+
+    The simulation advances in steps of exactly `1 / tick_rate`
+    seconds, as many as the elapsed wall-clock time calls for, and is
+    rendered once per display frame, so game speed does not depend on
+    the frame rate. Commands polled between steps are passed to the
+    next step.
+
+    Args:
+        step (Callable): Advances the game by one tick given the pending commands.
+        render (Callable): Draws the current state.
+        poll (Callable): Returns the new commands, or None to stop.
+        tick_rate (float): The number of simulation steps per second.
+        fps (int, optional): The maximum number of rendered frames per second. Defaults to 60.
+        max_steps_per_frame (int, optional): The most steps taken to catch up after a stall. Defaults to 5.
+        profiler (FrameProfiler, optional): Times the "input" and "render" sections of every frame.
+    """
+    clock = pygame.time.Clock()
+    step_time = 1.0 / tick_rate
+    pending, lag = [], 0.0
+    previous = time.perf_counter()
+    while True:
+        with section(profiler, "input"):
+            commands = poll()
+        if commands is None:
+            return
+        pending.extend(commands)
+
+        now = time.perf_counter()
+        lag += min(now - previous, max_steps_per_frame * step_time)
+        previous = now
+        while lag >= step_time:
+            step(pending)
+            pending = []
+            lag -= step_time
+
+        with section(profiler, "render"):
+            render()
+        if profiler is not None:
+            profiler.end_frame()
+        clock.tick(fps)
+
+
+def run_headless(
+    step: Callable[[List[int]], None],
+    frames: int,
+    policy: Optional[Callable[[int], Sequence[int]]] = None,
+    render: Optional[Callable[[], None]] = None,
+    profiler: Optional[FrameProfiler] = None,
+) -> float:
+    """
+    Step a game as fast as the CPU allows, without sleeping.
+
+    Args:
+        step (Callable): Advances the game by one tick given the commands.
+        frames (int): The number of steps.
+        policy (Callable, optional): Returns the commands of a frame number. Defaults to no commands.
+        render (Callable, optional): Draws every step, to include rendering in the measurement.
+        profiler (FrameProfiler, optional): Times the "render" section, one frame per step.
+
+    Returns:
+        float: The number of steps per second.
+    """
+    start = time.perf_counter()
+    for frame in range(frames):
+        step(list(policy(frame)) if policy else [])
+        if render is not None:
+            with section(profiler, "render"):
+                render()
+        if profiler is not None:
+            profiler.end_frame()
+    return frames / max(time.perf_counter() - start, 1e-9)
+
+
+class InputLog:
+    """
+    Recording of a game as its seed and the commands of every tick.
+
+    Only ticks with commands are stored, along with a hash of the game
+    state every `hash_every` ticks and at the end, so a recording is a
+    few bytes per keypress and a replay can check that it re-simulates
+    the same game bit for bit.
+
+    Args:
+        game (str): The name of the game.
+        seed (int): The seed of the game.
+        hash_every (int, optional): The ticks between state hashes. Defaults to 60.
+
+    Examples:
+        >>> log = InputLog("swarm", seed=7)
+        >>> game = SwarmGame(seed=7)
+        >>> run_headless(log.recorder(game), 600, autopilot)
+        >>> log.save("run.json")
+        >>> replay(SwarmGame(seed=7), InputLog.load("run.json"))
+    """
+
+    def __init__(
+        self, game: str, seed: int, hash_every: int = HASH_EVERY
+    ):
+        self.game = game
+        self.seed = seed
+        self.hash_every = hash_every
+        self.frames = 0
+        self.events: Dict[int, List[int]] = {}
+        self.hashes: Dict[int, str] = {}
+        self._game = None
+
+    def recorder(self, game) -> Callable[[List[int]], None]:
+        """
+        Wrap the step function of a game to record every tick.
+
+        Args:
+            game: The game, with `step(commands)` and `state_hash()` methods.
+
+        Returns:
+            Callable: The recording step function.
+        """
+        self._game = game
+
+        def step(commands):
+            if commands:
+                self.events[self.frames] = list(commands)
+            game.step(commands)
+            self.frames += 1
+            if self.frames % self.hash_every == 0:
+                self.hashes[self.frames] = game.state_hash()
+
+        return step
+
+    def close(self):
+        """Hash the final state of the recorded game."""
+        if self._game is not None:
+            self.hashes[self.frames] = self._game.state_hash()
+
+    def save(self, path: str):
+        """Close the log and write it as JSON."""
+        self.close()
+        with open(path, "w") as file:
+            json.dump(
+                {
+                    "game": self.game,
+                    "seed": self.seed,
+                    "frames": self.frames,
+                    "hash_every": self.hash_every,
+                    "events": [
+                        [frame, *commands]
+                        for frame, commands in self.events.items()
+                    ],
+                    "hashes": sorted(self.hashes.items()),
+                },
+                file,
+                separators=(",", ":"),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "InputLog":
+        """Read a log written by `save`."""
+        with open(path) as file:
+            data = json.load(file)
+        log = cls(data["game"], data["seed"], data["hash_every"])
+        log.frames = data["frames"]
+        log.events = {event[0]: event[1:] for event in data["events"]}
+        log.hashes = {int(frame): h for frame, h in data["hashes"]}
+        return log
+
+
+def replay(game, log: InputLog) -> float:
+    """
+    Re-simulate a recorded game headlessly as fast as possible.
+
+    Args:
+        game: A new game created with the seed of the log.
+        log (InputLog): The recording.
+
+    Returns:
+        float: The number of ticks per second.
+
+    Raises:
+        ValueError: If the state hash differs from the recording.
+    """
+    start = time.perf_counter()
+    for frame in range(1, log.frames + 1):
+        game.step(log.events.get(frame - 1, []))
+        expected = log.hashes.get(frame)
+        if expected is not None and game.state_hash() != expected:
+            raise ValueError(f"Replay diverged at tick {frame}")
+    return log.frames / max(time.perf_counter() - start, 1e-9)
+
+
+def parse_game_args(description: str) -> argparse.Namespace:
+    """
+    Parse the command line options shared by the games.
+
+    Args:
+        description (str): The name of the game.
+
+    Returns:
+        argparse.Namespace: The options.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="simulate without a display as fast as possible",
+    )
+    parser.add_argument("--frames", type=int, default=10000)
+    parser.add_argument(
+        "--render",
+        action="store_true",
+        help="also draw every headless frame to the dummy display",
+    )
+    parser.add_argument(
+        "--seed", type=int, help="seed of the game, random by default"
+    )
+    parser.add_argument(
+        "--record", metavar="PATH", help="save the inputs of the game"
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="frame_profile.csv",
+        metavar="PATH",
+        help="time subsystems every frame: overlay on screen, or CSV at PATH when headless",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="PATH",
+        help="re-simulate a recording headlessly and check it",
+    )
+    return parser.parse_args()
@@ -1,7 +1,7 @@
 import json
 import os
 import re
-from typing import List
+from typing import Dict, List, Optional
 
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
@@ -42,12 +42,18 @@ from neo_sapiens.few_shot_prompts import (
     boss_sys_prompt,
 )
 from loguru import logger
-from neo_sapiens.tools_preset import (
-    terminal,
-    browser,
-    file_editor,
-    create_file,
+from neo_sapiens.context_compressor import context_compressor
+from neo_sapiens.memory_manager import (
+    attach_boss_memory,
+    compact_roster,
+    summary_prompt,
 )
+from neo_sapiens.tool_router import tool_router
+# Importing the preset tools registers them with the router
+import neo_sapiens.tools_preset  # noqa: F401
+
+# Tools reading the full task behind the artifact handle of a digest
+ARTIFACT_TOOLS = ["read_artifact", "grep_artifact"]
 
 # Load environment variables
 load_dotenv()
@@ -60,13 +66,6 @@ else:
     print("Warning: SwarmNetwork not available or not callable - agent pooling disabled")
 
 
-# def tool_router(tool: str, *args, **kwargs):
-#     if "terminal" in tool:
-#         return terminal(*args, **kwargs)
-#     elif "browser" in tool:
-#         return browser(*args, **kwargs)
-
-
 def find_agent_id_by_name(name: str):
     """
     Find an agent's ID by its name.
@@ -88,7 +87,7 @@ class ToolSchema(BaseModel):
     tool: str = Field(
         ...,
         title="Tool name",
-        description="Either `browser` or `terminal`",
+        description="Name of a tool registered with the tool router",
     )
 
 
@@ -110,11 +109,11 @@ class AgentSchema(BaseModel):
         title="Rules",
         description="Rules for the agent",
     )
-    # tools: List[ToolSchema] = Field(
-    #     ...,
-    #     title="Tools available to the agent",
-    #     description="Either `browser` or `terminal`",
-    # )
+    tools: Optional[List[ToolSchema]] = Field(
+        None,
+        title="Tools available to the agent",
+        description="Subset of the registered tools, all when omitted",
+    )
     # task: str = Field(
     #     ...,
     #     title="Task assigned to the agent",
@@ -205,14 +204,31 @@ def merge_rules_into_str(prompts: List[str]):
     return "\n".join(prompts)
 
 
+def agent_tool_names(agent: AgentSchema) -> Optional[List[str]]:
+    """
+    Return the tool names assigned to an agent by the orchestrator.
+
+    Args:
+        agent (AgentSchema): The agent schema.
+
+    Returns:
+        Optional[List[str]]: The tool names, or None for every tool.
+    """
+    if not agent.tools:
+        return None
+    return [schema.tool for schema in agent.tools]
+
+
 def create_worker_agents(
     agents: List[AgentSchema],
+    context: Optional[Dict[str, str]] = None,
 ) -> List[Agent]:
     """
     Create and initialize agents based on the provided AgentSchema objects.
 
     Args:
         agents (List[AgentSchema]): A list of AgentSchema objects containing agent information.
+        context (Dict[str, str], optional): Task context to give each agent, by agent name. Agents given context also get the artifact tools.
 
     Returns:
         List[Agent]: The initialized Agent objects.
@@ -241,6 +257,10 @@ def create_worker_agents(
         else:
             logger.warning("Anthropic not available - using default LLM")
 
+        tool_names = agent_tool_names(agent)
+        if context and name in context and tool_names is not None:
+            tool_names += ARTIFACT_TOOLS
+
         out = Agent(
             agent_name=name,
             system_prompt=system_prompt,
@@ -250,8 +270,10 @@ def create_worker_agents(
             dashboard=False,
             verbose=True,
             stopping_token="<DONE>",
-            tools=[browser, terminal, create_file, file_editor],
+            tools=tool_router.select(tool_names),
         )
+        if context and name in context:
+            out.add_message_to_memory(context[name])
 
         if network:
             network.add_agent(out)
@@ -277,7 +299,9 @@ def create_agents_by_boss(team: str = None, *args, **kwargs):
     if not Agent:
         return "Error: Agent class not available"
         
-    system_prompt_daddy = orchestrator_prompt_agent(team)
+    system_prompt_daddy = orchestrator_prompt_agent(
+        team, tools=tool_router.describe()
+    )
 
     # Create agent with available LLM
     llm = None
@@ -372,7 +396,11 @@ def build_swarm(team_task: str, task: str, *args, **kwargs):
         verbose=True,
         interactive=True,
         stopping_token="<DONE>",
-        tools=[create_agents_by_boss, send_task_to_network_agent],
+        tools=[
+            create_agents_by_boss,
+            send_task_to_network_agent,
+            *tool_router.select(ARTIFACT_TOOLS),
+        ],
         *args,
         **kwargs,
     )
@@ -380,7 +408,6 @@ def build_swarm(team_task: str, task: str, *args, **kwargs):
     # Task 1: Run the agent and parse the output
     logger.info("Creating the workers ...")
     out = create_agents_by_boss(team_task)
-    json_agentic_output = out
     # logger.info(f"Output: {out}")
     out = parse_json_from_input(out)
     if out[0] is None:  # Check if parsing failed
@@ -391,11 +418,32 @@ def build_swarm(team_task: str, task: str, *args, **kwargs):
     # Task 2: Print agent names and create agents
     # logger.info(agents)
     # logger.info("Creating agents...")
-    agents = create_worker_agents(agents)
-
-    # Send JSON of agents to boss
-    boss.add_message_to_memory(
-        select_workers(json_agentic_output, task)
+    roster = compact_roster(agents)
+
+    # The boss keeps the whole task, each worker gets a digest of a
+    # large one
+    digests = context_compressor.compress(
+        task,
+        {
+            agent.name: f"{agent.name}: {agent.system_prompt}"
+            for agent in agents
+        },
+        extractor=llm,
+    )
+    agents = create_worker_agents(agents, context=digests)
+
+    # Send the compacted roster of agents to boss
+    boss.add_message_to_memory(select_workers(roster, task))
+
+    # Keep the boss history within a token budget across loops
+    attach_boss_memory(
+        boss,
+        task=task,
+        summarizer=(
+            (lambda transcript: llm(summary_prompt + transcript))
+            if llm
+            else None
+        ),
     )
 
     # Task 3: Now add the agents as tools -- Run the agents in a loop sequentially
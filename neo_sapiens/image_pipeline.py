@@ -0,0 +1,165 @@
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:
+    print("Warning: Pillow not available - images cannot be ingested")
+    Image = None
+
+# Input resolution of CLIP-style image embedders
+THUMBNAIL_SIZE = 224
+
+
+def downsample(
+    image: np.ndarray, size: int = THUMBNAIL_SIZE
+) -> np.ndarray:
+    """
+    Shrink an in-memory image to fit within `size` x `size` pixels.
+
+    Args:
+        image (np.ndarray): The (h, w, c) image.
+        size (int, optional): The maximum side in pixels. Defaults to 224.
+
+    Returns:
+        np.ndarray: The downsampled RGB image, or the image itself when already small enough.
+    """
+    if max(image.shape[:2]) <= size:
+        return image
+    thumbnail = Image.fromarray(np.asarray(image, dtype=np.uint8))
+    thumbnail.thumbnail((size, size))
+    return np.asarray(thumbnail.convert("RGB"))
+
+
+class ThumbnailLoader:
+    """
+    Chroma data loader that decodes image URIs into cached thumbnails.
+
+    Images are decoded lazily, only when a batch is embedded, at the
+    smallest JPEG scale that still covers `size` pixels, downsampled to
+    `size` in a thread pool, and saved as JPEG thumbnails keyed by the
+    path, modification time and size of the original. Decoded arrays
+    are never kept beyond the batch that needs them.
+
+    Args:
+        size (int, optional): The maximum side of the thumbnails in pixels. Defaults to 224.
+        thumbnail_dir (str, optional): The directory of the thumbnail files. Defaults to "chroma/thumbnails".
+        workers (int, optional): The number of decoding threads. Defaults to the executor default.
+        quality (int, optional): The JPEG quality of the thumbnails. Defaults to 85.
+
+    Examples:
+        >>> loader = ThumbnailLoader(size=224)
+        >>> images = loader(["photos/cat.jpg", "photos/dog.png"])
+    """
+
+    def __init__(
+        self,
+        size: int = THUMBNAIL_SIZE,
+        thumbnail_dir: str = "chroma/thumbnails",
+        workers: Optional[int] = None,
+        quality: int = 85,
+    ):
+        if Image is None:
+            raise ValueError("Pillow is required to load images")
+        self.size = size
+        self.thumbnail_dir = thumbnail_dir
+        self.workers = workers
+        self.quality = quality
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def thumbnail_path(self, uri: str) -> str:
+        """Return the path of the thumbnail of an image."""
+        stat = os.stat(uri)
+        key = hashlib.sha1(
+            f"{os.path.abspath(uri)}\0{stat.st_mtime_ns}\0{stat.st_size}"
+            f"\0{self.size}".encode("utf-8")
+        ).hexdigest()
+        return os.path.join(self.thumbnail_dir, f"{key}.jpg")
+
+    def load(self, uri: str) -> np.ndarray:
+        """
+        Return the thumbnail of an image, creating it on first use.
+
+        Args:
+            uri (str): The path of the image.
+
+        Returns:
+            np.ndarray: The (h, w, 3) RGB thumbnail.
+        """
+        path = self.thumbnail_path(uri)
+        if os.path.exists(path):
+            with Image.open(path) as thumbnail:
+                return np.asarray(thumbnail.convert("RGB"))
+
+        with Image.open(uri) as image:
+            # Let the JPEG decoder skip detail finer than `size`
+            image.draft("RGB", (self.size, self.size))
+            thumbnail = image.convert("RGB")
+        thumbnail.thumbnail((self.size, self.size))
+
+        os.makedirs(self.thumbnail_dir, exist_ok=True)
+        # A unique temporary file, as other threads may write the same one
+        with tempfile.NamedTemporaryFile(
+            dir=self.thumbnail_dir, suffix=".tmp", delete=False
+        ) as file:
+            thumbnail.save(file, "JPEG", quality=self.quality)
+        os.replace(file.name, path)
+        return np.asarray(thumbnail)
+
+    def __call__(self, uris: Sequence[str]) -> List[np.ndarray]:
+        """
+        Load the thumbnails of a batch of images in the thread pool.
+
+        Repeated paths are loaded once.
+
+        Args:
+            uris (Sequence[str]): The paths of the images.
+
+        Returns:
+            List[np.ndarray]: One thumbnail per path, in order.
+        """
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="thumbnails",
+                )
+        unique = list(dict.fromkeys(uris))
+        loaded = dict(zip(unique, self._pool.map(self.load, unique)))
+        return [loaded[uri] for uri in uris]
+
+
+_loaders: Dict[tuple, ThumbnailLoader] = {}
+_loaders_lock = threading.Lock()
+
+
+def get_thumbnail_loader(
+    thumbnail_dir: str = "chroma/thumbnails",
+    size: int = THUMBNAIL_SIZE,
+    workers: Optional[int] = None,
+) -> ThumbnailLoader:
+    """
+    Return the process-wide loader of a thumbnail directory and size.
+
+    Args:
+        thumbnail_dir (str, optional): The directory of the thumbnail files.
+        size (int, optional): The maximum side of the thumbnails in pixels.
+        workers (int, optional): The number of decoding threads.
+
+    Returns:
+        ThumbnailLoader: The loader shared by every collection.
+    """
+    key = (os.path.abspath(thumbnail_dir), size)
+    with _loaders_lock:
+        if key not in _loaders:
+            _loaders[key] = ThumbnailLoader(
+                size, thumbnail_dir, workers
+            )
+        return _loaders[key]
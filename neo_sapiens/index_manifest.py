@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+
+def file_hash(path: str, block_size: int = 1 << 20) -> str:
+    """
+    Compute the SHA-256 of a file, reading it in blocks.
+
+    Args:
+        path (str): The path of the file.
+        block_size (int, optional): The read size in bytes. Defaults to 1 MiB.
+
+    Returns:
+        str: The hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def document_id(source: str, content_hash: str, part: int = 0) -> str:
+    """
+    Derive a deterministic document ID from its source and content.
+
+    Args:
+        source (str): The absolute path of the source file.
+        content_hash (str): The hash of the file content.
+        part (int, optional): The index of the document within the file. Defaults to 0.
+
+    Returns:
+        str: The document ID.
+    """
+    key = f"{source}\0{content_hash}\0{part}".encode("utf-8")
+    return hashlib.sha256(key).hexdigest()[:32]
+
+
+class IndexManifest:
+    """
+    Persisted record of the files indexed in a collection.
+
+    Each entry maps a file path to its mtime, size and content hash
+    and to the IDs of the documents created from it, so a re-scan can
+    skip unchanged files, re-embed changed ones and delete the
+    documents of removed ones. Paths are made absolute, so different
+    spellings of the same file share one entry. `text_indexed` records
+    that the keyword index was built from the collection once.
+
+    Args:
+        path (str): The path of the manifest JSON file.
+
+    Examples:
+        >>> manifest = IndexManifest("chroma/swarms_manifest.json")
+        >>> manifest.unchanged("docs/readme.md", os.stat("docs/readme.md"))
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files: Dict[str, dict] = {}
+        self.text_indexed = False
+        if os.path.exists(path):
+            with open(path) as file:
+                saved = json.load(file)
+            self.files = {
+                os.path.abspath(source): entry
+                for source, entry in saved.get("files", {}).items()
+            }
+            self.text_indexed = saved.get("text_indexed", False)
+
+    def __contains__(self, source: str) -> bool:
+        return os.path.abspath(source) in self.files
+
+    def get(self, source: str) -> Optional[dict]:
+        """Return the entry of a file, or None."""
+        return self.files.get(os.path.abspath(source))
+
+    def unchanged(self, source: str, stat: os.stat_result) -> bool:
+        """
+        Check whether a file has the mtime and size it was indexed with.
+
+        Args:
+            source (str): The file path.
+            stat (os.stat_result): The current stat of the file.
+
+        Returns:
+            bool: True if the file can be skipped without hashing it.
+        """
+        entry = self.files.get(os.path.abspath(source))
+        return (
+            entry is not None
+            and entry["mtime"] == stat.st_mtime
+            and entry["size"] == stat.st_size
+        )
+
+    def record(
+        self,
+        source: str,
+        stat: os.stat_result,
+        content_hash: str,
+        ids: List[str],
+    ):
+        """
+        Record that a file was indexed.
+
+        Args:
+            source (str): The file path.
+            stat (os.stat_result): The stat of the file when it was read.
+            content_hash (str): The hash of the file content.
+            ids (List[str]): The IDs of the documents created from the file.
+        """
+        self.files[os.path.abspath(source)] = {
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "hash": content_hash,
+            "ids": ids,
+        }
+
+    def remove(self, source: str) -> List[str]:
+        """
+        Forget a file.
+
+        Args:
+            source (str): The file path.
+
+        Returns:
+            List[str]: The IDs of the documents created from the file.
+        """
+        entry = self.files.pop(os.path.abspath(source), None)
+        return entry["ids"] if entry else []
+
+    def save(self):
+        """Atomically write the manifest to disk."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(
+                {
+                    "files": self.files,
+                    "text_indexed": self.text_indexed,
+                },
+                file,
+            )
+        os.replace(tmp_path, self.path)
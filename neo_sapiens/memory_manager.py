@@ -0,0 +1,253 @@
+import re
+from typing import Callable, List, Optional
+
+from loguru import logger
+
+summary_prompt = (
+    "Summarize the following exchanges of a swarm orchestrator with"
+    " its worker agents. Keep decisions, delegated tasks, results and"
+    " open issues, drop everything else:\n\n"
+)
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text, about 4 chars per token.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    return len(text) // 4 + 1
+
+
+def first_sentence(text: str, max_chars: int = 120) -> str:
+    """
+    Return the first sentence of a text, truncated to `max_chars`.
+
+    Args:
+        text (str): The text.
+        max_chars (int, optional): The maximum length. Defaults to 120.
+
+    Returns:
+        str: The first sentence.
+    """
+    text = " ".join(str(text).split())
+    sentence = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+    if len(sentence) > max_chars:
+        sentence = sentence[: max_chars - 3].rstrip() + "..."
+    return sentence
+
+
+def compact_roster(agents: List) -> str:
+    """
+    Compact an agent roster to names plus one-line roles.
+
+    Args:
+        agents (List[AgentSchema]): The agents created by the orchestrator.
+
+    Returns:
+        str: One line per agent.
+    """
+    return "\n".join(
+        f"- {agent.name}: {first_sentence(agent.system_prompt)}"
+        for agent in agents
+    )
+
+
+def extractive_summary(text: str, max_chars: int = 200) -> str:
+    """
+    Summarize a transcript by keeping the start of every message.
+
+    Args:
+        text (str): The transcript, one message per block.
+        max_chars (int, optional): Characters kept per message. Defaults to 200.
+
+    Returns:
+        str: The summary.
+    """
+    lines = []
+    for block in text.split("\n\n"):
+        block = " ".join(block.split())
+        if block:
+            lines.append(
+                block
+                if len(block) <= max_chars
+                else block[: max_chars - 3] + "..."
+            )
+    return "\n".join(lines)
+
+
+class BossMemory:
+    """
+    Token budgeted short-term memory for the boss agent.
+
+    Wraps the agent's conversation so every message added during the
+    run goes through the manager, and forwards every other attribute,
+    read or assigned, to the conversation. Messages present when the
+    memory is attached (the system prompt and the agent roster) and
+    the task are pinned. When the history exceeds `token_budget`, the
+    oldest unpinned turns are summarized in batches of `batch_size`
+    into a single running summary, while the last `keep_recent` turns
+    are always kept verbatim.
+
+    Args:
+        conversation (Conversation): The conversation to manage.
+        task (str, optional): The task to keep pinned.
+        token_budget (int, optional): The maximum size of the history in tokens. Defaults to 6000.
+        batch_size (int, optional): The number of turns summarized at once. Defaults to 6.
+        keep_recent (int, optional): The number of recent turns never summarized. Defaults to 4.
+        summarizer (Callable, optional): Called with a transcript, returns its summary. Defaults to an extractive summary.
+
+    Examples:
+        >>> boss.short_memory = BossMemory(
+        ...     boss.short_memory, task=task, token_budget=6000
+        ... )
+    """
+
+    summary_role = "Summary of earlier turns"
+
+    # Attributes of the manager, all others belong to the conversation
+    _fields = frozenset(
+        {
+            "conversation",
+            "task",
+            "token_budget",
+            "batch_size",
+            "keep_recent",
+            "summarizer",
+            "n_pinned",
+            "summary",
+        }
+    )
+
+    def __init__(
+        self,
+        conversation,
+        task: Optional[str] = None,
+        token_budget: int = 6000,
+        batch_size: int = 6,
+        keep_recent: int = 4,
+        summarizer: Optional[Callable[[str], str]] = None,
+    ):
+        self.conversation = conversation
+        self.task = task
+        self.token_budget = token_budget
+        self.batch_size = batch_size
+        self.keep_recent = keep_recent
+        self.summarizer = summarizer or extractive_summary
+        self.n_pinned = len(conversation.conversation_history)
+        self.summary = None
+
+    def __getattr__(self, name):
+        if name == "conversation":
+            raise AttributeError(name)
+        return getattr(self.conversation, name)
+
+    def __setattr__(self, name, value):
+        if name in self._fields:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.conversation, name, value)
+
+    def __len__(self):
+        return len(self.conversation.conversation_history)
+
+    def __getitem__(self, index):
+        return self.conversation.conversation_history[index]
+
+    def add(self, role: str, content: str, *args, **kwargs):
+        """Add a message, then compact the history if over budget."""
+        self.conversation.add(role, content, *args, **kwargs)
+        self.compact()
+
+    def token_count(self) -> int:
+        """Return the estimated size of the history in tokens."""
+        return count_tokens(
+            self.conversation.return_history_as_string()
+        )
+
+    def _is_pinned(self, index: int, message: dict) -> bool:
+        return (
+            index < self.n_pinned
+            or message is self.summary
+            or (
+                self.task is not None
+                and message["content"] == self.task
+            )
+        )
+
+    def compact(self):
+        """Summarize the oldest unpinned turns until within budget."""
+        while self.token_count() > self.token_budget:
+            history = self.conversation.conversation_history
+            turns = [
+                message
+                for index, message in enumerate(history)
+                if not self._is_pinned(index, message)
+            ]
+            batch = turns[: len(turns) - self.keep_recent][
+                : self.batch_size
+            ]
+            if not batch:
+                return
+
+            transcript = "\n\n".join(
+                f"{message['role']}: {message['content']}"
+                for message in batch
+            )
+            if self.summary is not None:
+                transcript = (
+                    f"{self.summary['content']}\n\n{transcript}"
+                )
+            try:
+                summary = str(self.summarizer(transcript))
+            except Exception as e:
+                logger.error(f"Failed to summarize boss memory: {e}")
+                summary = extractive_summary(transcript)
+
+            # Keep the running summary to a quarter of the budget
+            max_chars = self.token_budget
+            if len(summary) > max_chars:
+                summary = "..." + summary[-max_chars:]
+
+            batch_ids = {id(message) for message in batch}
+            remaining = [
+                message
+                for message in history
+                if id(message) not in batch_ids
+                and message is not self.summary
+            ]
+            self.summary = {
+                "role": self.summary_role,
+                "content": summary,
+            }
+            remaining.insert(self.n_pinned, self.summary)
+            self.conversation.conversation_history = remaining
+            logger.info(
+                f"Compacted {len(batch)} boss turns, history is now"
+                f" ~{self.token_count()} tokens"
+            )
+
+
+def attach_boss_memory(
+    agent, task: Optional[str] = None, **kwargs
+) -> BossMemory:
+    """
+    Replace an agent's short-term memory with a `BossMemory`.
+
+    Messages already in the agent's memory become pinned.
+
+    Args:
+        agent (Agent): The agent.
+        task (str, optional): The task to keep pinned.
+        **kwargs: Passed to `BossMemory`.
+
+    Returns:
+        BossMemory: The attached memory.
+    """
+    memory = BossMemory(agent.short_memory, task=task, **kwargs)
+    agent.short_memory = memory
+    return memory
@@ -0,0 +1,143 @@
+from typing import Tuple
+
+import numpy as np
+
+
+def _cell_ranges(box_cells: np.ndarray):
+    """
+    Sort boxes by cell and return a function mapping query cells to the
+    (start, count) ranges of their boxes in that order.
+    """
+    low = box_cells.min(axis=0)
+    shape = box_cells.max(axis=0) - low + 1
+    if shape[0] * shape[1] <= 4 * len(box_cells) + 4096:
+        # Dense grid: counting sort and direct lookups
+        flat = (box_cells[:, 0] - low[0]) * shape[1] + (
+            box_cells[:, 1] - low[1]
+        )
+        order = np.argsort(flat, kind="stable")
+        counts = np.bincount(flat, minlength=shape[0] * shape[1])
+        starts = np.cumsum(counts) - counts
+
+        def ranges(cells: np.ndarray):
+            cells = cells - low
+            valid = np.all((cells >= 0) & (cells < shape), axis=1)
+            flat = np.where(
+                valid, cells[:, 0] * shape[1] + cells[:, 1], 0
+            )
+            return starts[flat], np.where(valid, counts[flat], 0)
+
+        return order, ranges
+
+    # Sparse grid: binary search in the sorted cell keys
+    def keys(cells: np.ndarray) -> np.ndarray:
+        return (cells[:, 0] << 32) + cells[:, 1]
+
+    order = np.argsort(keys(box_cells), kind="stable")
+    sorted_keys = keys(box_cells)[order]
+
+    def ranges(cells: np.ndarray):
+        query = keys(cells)
+        start = np.searchsorted(sorted_keys, query, side="left")
+        end = np.searchsorted(sorted_keys, query, side="right")
+        return start, end - start
+
+    return order, ranges
+
+
+def point_box_hits(
+    points: np.ndarray,
+    boxes: np.ndarray,
+    size: Tuple[float, float],
+    cell_size: float = 64,
+    rounds: int = 4,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Match points with boxes strictly containing them on a vectorized grid.
+
+    Boxes are bucketed by the cell of their top-left corner, which for
+    boxes no larger than a cell puts every box containing a point in
+    the point's cell or its left, upper or upper-left neighbour. Each
+    point is matched to at most one box and each box to at most one
+    point: every unmatched point claims the lowest-index free box
+    containing it and contested boxes go to the lowest-index point.
+    Points that lost a contest claim again, for at most `rounds`
+    rounds, so piles of overlapping boxes cost a bounded number of
+    passes over the candidate pairs; points still unmatched after that
+    are left for the next frame.
+
+    Args:
+        points (np.ndarray): The (n, 2) points.
+        boxes (np.ndarray): The (m, 2) top-left corners of the boxes.
+        size (Tuple[float, float]): The width and height of every box, at most `cell_size`.
+        cell_size (float, optional): The side of a grid cell. Defaults to 64.
+        rounds (int, optional): The maximum number of claim rounds. Defaults to 4.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The indices of the matched points and of their boxes.
+    """
+    none = np.empty(0, dtype=np.intp)
+    if not len(points) or not len(boxes):
+        return none, none
+    if max(size) > cell_size:
+        raise ValueError("Boxes must fit in a grid cell")
+
+    order, ranges = _cell_ranges(
+        np.floor(boxes / cell_size).astype(np.int64)
+    )
+    point_cells = np.floor(points / cell_size).astype(np.int64)
+
+    # Box corners in cell order, so candidate ranges are contiguous
+    left, top = boxes[order, 0], boxes[order, 1]
+    x, y = points[:, 0], points[:, 1]
+    candidates_p, candidates_b = [], []
+    for dx, dy in ((0, 0), (-1, 0), (0, -1), (-1, -1)):
+        start, counts = ranges(point_cells + (dx, dy))
+        total = int(counts.sum())
+        if not total:
+            continue
+        # Expand every point's [start, start + count) range of boxes
+        owners = np.repeat(np.arange(len(points)), counts)
+        slots = np.repeat(start - np.cumsum(counts) + counts, counts)
+        slots += np.arange(total)
+        inside = (
+            (left[slots] < x[owners])
+            & (x[owners] < left[slots] + size[0])
+            & (top[slots] < y[owners])
+            & (y[owners] < top[slots] + size[1])
+        )
+        candidates_p.append(owners[inside])
+        candidates_b.append(order[slots[inside]])
+    if not candidates_p:
+        return none, none
+    p = np.concatenate(candidates_p)
+    b = np.concatenate(candidates_b)
+
+    # Sorted once by a single key, the pairs stay sorted as losers
+    # are filtered out
+    pairs = np.argsort(p * len(boxes) + b, kind="stable")
+    p, b = p[pairs], b[pairs]
+    hit_p, hit_b = [], []
+    done_p = np.zeros(len(points), dtype=bool)
+    done_b = np.zeros(len(boxes), dtype=bool)
+    for _ in range(rounds):
+        if not len(p):
+            break
+        # Every point claims its lowest box, every box keeps its lowest claim
+        claims = np.r_[True, p[1:] != p[:-1]]
+        claimed_p, claimed_b = p[claims], b[claims]
+        boxes_first = np.lexsort((claimed_p, claimed_b))
+        claimed_p = claimed_p[boxes_first]
+        claimed_b = claimed_b[boxes_first]
+        won = np.r_[True, claimed_b[1:] != claimed_b[:-1]]
+        hit_p.append(claimed_p[won])
+        hit_b.append(claimed_b[won])
+        done_p[claimed_p[won]] = True
+        done_b[claimed_b[won]] = True
+        unmatched = ~(done_p[p] | done_b[b])
+        p, b = p[unmatched], b[unmatched]
+    if not hit_p:
+        return none, none
+    hit_p, hit_b = np.concatenate(hit_p), np.concatenate(hit_b)
+    by_point = np.argsort(hit_p)
+    return hit_p[by_point], hit_b[by_point]
@@ -1,8 +1,26 @@
-import pygame
+import hashlib
 import random
+from typing import Optional
+
+import numpy as np
+import pygame
 
-# Initialize Pygame
-pygame.init()
+from neo_sapiens.entity_store import EntityStore
+from neo_sapiens.frame_profiler import FrameProfiler, section
+from neo_sapiens.game_runtime import (
+    FIRE,
+    KEY_COMMANDS,
+    LEFT,
+    RIGHT,
+    DirtyScreen,
+    InputLog,
+    ProfilerOverlay,
+    parse_game_args,
+    replay,
+    run_fixed_timestep,
+    run_headless,
+    use_dummy_display,
+)
 
 # Constants
 SCREEN_WIDTH, SCREEN_HEIGHT = 800, 600
@@ -10,110 +28,242 @@ PLAYER_SPEED = 5
 BULLET_SPEED = 7
 ENEMY_SPEED = 2
 ENEMY_SPAWN_RATE = 25  # Lower is faster
+ENEMY_WIDTH, ENEMY_HEIGHT = 50, 30
+CELL_SIZE = 64  # Collision grid cell, larger than an enemy
+BULLET_WIDTH, BULLET_HEIGHT = 2, 10
+TICK_RATE = 60  # Simulation steps per second
+
+# Subsystems timed by the frame profiler
+SECTIONS = (
+    "input",
+    "move_bullets",
+    "spawn_enemy",
+    "move_enemies",
+    "check_collisions",
+    "render",
+)
 
 # Colors
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 RED = (255, 0, 0)
 
-# Setup the screen
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Robot Swarm Attack")
 
-# Player
-player_img = pygame.Surface((50, 30))
-player_img.fill(WHITE)
-player_x = SCREEN_WIDTH // 2
-player_y = SCREEN_HEIGHT - 60
+class SwarmGame:
+    """
+    State and rules of Robot Swarm Attack, without any rendering.
+
+    Every call to `step` advances the game by one fixed tick; speeds
+    are in pixels per tick. Enemies spawn from the game's own random
+    generator, so games with the same seed and commands are identical.
+
+    Args:
+        seed (int, optional): The seed of the random generator.
+        profiler (FrameProfiler, optional): Times the subsystems of every step.
+
+    Examples:
+        >>> game = SwarmGame(seed=7)
+        >>> game.step([FIRE])
+        >>> len(game.bullets)
+        1
+    """
+
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        profiler: Optional[FrameProfiler] = None,
+    ):
+        self.random = random.Random(seed)
+        self.profiler = profiler
+        self.player_x = SCREEN_WIDTH // 2
+        self.player_y = SCREEN_HEIGHT - 60
+        self.bullets = EntityStore((BULLET_WIDTH, BULLET_HEIGHT))
+        self.enemies = EntityStore((ENEMY_WIDTH, ENEMY_HEIGHT))
+        self.frame = 0
+        self.kills = 0
+        self.escaped = 0
 
-# Bullets
-bullets = []
+    def move_player(self, dx):
+        self.player_x += dx * PLAYER_SPEED
+        self.player_x = max(0, min(SCREEN_WIDTH - 50, self.player_x))
 
-# Enemies
-enemies = []
+    def fire_bullet(self):
+        self.bullets.spawn(
+            self.player_x + 25, self.player_y - 20, 0, -BULLET_SPEED
+        )
 
-# Clock
-clock = pygame.time.Clock()
+    def move_bullets(self):
+        self.bullets.move()
+        # Remove bullets that go off the screen
+        self.bullets.cull(y0=0)
 
+    def spawn_enemy(self):
+        if self.random.randint(1, ENEMY_SPAWN_RATE) == 1:
+            enemy_x = self.random.randint(0, SCREEN_WIDTH - 50)
+            self.enemies.spawn(enemy_x, -30, 0, ENEMY_SPEED)
 
-def move_player(dx):
-    global player_x
-    player_x += dx * PLAYER_SPEED
-    player_x = max(0, min(SCREEN_WIDTH - 50, player_x))
+    def move_enemies(self):
+        self.enemies.move()
+        # Remove enemies that go off the screen
+        self.escaped += self.enemies.cull(y1=SCREEN_HEIGHT)
 
+    def check_collisions(self):
+        """
+        Remove every bullet inside an enemy, along with that enemy.
 
-def fire_bullet():
-    bullets.append([player_x + 25, player_y - 20])
+        Each bullet destroys at most one enemy and each enemy stops at
+        most one bullet, matched on a vectorized grid of `CELL_SIZE`
+        cells.
+        """
+        hit_bullets, hit_enemies = self.bullets.collide(
+            self.enemies, CELL_SIZE
+        )
+        self.bullets.remove(hit_bullets)
+        self.enemies.remove(hit_enemies)
+        self.kills += len(hit_enemies)
 
+    def step(self, commands=()):
+        """
+        Apply the commands of a tick and advance the simulation.
 
-def move_bullets():
-    for bullet in bullets:
-        bullet[1] -= BULLET_SPEED
-    # Remove bullets that go off the screen
-    while bullets and bullets[0][1] < 0:
-        bullets.pop(0)
+        Args:
+            commands (optional): LEFT, RIGHT and FIRE commands, in order.
+        """
+        for command in commands:
+            if command == LEFT:
+                self.move_player(-1)
+            elif command == RIGHT:
+                self.move_player(1)
+            elif command == FIRE:
+                self.fire_bullet()
 
+        profiler = self.profiler
+        with section(profiler, "move_bullets"):
+            self.move_bullets()
+        with section(profiler, "spawn_enemy"):
+            self.spawn_enemy()
+        with section(profiler, "move_enemies"):
+            self.move_enemies()
+        with section(profiler, "check_collisions"):
+            self.check_collisions()
+        self.frame += 1
 
-def spawn_enemy():
-    if random.randint(1, ENEMY_SPAWN_RATE) == 1:
-        enemy_x = random.randint(0, SCREEN_WIDTH - 50)
-        enemies.append([enemy_x, -30])
+    def state_hash(self) -> str:
+        """Return a short hash of the whole game state."""
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(
+            np.array(
+                [self.player_x, self.frame, self.kills, self.escaped],
+                dtype=np.int64,
+            ).tobytes()
+        )
+        for store in (self.bullets, self.enemies):
+            digest.update(store.positions.tobytes())
+            digest.update(store.velocities.tobytes())
+        return digest.hexdigest()
 
 
-def move_enemies():
-    for enemy in enemies:
-        enemy[1] += ENEMY_SPEED
-    # Remove enemies that go off the screen
-    while enemies and enemies[0][1] > SCREEN_HEIGHT:
-        enemies.pop(0)
+def autopilot(frame: int):
+    """Sweep across the screen while firing, for benchmarks."""
+    direction = LEFT if (frame // 80) % 2 else RIGHT
+    return [direction, FIRE] if frame % 4 == 0 else [direction]
 
 
-def check_collisions():
-    global enemies
-    for bullet in bullets:
-        for enemy in enemies:
-            if (enemy[0] < bullet[0] < enemy[0] + 50) and (
-                enemy[1] < bullet[1] < enemy[1] + 30
-            ):
-                enemies.remove(enemy)
-                bullets.remove(bullet)
-                break
+# Display and sprites, created by init_display
+screen = None
+dirty_screen = None
+player_img = None
+bullet_img = None
+enemy_img = None
 
 
-def game_loop():
-    running = True
-    while running:
+def init_display():
+    global screen, dirty_screen, player_img, bullet_img, enemy_img
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Robot Swarm Attack")
+    dirty_screen = DirtyScreen(screen, BLACK)
+    player_img = pygame.Surface((50, 30)).convert()
+    player_img.fill(WHITE)
+    bullet_img = pygame.Surface(
+        (BULLET_WIDTH, BULLET_HEIGHT)
+    ).convert()
+    bullet_img.fill(WHITE)
+    enemy_img = pygame.Surface((ENEMY_WIDTH, ENEMY_HEIGHT)).convert()
+    enemy_img.fill(RED)
+
+
+def render(
+    game: SwarmGame, overlay: Optional[ProfilerOverlay] = None
+):
+    batches = [
+        (player_img, [(game.player_x, game.player_y)]),
+        (bullet_img, game.bullets.positions.tolist()),
+        (enemy_img, game.enemies.positions.tolist()),
+    ]
+    if overlay is not None:
+        batches += overlay.batches()
+    dirty_screen.draw(batches)
+
+
+def game_loop(game: SwarmGame, step=None):
+    def poll():
+        commands = []
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                running = False
+                return None
             elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_LEFT:
-                    move_player(-1)
-                elif event.key == pygame.K_RIGHT:
-                    move_player(1)
-                elif event.key == pygame.K_SPACE:
-                    fire_bullet()
-
-        move_bullets()
-        spawn_enemy()
-        move_enemies()
-        check_collisions()
-
-        screen.fill(BLACK)
-        screen.blit(player_img, (player_x, player_y))
-        for bullet in bullets:
-            pygame.draw.rect(
-                screen, WHITE, (bullet[0], bullet[1], 2, 10)
-            )
-        for enemy in enemies:
-            pygame.draw.rect(
-                screen, RED, (enemy[0], enemy[1], 50, 30)
-            )
-
-        pygame.display.flip()
-        clock.tick(60)
+                if event.key in KEY_COMMANDS:
+                    commands.append(KEY_COMMANDS[event.key])
+        return commands
+
+    profiler = game.profiler
+    overlay = ProfilerOverlay(profiler, WHITE) if profiler else None
+    run_fixed_timestep(
+        step or game.step,
+        lambda: render(game, overlay),
+        poll,
+        TICK_RATE,
+        profiler=profiler,
+    )
+
+
+def main():
+    args = parse_game_args("Robot Swarm Attack")
+    if args.replay:
+        log = InputLog.load(args.replay)
+        rate = replay(SwarmGame(log.seed), log)
+        print(f"Replayed {log.frames} frames at {rate:.0f} frames/s")
+        return
 
+    seed = (
+        args.seed if args.seed is not None else random.getrandbits(32)
+    )
+    profiler = FrameProfiler(SECTIONS) if args.profile else None
+    game = SwarmGame(seed, profiler)
+    log = InputLog("swarm", seed)
+    step = log.recorder(game) if args.record else game.step
+    if args.headless:
+        use_dummy_display()
+    init_display()
+    if args.headless:
+        rate = run_headless(
+            step,
+            args.frames,
+            autopilot,
+            (lambda: render(game)) if args.render else None,
+            profiler,
+        )
+        print(f"{args.frames} frames at {rate:.0f} frames/s")
+        if profiler is not None:
+            profiler.to_csv(args.profile)
+            print("\n".join(profiler.overlay_lines()))
+    else:
+        game_loop(game, step)
+    if args.record:
+        log.save(args.record)
     pygame.quit()
 
 
-game_loop()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+import functools
+import inspect
+import os
+import shlex
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+# Commands whose output only depends on the filesystem they read
+READ_ONLY_COMMANDS = frozenset(
+    {
+        "cat",
+        "du",
+        "file",
+        "find",
+        "grep",
+        "head",
+        "ls",
+        "pwd",
+        "stat",
+        "tail",
+        "tree",
+        "wc",
+    }
+)
+
+# Shell syntax that can write, chain or substitute commands
+_UNSAFE_SHELL_TOKENS = (">", ";", "&", "`", "$(", "\n")
+# Options making an otherwise read-only command write or execute
+_UNSAFE_OPTIONS = {
+    "find": frozenset(
+        {
+            "-exec",
+            "-execdir",
+            "-delete",
+            "-ok",
+            "-okdir",
+            "-fprint",
+            "-fprint0",
+            "-fprintf",
+            "-fls",
+        }
+    ),
+    "tree": frozenset({"-o"}),
+}
+
+# Characters making an operand a shell glob pattern
+_GLOB_CHARS = ("*", "?", "[")
+
+
+def _has_unsafe_option(argv: List[str]) -> bool:
+    unsafe = _UNSAFE_OPTIONS.get(argv[0], ())
+    for arg in argv[1:]:
+        if arg in unsafe:
+            return True
+        # tree accepts clustered short options such as -ao FILE
+        if (
+            argv[0] == "tree"
+            and arg.startswith("-")
+            and not arg.startswith("--")
+            and "o" in arg
+        ):
+            return True
+    return False
+
+
+def is_read_only_command(code: str) -> bool:
+    """
+    Check whether a shell command only reads from the filesystem.
+
+    Args:
+        code (str): The shell command.
+
+    Returns:
+        bool: True if every stage of the pipeline is a read-only command.
+    """
+    if not code or any(tok in code for tok in _UNSAFE_SHELL_TOKENS):
+        return False
+    try:
+        stages = [shlex.split(stage) for stage in code.split("|")]
+    except ValueError:
+        return False
+    for argv in stages:
+        if not argv or argv[0] not in READ_ONLY_COMMANDS:
+            return False
+        if _has_unsafe_option(argv):
+            return False
+    return True
+
+
+def command_paths(code: str) -> List[str]:
+    """
+    Extract the filesystem paths a read-only command may depend on.
+
+    Operands that are not options are treated as paths, a glob operand
+    depends on the directory holding its first wildcard, and a stage
+    without operands depends on the current working directory.
+
+    Args:
+        code (str): The shell command.
+
+    Returns:
+        List[str]: Absolute paths read by the command.
+    """
+    paths = []
+    for stage in code.split("|"):
+        operands = [
+            _glob_root(os.path.abspath(arg))
+            for arg in shlex.split(stage)[1:]
+            if not arg.startswith("-")
+        ]
+        paths.extend(operands or [os.getcwd()])
+    return paths
+
+
+def _glob_root(path: str) -> str:
+    parts = path.split(os.sep)
+    for i, part in enumerate(parts):
+        if any(char in part for char in _GLOB_CHARS):
+            return os.sep.join(parts[:i]) or os.sep
+    return path
+
+
+def normalize_command(code: str) -> tuple:
+    """
+    Normalize a shell command so equivalent spellings share a key.
+
+    Args:
+        code (str): The shell command.
+
+    Returns:
+        tuple: The working directory and the tokenized command.
+    """
+    return (os.getcwd(), tuple(shlex.split(code)))
+
+
+def _paths_overlap(a: str, b: str) -> bool:
+    try:
+        common = os.path.commonpath([a, b])
+    except ValueError:
+        return False
+    return common in (a, b)
+
+
+class _CachePolicy:
+    def __init__(
+        self,
+        ttl: float,
+        idempotent: Optional[Callable[..., bool]] = None,
+        paths: Optional[Callable[..., Iterable[str]]] = None,
+        normalize: Optional[Callable[..., Any]] = None,
+    ):
+        self.ttl = ttl
+        self.idempotent = idempotent
+        self.paths = paths
+        self.normalize = normalize
+
+
+class ToolCache:
+    """
+    TTL and LRU bounded cache for the results of idempotent tool calls.
+
+    Tools opt in through `memoize`, declaring a TTL and optionally a
+    predicate deciding whether a given call is idempotent, a function
+    listing the paths the call reads and an argument normalizer.
+    Writes reported through `invalidate_path` evict every cached read
+    whose paths overlap the written path, and a call the predicate
+    rejects may write anywhere, so it evicts every cached read that
+    depends on a path.
+
+    Args:
+        max_entries (int, optional): The maximum number of cached results. Defaults to 512.
+        default_ttl (float, optional): The default time to live in seconds. Defaults to 300.
+
+    Examples:
+        >>> cache = ToolCache(max_entries=128)
+        >>> @cache.memoize("ls", ttl=30)
+        ... def ls(path: str):
+        ...     return "\\n".join(os.listdir(path))
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        default_ttl: float = 300.0,
+    ):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._policies: Dict[str, _CachePolicy] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def declare(
+        self,
+        tool_name: str,
+        ttl: Optional[float] = None,
+        idempotent: Optional[Callable[..., bool]] = None,
+        paths: Optional[Callable[..., Iterable[str]]] = None,
+        normalize: Optional[Callable[..., Any]] = None,
+    ):
+        """
+        Declare a tool as cacheable.
+
+        Args:
+            tool_name (str): The name of the tool.
+            ttl (float, optional): Time to live of the results in seconds.
+            idempotent (Callable, optional): Called with the tool arguments, returns whether the call is idempotent. Defaults to always.
+            paths (Callable, optional): Called with the tool arguments, returns the paths the call reads.
+            normalize (Callable, optional): Called with the tool arguments, returns a hashable key.
+        """
+        self._policies[tool_name] = _CachePolicy(
+            ttl=self.default_ttl if ttl is None else ttl,
+            idempotent=idempotent,
+            paths=paths,
+            normalize=normalize,
+        )
+
+    def get(self, key: tuple):
+        """
+        Look up a cached result.
+
+        Args:
+            key (tuple): The cache key.
+
+        Returns:
+            Tuple[bool, Any]: Whether the key was found and the cached value.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            expires_at, value, _ = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def put(
+        self,
+        key: tuple,
+        value: Any,
+        ttl: Optional[float] = None,
+        paths: Iterable[str] = (),
+    ):
+        """
+        Store a result, evicting the least recently used entries.
+
+        Args:
+            key (tuple): The cache key.
+            value (Any): The tool result.
+            ttl (float, optional): Time to live in seconds.
+            paths (Iterable[str], optional): Paths the result depends on.
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            self._entries[key] = (
+                time.monotonic() + ttl,
+                value,
+                tuple(os.path.abspath(p) for p in paths),
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_path(self, path: str) -> int:
+        """
+        Evict every cached result that read a path overlapping `path`.
+
+        Args:
+            path (str): The path that was written.
+
+        Returns:
+            int: The number of evicted entries.
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            stale = [
+                key
+                for key, (_, _, paths) in self._entries.items()
+                if any(_paths_overlap(path, p) for p in paths)
+            ]
+            for key in stale:
+                del self._entries[key]
+        if stale:
+            logger.info(
+                f"Invalidated {len(stale)} cached tool results for"
+                f" {path}"
+            )
+        return len(stale)
+
+    def invalidate_reads(self) -> int:
+        """
+        Evict every cached result that depends on a path.
+
+        Returns:
+            int: The number of evicted entries.
+        """
+        with self._lock:
+            stale = [
+                key
+                for key, (_, _, paths) in self._entries.items()
+                if paths
+            ]
+            for key in stale:
+                del self._entries[key]
+        if stale:
+            logger.info(
+                f"Invalidated {len(stale)} cached tool results after a"
+                " write"
+            )
+        return len(stale)
+
+    def clear(self):
+        """Drop every cached result and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def memoize(
+        self,
+        tool_name: str,
+        ttl: Optional[float] = None,
+        idempotent: Optional[Callable[..., bool]] = None,
+        paths: Optional[Callable[..., Iterable[str]]] = None,
+        normalize: Optional[Callable[..., Any]] = None,
+    ):
+        """
+        Decorator declaring a tool cacheable and caching its results.
+
+        Args:
+            tool_name (str): The name of the tool.
+            ttl (float, optional): Time to live of the results in seconds.
+            idempotent (Callable, optional): Predicate over the tool arguments.
+            paths (Callable, optional): Paths read by a call.
+            normalize (Callable, optional): Argument normalizer.
+
+        Returns:
+            Callable: The decorator.
+        """
+        self.declare(tool_name, ttl, idempotent, paths, normalize)
+
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                policy = self._policies[tool_name]
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                arguments = bound.arguments
+
+                if policy.idempotent and not policy.idempotent(
+                    **arguments
+                ):
+                    try:
+                        return func(*args, **kwargs)
+                    finally:
+                        self.invalidate_reads()
+
+                if policy.normalize:
+                    normalized = policy.normalize(**arguments)
+                else:
+                    normalized = tuple(
+                        (
+                            name,
+                            (
+                                value.strip()
+                                if isinstance(value, str)
+                                else repr(value)
+                            ),
+                        )
+                        for name, value in sorted(arguments.items())
+                    )
+                key = (tool_name, normalized)
+
+                found, value = self.get(key)
+                if found:
+                    return value
+
+                value = func(*args, **kwargs)
+                read_paths = (
+                    policy.paths(**arguments) if policy.paths else ()
+                )
+                self.put(key, value, policy.ttl, read_paths)
+                return value
+
+            return wrapper
+
+        return decorator
+
+
+# Process-wide cache shared by every worker agent
+tool_cache = ToolCache()
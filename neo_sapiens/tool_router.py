@@ -0,0 +1,201 @@
+import functools
+import inspect
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from loguru import logger
+from pydantic import ValidationError, create_model
+
+
+class ToolSpec:
+    """
+    A registered tool: the callable, its argument validator and its
+    description.
+
+    Args:
+        name (str): The name the model uses to call the tool.
+        func (Callable): The tool implementation.
+        description (str, optional): The description sent to the model. Defaults to the first docstring paragraph.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable,
+        description: Optional[str] = None,
+    ):
+        self.name = name
+        self.func = func
+        self.signature = inspect.signature(func)
+        self.description = description or _summary(func)
+        self.validator = create_model(
+            f"{name}_arguments",
+            **{
+                param.name: (
+                    (
+                        Any
+                        if param.annotation is inspect.Parameter.empty
+                        else param.annotation
+                    ),
+                    (
+                        ...
+                        if param.default is inspect.Parameter.empty
+                        else param.default
+                    ),
+                )
+                for param in self.signature.parameters.values()
+                if param.kind not in (
+                    inspect.Parameter.VAR_POSITIONAL,
+                    inspect.Parameter.VAR_KEYWORD,
+                )
+            },
+        )
+
+    def to_str(self) -> str:
+        args = ", ".join(self.signature.parameters)
+        return f"- {self.name}({args}): {self.description}"
+
+
+def _summary(func: Callable) -> str:
+    doc = inspect.getdoc(func) or ""
+    return " ".join(doc.split("\n\n")[0].split())
+
+
+class ToolRouter:
+    """
+    Table-driven registry dispatching tool calls by name.
+
+    Arguments are validated against a model compiled once from the
+    tool signature at registration, and tool descriptions are cached
+    per tool subset so they are not rebuilt for every agent. The tools
+    handed to agents by `select` dispatch every call through `route`.
+
+    Examples:
+        >>> router = ToolRouter()
+        >>> router.register("terminal", terminal)
+        >>> router.route("terminal", {"code": "ls"})
+        >>> router.select(["terminal"])
+    """
+
+    def __init__(self):
+        self._tools: Dict[str, ToolSpec] = {}
+        self._descriptions: Dict[tuple, str] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def __len__(self):
+        return len(self._tools)
+
+    def register(
+        self,
+        name: str,
+        func: Callable,
+        description: Optional[str] = None,
+    ) -> Callable:
+        """
+        Register a tool under a name.
+
+        Args:
+            name (str): The name of the tool.
+            func (Callable): The tool implementation.
+            description (str, optional): The description sent to the model.
+
+        Returns:
+            Callable: The registered function.
+        """
+        spec = ToolSpec(name, func, description)
+        spec.dispatch = self._dispatcher(spec)
+        self._tools[name] = spec
+        self._descriptions.clear()
+        return func
+
+    def _dispatcher(self, spec: ToolSpec) -> Callable:
+        @functools.wraps(spec.func)
+        def dispatch(*args, **kwargs):
+            try:
+                bound = spec.signature.bind(*args, **kwargs)
+            except TypeError as e:
+                return (
+                    f"Error: Invalid arguments for {spec.name}: {e}"
+                )
+            return self.route(spec.name, bound.arguments)
+
+        return dispatch
+
+    def tool_names(self) -> List[str]:
+        """Return the names of all registered tools."""
+        return list(self._tools)
+
+    def route(
+        self, name: str, arguments: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Validate the arguments and dispatch a call to a tool.
+
+        Args:
+            name (str): The name of the tool.
+            arguments (Dict[str, Any], optional): The keyword arguments of the call.
+
+        Returns:
+            Any: The output of the tool, or an error message for the model.
+        """
+        spec = self._tools.get(name)
+        if spec is None:
+            return (
+                f"Error: Unknown tool {name}, available tools:"
+                f" {', '.join(self._tools)}"
+            )
+        try:
+            validated = spec.validator(**(arguments or {}))
+        except ValidationError as e:
+            return f"Error: Invalid arguments for {name}: {e}"
+        return spec.func(**dict(validated))
+
+    def select(
+        self, names: Optional[Iterable[str]] = None
+    ) -> List[Callable]:
+        """
+        Return the tools for a subset of names, all tools when None.
+
+        Args:
+            names (Iterable[str], optional): The tool names.
+
+        Returns:
+            List[Callable]: Callables with the tool signatures and docstrings, validating and routing their calls.
+        """
+        if names is None:
+            return [spec.dispatch for spec in self._tools.values()]
+        tools = []
+        for name in dict.fromkeys(names):
+            spec = self._tools.get(name)
+            if spec is None:
+                logger.warning(f"Skipping unknown tool: {name}")
+                continue
+            tools.append(spec.dispatch)
+        return tools
+
+    def describe(self, names: Optional[Iterable[str]] = None) -> str:
+        """
+        Return the cached model-facing description of a tool subset.
+
+        Args:
+            names (Iterable[str], optional): The tool names, all tools when None.
+
+        Returns:
+            str: One line per tool with its arguments and description.
+        """
+        names = self.tool_names() if names is None else names
+        key = tuple(sorted(set(names)))
+        description = self._descriptions.get(key)
+        if description is None:
+            description = "\n".join(
+                self._tools[name].to_str()
+                for name in key
+                if name in self._tools
+            )
+            self._descriptions[key] = description
+        return description
+
+
+# Process-wide router the preset tools register with
+tool_router = ToolRouter()
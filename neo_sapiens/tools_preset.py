@@ -1,9 +1,25 @@
 from swarms import tool
 import subprocess
 
+from neo_sapiens.artifact_store import artifact_store
+from neo_sapiens.tool_cache import (
+    command_paths,
+    is_read_only_command,
+    normalize_command,
+    tool_cache,
+)
+from neo_sapiens.tool_router import tool_router
+
 
 # Tools
 @tool
+@tool_cache.memoize(
+    "terminal",
+    ttl=30,
+    idempotent=is_read_only_command,
+    paths=command_paths,
+    normalize=normalize_command,
+)
 def terminal(
     code: str,
 ):
@@ -19,10 +35,11 @@ def terminal(
     out = subprocess.run(
         code, shell=True, capture_output=True, text=True
     ).stdout
-    return str(out)
+    return artifact_store.spill(str(out), source=code)
 
 
 @tool
+@tool_cache.memoize("browser", ttl=600)
 def browser(query: str):
     """
     Search the query in the browser with the `browser` tool.
@@ -54,6 +71,7 @@ def create_file(file_path: str, content: str):
     """
     with open(file_path, "w") as file:
         file.write(content)
+    tool_cache.invalidate_path(file_path)
     return f"File {file_path} created successfully."
 
 
@@ -72,4 +90,50 @@ def file_editor(file_path: str, mode: str, content: str):
     """
     with open(file_path, mode) as file:
         file.write(content)
+    tool_cache.invalidate_path(file_path)
     return f"File {file_path} edited successfully."
+
+
+@tool
+def read_artifact(handle: str, page: int = 0):
+    """
+    Read a page of a large tool output stored as an artifact.
+
+    Args:
+        handle (str): The artifact handle given in the output preview.
+        page (int): The zero-based page number.
+
+    Returns:
+        str: The content of the page.
+    """
+    try:
+        return artifact_store.read(handle, page)
+    except (ValueError, OSError) as e:
+        return f"Error: {e}"
+
+
+@tool
+def grep_artifact(handle: str, pattern: str):
+    """
+    Search a large tool output stored as an artifact.
+
+    Args:
+        handle (str): The artifact handle given in the output preview.
+        pattern (str): The regular expression to search for.
+
+    Returns:
+        str: The matching lines with their line numbers.
+    """
+    try:
+        return artifact_store.grep(handle, pattern)
+    except (ValueError, OSError) as e:
+        return f"Error: {e}"
+
+
+# Register the preset tools with the router
+tool_router.register("terminal", terminal)
+tool_router.register("browser", browser)
+tool_router.register("create_file", create_file)
+tool_router.register("file_editor", file_editor)
+tool_router.register("read_artifact", read_artifact)
+tool_router.register("grep_artifact", grep_artifact)
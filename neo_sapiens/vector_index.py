@@ -0,0 +1,876 @@
+import json
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+_METRICS = ("cosine", "l2", "ip")
+
+
+def matches_where(
+    metadata: Optional[dict], where: Optional[dict]
+) -> bool:
+    """
+    Check a metadata dict against a Chroma style `where` filter.
+
+    Supports equality, `$eq`, `$ne`, `$in`, `$nin`, `$gt`, `$gte`,
+    `$lt`, `$lte`, `$and` and `$or`.
+
+    Args:
+        metadata (dict, optional): The metadata of a record.
+        where (dict, optional): The filter.
+
+    Returns:
+        bool: True if the record passes the filter.
+    """
+    if not where:
+        return True
+    metadata = metadata or {}
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, c) for c in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_where(metadata, c) for c in condition):
+                return False
+            continue
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        value = metadata.get(key)
+        for op, operand in condition.items():
+            if op == "$eq" and value != operand:
+                return False
+            if op == "$ne" and value == operand:
+                return False
+            if op == "$in" and value not in operand:
+                return False
+            if op == "$nin" and value in operand:
+                return False
+            if op in ("$gt", "$gte", "$lt", "$lte"):
+                if value is None:
+                    return False
+                if op == "$gt" and not value > operand:
+                    return False
+                if op == "$gte" and not value >= operand:
+                    return False
+                if op == "$lt" and not value < operand:
+                    return False
+                if op == "$lte" and not value <= operand:
+                    return False
+    return True
+
+
+def kmeans(
+    vectors: np.ndarray,
+    k: int,
+    n_iter: int = 10,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Cluster vectors with Lloyd's algorithm.
+
+    Args:
+        vectors (np.ndarray): The (n, d) vectors.
+        k (int): The number of clusters.
+        n_iter (int, optional): The number of iterations. Defaults to 10.
+        seed (int, optional): The seed of the initial centroids. Defaults to 0.
+
+    Returns:
+        np.ndarray: The (k, d) centroids.
+    """
+    rng = np.random.default_rng(seed)
+    k = min(k, len(vectors))
+    centroids = vectors[
+        rng.choice(len(vectors), k, replace=False)
+    ].copy()
+    for _ in range(n_iter):
+        assignment = nearest_centroid(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        counts = np.bincount(assignment, minlength=k)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids
+
+
+def nearest_centroid(
+    vectors: np.ndarray, centroids: np.ndarray
+) -> np.ndarray:
+    """Return the index of the nearest centroid of every vector."""
+    centroid_norms = (centroids**2).sum(axis=1)
+    distances = centroid_norms[None, :] - 2 * vectors @ centroids.T
+    return distances.argmin(axis=1)
+
+
+class ScalarQuantizer:
+    """
+    Per-dimension 8-bit scalar quantizer, 4x smaller than float32.
+
+    Each dimension is mapped linearly from its trained range onto 256
+    levels, and dot products are computed on the codes.
+    """
+
+    kind = "int8"
+
+    def __init__(self, low: np.ndarray, scale: np.ndarray):
+        self.low = low.astype(np.float32)
+        self.scale = scale.astype(np.float32)
+
+    @property
+    def code_size(self) -> int:
+        return len(self.low)
+
+    @classmethod
+    def train(cls, vectors: np.ndarray) -> "ScalarQuantizer":
+        """Fit the range of every dimension."""
+        low = vectors.min(axis=0)
+        scale = (vectors.max(axis=0) - low) / 255
+        return cls(low, np.maximum(scale, 1e-12))
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Return the (n, d) uint8 codes of vectors."""
+        codes = np.rint((vectors - self.low) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return self.low + codes.astype(np.float32) * self.scale
+
+    def dot(self, query: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Return the approximate dot products of a query with codes."""
+        return codes.astype(np.float32) @ (query * self.scale) + (
+            query @ self.low
+        )
+
+    def params(self) -> dict:
+        return {"low": self.low, "scale": self.scale}
+
+
+class ProductQuantizer:
+    """
+    Product quantizer storing one byte per subspace.
+
+    Vectors are split into `subspaces` slices, each replaced by the
+    nearest of 256 k-means centroids, and dot products are summed from
+    a per-query lookup table of slice-centroid products.
+    """
+
+    kind = "pq"
+
+    def __init__(self, centroids: np.ndarray, dim: int):
+        # (subspaces, 256, sub_dim) centroids of the zero-padded slices
+        self.centroids = centroids.astype(np.float32)
+        self.dim = int(dim)
+
+    @property
+    def code_size(self) -> int:
+        return len(self.centroids)
+
+    @staticmethod
+    def _split(vectors: np.ndarray, subspaces: int) -> np.ndarray:
+        sub_dim = -(-vectors.shape[1] // subspaces)
+        padded = np.zeros(
+            (len(vectors), subspaces * sub_dim), dtype=np.float32
+        )
+        padded[:, : vectors.shape[1]] = vectors
+        return padded.reshape(len(vectors), subspaces, sub_dim)
+
+    @classmethod
+    def train(
+        cls, vectors: np.ndarray, subspaces: int = 16
+    ) -> "ProductQuantizer":
+        """Fit 256 centroids per subspace."""
+        slices = cls._split(vectors, subspaces)
+        centroids = np.stack(
+            [
+                kmeans(slices[:, j], 256, seed=j)
+                for j in range(subspaces)
+            ]
+        )
+        if centroids.shape[1] < 256:
+            centroids = np.pad(
+                centroids,
+                ((0, 0), (0, 256 - centroids.shape[1]), (0, 0)),
+            )
+        return cls(centroids, vectors.shape[1])
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Return the (n, subspaces) uint8 codes of vectors."""
+        slices = self._split(vectors, self.code_size)
+        return np.stack(
+            [
+                nearest_centroid(slices[:, j], self.centroids[j])
+                for j in range(self.code_size)
+            ],
+            axis=1,
+        ).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        slices = self.centroids[np.arange(self.code_size), codes]
+        return slices.reshape(len(codes), -1)[:, : self.dim]
+
+    def dot(self, query: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Return the approximate dot products of a query with codes."""
+        table = np.einsum(
+            "jd,jkd->jk",
+            self._split(query[None, :], self.code_size)[0],
+            self.centroids,
+        )
+        return table[np.arange(self.code_size), codes].sum(axis=1)
+
+    def params(self) -> dict:
+        return {"centroids": self.centroids, "dim": self.dim}
+
+
+_QUANTIZERS = {"int8": ScalarQuantizer, "pq": ProductQuantizer}
+
+
+def _truncate(path: str, rows: int, row_size: int):
+    """Cut a file of fixed-size rows to whole rows, at most `rows`."""
+    if not os.path.exists(path):
+        return
+    size = os.path.getsize(path)
+    keep = min(size // row_size if row_size else 0, rows) * row_size
+    if keep < size:
+        with open(path, "r+b") as file:
+            file.truncate(keep)
+
+
+class NumpyCollection:
+    """
+    Memory-mapped NumPy vector index with the interface of the Chroma
+    collection methods `ChromaDB` uses.
+
+    Vectors are appended to a float32 file read through a memory map,
+    and ids, documents and metadata to a JSON lines sidecar, where
+    deletions are recorded as tombstones until the next compaction.
+    Queries are exact top-k vectorized dot products. Above
+    `ivf_threshold` vectors, an IVF coarse quantizer restricts each
+    query to the `nprobe` nearest of `sqrt(n)` k-means lists.
+
+    With `quantization`, only compact codes of the vectors are held in
+    memory: candidates are ranked on the codes, and the best
+    `rerank * n_results` are re-ranked exactly against the float
+    vectors, of which only those rows are read from disk.
+
+    Args:
+        name (str): The name of the collection.
+        persist_dir (str, optional): The directory of the index files. Defaults to "chroma".
+        metric (str, optional): "cosine", "l2" or "ip". Defaults to "cosine".
+        embedding_function (Callable, optional): Embeds documents and query texts.
+        ivf_threshold (int, optional): The size above which the IVF quantizer is used. Defaults to 50000.
+        nprobe (int, optional): The number of IVF lists scanned per query. Defaults to 8.
+        quantization (str, optional): "int8" for 4x smaller scalar codes, or "pq" for one byte per subspace.
+        pq_subspaces (int, optional): The number of product quantizer subspaces. Defaults to 16.
+        rerank (int, optional): The number of candidates re-ranked exactly, per result. Defaults to 4.
+
+    Examples:
+        >>> collection = NumpyCollection("memories", embedding_function=ef)
+        >>> collection.add(ids=["a"], documents=["hello"])
+        >>> collection.query(query_texts=["hi"], n_results=1)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        persist_dir: str = "chroma",
+        metric: str = "cosine",
+        embedding_function: Optional[Callable] = None,
+        ivf_threshold: int = 50000,
+        nprobe: int = 8,
+        quantization: Optional[str] = None,
+        pq_subspaces: int = 16,
+        rerank: int = 4,
+    ):
+        if metric not in _METRICS:
+            raise ValueError(f"Unsupported metric: {metric}")
+        if (
+            quantization is not None
+            and quantization not in _QUANTIZERS
+        ):
+            raise ValueError(
+                f"Unsupported quantization: {quantization}"
+            )
+        self.name = name
+        self.metric = metric
+        self.embedding_function = embedding_function
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.quantization = quantization
+        self.pq_subspaces = pq_subspaces
+        self.rerank = rerank
+
+        self.directory = os.path.join(persist_dir, f"{name}.npindex")
+        self._vectors_path = os.path.join(
+            self.directory, "vectors.f32"
+        )
+        self._records_path = os.path.join(
+            self.directory, "records.jsonl"
+        )
+        self._codes_path = os.path.join(self.directory, "codes.u8")
+        self._quantizer_path = os.path.join(
+            self.directory, "quantizer.npz"
+        )
+        self._lock = threading.RLock()
+
+        self.dim = None
+        self._vectors = None
+        self._ids: List[Optional[str]] = []
+        self._documents: List[Optional[str]] = []
+        self._metadatas: List[Optional[dict]] = []
+        self._rows: Dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._centroids = None
+        self._lists = None
+        self._list_order = None
+        self._trained_size = 0
+        self._quantizer = None
+        self._codes = None
+        self._quantized_size = 0
+        self._load()
+
+    def _load(self):
+        if os.path.exists(self._records_path):
+            with open(self._records_path) as file:
+                for line in file:
+                    self._load_record(json.loads(line))
+        # Drop records whose vectors were not written
+        n_vectors = (
+            os.path.getsize(self._vectors_path) // (4 * self.dim)
+            if self.dim and os.path.exists(self._vectors_path)
+            else 0
+        )
+        for row in range(n_vectors, len(self._ids)):
+            self._rows.pop(self._ids[row], None)
+        del self._ids[n_vectors:]
+        del self._documents[n_vectors:]
+        del self._metadatas[n_vectors:]
+        # and vectors whose records were not, so appends stay aligned
+        _truncate(
+            self._vectors_path, len(self._ids), 4 * (self.dim or 0)
+        )
+        self._alive = np.array(
+            [doc_id is not None for doc_id in self._ids], dtype=bool
+        )
+        if self.quantization and os.path.exists(self._quantizer_path):
+            self._load_quantizer()
+
+    def _load_record(self, record: dict):
+        if "delete" in record:
+            row = self._rows.pop(record["delete"], None)
+            if row is not None:
+                self._ids[row] = None
+                self._documents[row] = None
+                self._metadatas[row] = None
+            return
+        self.dim = record.get("dim", self.dim)
+        self._rows[record["id"]] = len(self._ids)
+        self._ids.append(record["id"])
+        self._documents.append(record.get("document"))
+        self._metadatas.append(record.get("metadata"))
+
+    def _load_quantizer(self):
+        with np.load(self._quantizer_path) as saved:
+            if str(saved["kind"]) != self.quantization:
+                return
+            params = {
+                name: saved[name]
+                for name in saved.files
+                if name not in ("kind", "trained_size")
+            }
+            self._quantized_size = int(saved["trained_size"])
+        quantizer = _QUANTIZERS[self.quantization](**params)
+        _truncate(
+            self._codes_path, len(self._ids), quantizer.code_size
+        )
+        codes = np.fromfile(self._codes_path, dtype=np.uint8)
+        codes = codes.reshape(-1, quantizer.code_size)
+        self._quantizer = quantizer
+        self._codes = codes
+        # Encode rows whose codes were not written
+        if len(codes) < len(self._ids):
+            self._append_codes(np.asarray(self.vectors[len(codes) :]))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def count(self) -> int:
+        """Return the number of live records."""
+        return len(self._rows)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """The (n, d) memory-mapped vectors, dead rows included."""
+        if self.dim is None or not self._ids:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        if self._vectors is None or len(self._vectors) < len(
+            self._ids
+        ):
+            self._vectors = np.memmap(
+                self._vectors_path, dtype=np.float32, mode="r"
+            ).reshape(-1, self.dim)
+        return self._vectors[: len(self._ids)]
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        if self.embedding_function is None:
+            raise ValueError(
+                "An embedding_function is required to embed texts"
+            )
+        return np.asarray(self.embedding_function(texts), np.float32)
+
+    def _prepare(self, embeddings) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(embeddings, np.float32))
+        if self.metric == "cosine":
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.maximum(norms, 1e-12)
+        return vectors
+
+    def add(
+        self,
+        ids: List[str],
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[dict]] = None,
+        embeddings=None,
+        **kwargs,
+    ):
+        """
+        Add records, replacing existing records with the same IDs.
+
+        Args:
+            ids (List[str]): The record IDs.
+            documents (List[str], optional): The documents.
+            metadatas (List[dict], optional): One metadata dict per record.
+            embeddings (optional): Precomputed embeddings, computed from the documents when omitted.
+        """
+        if kwargs.get("images") is not None or kwargs.get("uris"):
+            raise ValueError("The numpy backend only stores text")
+        if embeddings is None:
+            embeddings = self._embed(documents)
+        vectors = self._prepare(embeddings)
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [None] * len(ids)
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(
+                    f"Expected embeddings of dimension {self.dim},"
+                    f" got {vectors.shape[1]}"
+                )
+            self.delete(ids=[i for i in ids if i in self._rows])
+
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._vectors_path, "ab") as file:
+                file.write(vectors.tobytes())
+            with open(self._records_path, "a") as file:
+                for doc_id, document, metadata in zip(
+                    ids, documents, metadatas
+                ):
+                    file.write(
+                        json.dumps(
+                            {
+                                "id": doc_id,
+                                "document": document,
+                                "metadata": metadata,
+                                "dim": self.dim,
+                            }
+                        )
+                        + "\n"
+                    )
+                    self._rows[doc_id] = len(self._ids)
+                    self._ids.append(doc_id)
+                    self._documents.append(document)
+                    self._metadatas.append(metadata)
+            self._alive = np.concatenate(
+                [self._alive, np.ones(len(ids), dtype=bool)]
+            )
+            if self._quantizer is not None:
+                self._append_codes(vectors)
+
+            # Assign new vectors to the existing IVF lists
+            if self._lists is not None:
+                assignment = nearest_centroid(
+                    vectors, self._centroids
+                )
+                self._lists = np.concatenate(
+                    [self._lists, assignment.astype(np.int32)]
+                )
+                self._list_order = None
+
+    def delete(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[dict] = None,
+    ):
+        """
+        Delete records by ID or metadata filter.
+
+        Args:
+            ids (List[str], optional): The IDs to delete.
+            where (dict, optional): Delete the records matching this filter.
+        """
+        with self._lock:
+            rows = [
+                self._rows[i] for i in ids or [] if i in self._rows
+            ]
+            if where:
+                rows += [
+                    row
+                    for row in self._rows.values()
+                    if matches_where(self._metadatas[row], where)
+                ]
+            if not rows:
+                return
+            with open(self._records_path, "a") as file:
+                for row in set(rows):
+                    file.write(
+                        json.dumps({"delete": self._ids[row]}) + "\n"
+                    )
+                    del self._rows[self._ids[row]]
+                    self._alive[row] = False
+                    self._ids[row] = None
+                    self._documents[row] = None
+                    self._metadatas[row] = None
+            if len(self._rows) < len(self._ids) // 2:
+                self.compact()
+
+    def compact(self):
+        """Rewrite the index files without the deleted records."""
+        with self._lock:
+            live = sorted(self._rows.values())
+            vectors = np.array(self.vectors[live])
+            ids = [self._ids[row] for row in live]
+            documents = [self._documents[row] for row in live]
+            metadatas = [self._metadatas[row] for row in live]
+
+            with open(f"{self._vectors_path}.tmp", "wb") as file:
+                file.write(vectors.tobytes())
+            with open(f"{self._records_path}.tmp", "w") as file:
+                for doc_id, document, metadata in zip(
+                    ids, documents, metadatas
+                ):
+                    file.write(
+                        json.dumps(
+                            {
+                                "id": doc_id,
+                                "document": document,
+                                "metadata": metadata,
+                                "dim": self.dim,
+                            }
+                        )
+                        + "\n"
+                    )
+            self._vectors = None
+            os.replace(
+                f"{self._vectors_path}.tmp", self._vectors_path
+            )
+            os.replace(
+                f"{self._records_path}.tmp", self._records_path
+            )
+
+            self._ids, self._documents, self._metadatas = (
+                ids,
+                documents,
+                metadatas,
+            )
+            self._rows = {
+                doc_id: row for row, doc_id in enumerate(ids)
+            }
+            self._alive = np.ones(len(ids), dtype=bool)
+            self._centroids = self._lists = self._list_order = None
+            self._trained_size = 0
+            if self._codes is not None:
+                self._codes = np.ascontiguousarray(self._codes[live])
+                self._write_codes()
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[dict] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        **kwargs,
+    ) -> dict:
+        """
+        Fetch records by ID or metadata filter.
+
+        Args:
+            ids (List[str], optional): The IDs to fetch.
+            where (dict, optional): Fetch the records matching this filter.
+            limit (int, optional): The maximum number of records.
+            offset (int, optional): The number of matching records to skip. Defaults to 0.
+
+        Returns:
+            dict: The "ids", "documents" and "metadatas" of the records.
+        """
+        rows = (
+            [self._rows[i] for i in ids if i in self._rows]
+            if ids is not None
+            else sorted(self._rows.values())
+        )
+        rows = [
+            row
+            for row in rows
+            if matches_where(self._metadatas[row], where)
+        ]
+        rows = rows[
+            offset : None if limit is None else offset + limit
+        ]
+        return {
+            "ids": [self._ids[row] for row in rows],
+            "documents": [self._documents[row] for row in rows],
+            "metadatas": [self._metadatas[row] for row in rows],
+        }
+
+    def _train_ivf(self):
+        vectors = np.asarray(self.vectors)
+        rng = np.random.default_rng(0)
+        sample = vectors[
+            rng.choice(
+                len(vectors), min(len(vectors), 100000), replace=False
+            )
+        ]
+        self._centroids = kmeans(sample, int(np.sqrt(len(vectors))))
+        self._lists = np.concatenate(
+            [
+                nearest_centroid(
+                    vectors[i : i + 65536], self._centroids
+                )
+                for i in range(0, len(vectors), 65536)
+            ]
+        ).astype(np.int32)
+        self._list_order = None
+        self._trained_size = len(vectors)
+
+    def _candidates(self, query: np.ndarray) -> Optional[np.ndarray]:
+        if len(self._ids) < self.ivf_threshold:
+            return None
+        if (
+            self._lists is None
+            or len(self._ids) > 2 * self._trained_size
+        ):
+            self._train_ivf()
+        if self._list_order is None:
+            # Rows grouped by list, with the offset of every list
+            self._list_order = np.argsort(self._lists, kind="stable")
+            self._list_offsets = np.concatenate(
+                [
+                    [0],
+                    np.cumsum(
+                        np.bincount(
+                            self._lists,
+                            minlength=len(self._centroids),
+                        )
+                    ),
+                ]
+            )
+        probes = np.argsort(
+            ((self._centroids - query) ** 2).sum(axis=1)
+        )[: self.nprobe]
+        return np.concatenate(
+            [
+                self._list_order[
+                    self._list_offsets[p] : self._list_offsets[p + 1]
+                ]
+                for p in probes
+            ]
+        )
+
+    def _append_codes(self, vectors: np.ndarray):
+        codes = self._quantizer.encode(vectors)
+        with open(self._codes_path, "ab") as file:
+            file.write(codes.tobytes())
+        self._codes = np.concatenate([self._codes, codes])
+
+    def _write_codes(self):
+        with open(f"{self._codes_path}.tmp", "wb") as file:
+            file.write(self._codes.tobytes())
+        os.replace(f"{self._codes_path}.tmp", self._codes_path)
+
+    def _train_quantizer(self):
+        vectors = self.vectors
+        rng = np.random.default_rng(0)
+        sample = np.asarray(
+            vectors[
+                np.sort(
+                    rng.choice(
+                        len(vectors),
+                        min(len(vectors), 100000),
+                        replace=False,
+                    )
+                )
+            ]
+        )
+        if self.quantization == "pq":
+            quantizer = ProductQuantizer.train(
+                sample, self.pq_subspaces
+            )
+        else:
+            quantizer = ScalarQuantizer.train(sample)
+        self._quantizer = quantizer
+        self._codes = np.concatenate(
+            [
+                quantizer.encode(np.asarray(vectors[i : i + 65536]))
+                for i in range(0, len(vectors), 65536)
+            ]
+        )
+        self._quantized_size = len(vectors)
+        self._write_codes()
+        np.savez(
+            f"{self._quantizer_path}.tmp.npz",
+            kind=self.quantization,
+            trained_size=self._quantized_size,
+            **quantizer.params(),
+        )
+        os.replace(
+            f"{self._quantizer_path}.tmp.npz", self._quantizer_path
+        )
+
+    def _approximate_distances(
+        self, query: np.ndarray, rows: Optional[np.ndarray]
+    ) -> np.ndarray:
+        if not self._ids:
+            return np.empty(0, dtype=np.float32)
+        if (
+            self._quantizer is None
+            or len(self._ids) > 2 * self._quantized_size
+        ):
+            self._train_quantizer()
+        codes = self._codes if rows is None else self._codes[rows]
+        # Blocks bound the float copy of the codes
+        scores = np.concatenate(
+            [
+                self._quantizer.dot(query, codes[i : i + 8192])
+                for i in range(0, len(codes), 8192)
+            ]
+            or [np.empty(0, dtype=np.float32)]
+        )
+        if self.metric == "l2":
+            norms = np.concatenate(
+                [
+                    (
+                        self._quantizer.decode(codes[i : i + 8192])
+                        ** 2
+                    ).sum(axis=1)
+                    for i in range(0, len(codes), 8192)
+                ]
+                or [np.empty(0, dtype=np.float32)]
+            )
+            return norms - 2 * scores + query @ query
+        return 1.0 - scores
+
+    def _distances(
+        self, query: np.ndarray, rows: Optional[np.ndarray]
+    ) -> np.ndarray:
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        scores = vectors @ query
+        if self.metric == "l2":
+            return (
+                (np.asarray(vectors) ** 2).sum(axis=1)
+                - 2 * scores
+                + query @ query
+            )
+        return 1.0 - scores
+
+    def search(
+        self,
+        query: np.ndarray,
+        n_results: int,
+        allowed: Optional[np.ndarray] = None,
+    ):
+        """
+        Return the rows and distances of the nearest live records.
+
+        Args:
+            query (np.ndarray): The prepared query vector.
+            n_results (int): The number of results.
+            allowed (np.ndarray, optional): A boolean mask of the rows that may be returned.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The rows and their distances, nearest first.
+        """
+        rows = self._candidates(query)
+        if self.quantization:
+            distances = self._approximate_distances(query, rows)
+        else:
+            distances = self._distances(query, rows)
+        rows = np.arange(len(self._ids)) if rows is None else rows
+
+        alive = self._alive[rows]
+        if allowed is not None:
+            alive &= allowed[rows]
+        rows, distances = rows[alive], distances[alive]
+
+        if self.quantization:
+            k = min(n_results * self.rerank, len(rows))
+            if k < len(rows):
+                top = np.argpartition(distances, k - 1)[:k]
+                rows = rows[top]
+            # Exact distances of the shortlist, read in row order
+            rows = np.sort(rows)
+            distances = self._distances(query, rows)
+
+        k = min(n_results, len(rows))
+        if k == 0:
+            return rows[:0], distances[:0]
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+        return rows[top], distances[top]
+
+    def query(
+        self,
+        query_texts: Optional[List[str]] = None,
+        query_embeddings=None,
+        n_results: int = 10,
+        where: Optional[dict] = None,
+        **kwargs,
+    ) -> dict:
+        """
+        Find the nearest records of every query.
+
+        Args:
+            query_texts (List[str], optional): The query strings.
+            query_embeddings (optional): Precomputed query embeddings.
+            n_results (int, optional): The number of results per query. Defaults to 10.
+            where (dict, optional): A metadata filter.
+
+        Returns:
+            dict: The "ids", "documents", "metadatas" and "distances" of each query.
+        """
+        if query_embeddings is None:
+            query_embeddings = self._embed(query_texts)
+        queries = self._prepare(query_embeddings)
+
+        with self._lock:
+            allowed = None
+            if where:
+                allowed = np.fromiter(
+                    (
+                        matches_where(metadata, where)
+                        for metadata in self._metadatas
+                    ),
+                    dtype=bool,
+                    count=len(self._ids),
+                )
+
+            results = {
+                "ids": [],
+                "documents": [],
+                "metadatas": [],
+                "distances": [],
+            }
+            for query in queries:
+                rows, distances = self.search(
+                    query, n_results, allowed
+                )
+                results["ids"].append([self._ids[r] for r in rows])
+                results["documents"].append(
+                    [self._documents[r] for r in rows]
+                )
+                results["metadatas"].append(
+                    [self._metadatas[r] for r in rows]
+                )
+                results["distances"].append(distances.tolist())
+            return results
@@ -0,0 +1,77 @@
+"""
+Benchmark the collision grid on uniform and clustered scenes.
+
+Reports, for every scene, the candidate pairs found by the grid, the
+hits and the time of one collision pass. In the clustered scenes, all
+bullets and enemies pile up in a few cells, so nearly every bullet is
+inside nearly every enemy.
+
+    python scripts/benchmark_collisions.py --n 20000 --clusters 4
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from neo_sapiens.spatial_hash import point_box_hits
+
+SIZE = (50, 30)
+
+
+def scene(n: int, clusters: int, seed: int = 0):
+    """
+    Return bullets and enemies spread over a 4k screen, or piled on
+    `clusters` points of it.
+    """
+    rng = np.random.default_rng(seed)
+    if not clusters:
+        boxes = rng.uniform(0, 4000, size=(n, 2))
+        points = rng.uniform(0, 4000, size=(n, 2))
+        return points, boxes
+    centers = rng.uniform(0, 4000, size=(clusters, 2))
+    boxes = centers[rng.integers(0, clusters, n)]
+    boxes += rng.uniform(0, 5, size=(n, 2))
+    points = centers[rng.integers(0, clusters, n)]
+    points += rng.uniform(10, 25, size=(n, 2))
+    return points, boxes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=2000)
+    parser.add_argument("--clusters", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.n} bullets and {args.n} enemies")
+    print(f"{'scene':<16}{'candidates':>12}{'hits':>8}{'ms':>10}")
+    for label, clusters in (
+        ("uniform", 0),
+        (f"{args.clusters} clusters", args.clusters),
+        ("1 cluster", 1),
+    ):
+        points, boxes = scene(args.n, clusters)
+        x, y = points[:, 0, None], points[:, 1, None]
+        candidates = 0
+        for i in range(0, len(points), 1000):
+            candidates += int(
+                (
+                    (boxes[:, 0] < x[i : i + 1000])
+                    & (x[i : i + 1000] < boxes[:, 0] + SIZE[0])
+                    & (boxes[:, 1] < y[i : i + 1000])
+                    & (y[i : i + 1000] < boxes[:, 1] + SIZE[1])
+                ).sum()
+            )
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            hits, _ = point_box_hits(points, boxes, SIZE)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        print(
+            f"{label:<16}{candidates:>12}{len(hits):>8}"
+            f"{1000 * elapsed:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
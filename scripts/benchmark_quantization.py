@@ -0,0 +1,105 @@
+"""
+Benchmark quantized vector storage against the exact float32 index.
+
+Reports, for every setting, the recall@k of the exact top-k, the mean
+query latency and the resident bytes per vector.
+
+    python scripts/benchmark_quantization.py --n 200000 --dim 384
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from neo_sapiens.vector_index import NumpyCollection
+
+SETTINGS = [
+    ("float32", None, {}),
+    ("int8 rerank=1", "int8", {"rerank": 1}),
+    ("int8 rerank=4", "int8", {"rerank": 4}),
+    ("pq 4 dims/byte rerank=4", "pq", {"rerank": 4}),
+    ("pq 8 dims/byte rerank=10", "pq", {"rerank": 10}),
+]
+
+
+def clustered_vectors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Return vectors drawn around random centers, like text embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, n // 100), dim))
+    vectors = centers[rng.integers(0, len(centers), n)]
+    vectors += 0.5 * rng.normal(size=(n, dim))
+    return vectors.astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    vectors = clustered_vectors(args.n, args.dim)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(args.n, args.queries)]
+    queries += 0.1 * rng.normal(size=queries.shape).astype(np.float32)
+    ids = [str(i) for i in range(args.n)]
+
+    truth = None
+    print(
+        f"{args.n} vectors of dimension {args.dim}, recall@{args.k}"
+    )
+    print(
+        f"{'setting':<24}{'recall':>8}{'ms/query':>10}"
+        f"{'bytes/vec':>11}{'ratio':>7}"
+    )
+    with tempfile.TemporaryDirectory() as persist_dir:
+        for label, quantization, options in SETTINGS:
+            if quantization == "pq":
+                dims_per_byte = int(label.split()[1])
+                options = dict(
+                    options, pq_subspaces=args.dim // dims_per_byte
+                )
+            collection = NumpyCollection(
+                "".join(c if c.isalnum() else "_" for c in label),
+                persist_dir=persist_dir,
+                ivf_threshold=args.n + 1,
+                quantization=quantization,
+                **options,
+            )
+            collection.add(ids=ids, embeddings=vectors)
+            # Train the quantizer outside of the timed queries
+            collection.query(
+                query_embeddings=queries[:1], n_results=1
+            )
+
+            start = time.perf_counter()
+            results = collection.query(
+                query_embeddings=queries, n_results=args.k
+            )["ids"]
+            elapsed = time.perf_counter() - start
+
+            if truth is None:
+                truth = results
+            recall = np.mean(
+                [
+                    len(set(found) & set(exact)) / args.k
+                    for found, exact in zip(results, truth)
+                ]
+            )
+            resident = (
+                collection._codes.shape[1]
+                if quantization
+                else 4 * args.dim
+            )
+            print(
+                f"{label:<24}{recall:>8.3f}"
+                f"{1000 * elapsed / args.queries:>10.2f}"
+                f"{resident:>11}{4 * args.dim / resident:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
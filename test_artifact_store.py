@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the artifact store of oversized tool outputs.
+"""
+
+import re
+
+from neo_sapiens.artifact_store import ArtifactStore
+
+
+def make_store(tmp_path, **kwargs):
+    return ArtifactStore(root=str(tmp_path / "artifacts"), **kwargs)
+
+
+def handle_of(preview):
+    return re.search(r"artifact ([0-9a-f]{12})", preview).group(1)
+
+
+def test_small_output_is_returned(tmp_path):
+    """Outputs within the limit are not stored."""
+    store = make_store(tmp_path, max_chars=100)
+    assert store.spill("short") == "short"
+    assert not (tmp_path / "artifacts").exists()
+
+
+def test_spill_preview(tmp_path):
+    """Oversized outputs are replaced by a head and tail preview."""
+    store = make_store(tmp_path, max_chars=100, preview_chars=10)
+    output = "".join(f"line {i}\n" for i in range(100))
+    preview = store.spill(output, source="seq")
+    assert preview.startswith(
+        f"[Output of `seq` is {len(output)} chars"
+    )
+    assert f"[... {len(output) - 20} chars omitted ...]" in preview
+    assert preview.endswith(output[-10:])
+    assert store.read(handle_of(preview)).endswith(output[:4000])
+
+
+def test_overlapping_preview(tmp_path):
+    """Head and tail never overlap when the limit is below both."""
+    store = make_store(tmp_path, max_chars=10, preview_chars=8)
+    output = "abcdefghijkl"
+    preview = store.spill(output)
+    assert "[... 0 chars omitted ...]" in preview
+    assert preview.endswith(
+        "abcdefgh\n[... 0 chars omitted ...]\nijkl"
+    )
+
+
+def test_pages_do_not_split_characters(tmp_path):
+    """Pages of multi-byte text decode cleanly and add up to it."""
+    store = make_store(tmp_path, page_size=7)
+    content = "héllo wörld ✓ " * 20 + "🙂 end"
+    handle = store.put(content)
+    pages = []
+    page = 0
+    while True:
+        text = store.read(handle, page)
+        if text.startswith("Error"):
+            break
+        pages.append(text.split("\n", 1)[1])
+        page += 1
+    assert "�" not in "".join(pages)
+    assert "".join(pages) == content
+    assert store.read(handle, page).startswith(
+        f"Error: Page {page} out of range"
+    )
+
+
+def test_grep(tmp_path):
+    """Matching lines are returned with their numbers."""
+    store = make_store(tmp_path)
+    handle = store.put("ok\nERROR one\nok\nERROR two\n")
+    assert store.grep(handle, "ERROR") == "2: ERROR one\n4: ERROR two"
+    assert store.grep(handle, "missing") == "No lines match missing"
+    assert store.grep(handle, "(").startswith(
+        "Error: Invalid pattern"
+    )
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the BM25 keyword index and rank fusion.
+"""
+
+from neo_sapiens.bm25_index import (
+    BM25Index,
+    BM25Scorer,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+
+DOCS = {
+    "a": "ValueError raised in chroma_db_s.py line 42",
+    "b": "The database stores documents and embeddings",
+    "c": "Error E-1042 while indexing documents",
+}
+
+
+def make_index(tmp_path, **kwargs):
+    index = BM25Index("docs", persist_dir=str(tmp_path), **kwargs)
+    index.add(list(DOCS), list(DOCS.values()))
+    return index
+
+
+def test_tokenize_keeps_identifiers():
+    """Compound identifiers are kept whole and split into parts."""
+    assert list(tokenize("See chroma_db_s.py, E-1042")) == [
+        "see",
+        "chroma_db_s.py",
+        "chroma",
+        "db",
+        "s",
+        "py",
+        "e-1042",
+        "e",
+        "1042",
+    ]
+
+
+def test_search_ranks_exact_terms(tmp_path):
+    """Rare exact terms rank their document first."""
+    index = make_index(tmp_path)
+    assert index.search("chroma_db_s.py")[0][0] == "a"
+    assert index.search("E-1042")[0][0] == "c"
+    assert [doc_id for doc_id, _ in index.search("documents")] in (
+        ["b", "c"],
+        ["c", "b"],
+    )
+    assert index.search("missing") == []
+
+
+def test_replace_delete_and_reload(tmp_path):
+    """Replacements and deletions survive reopening the index."""
+    index = make_index(tmp_path)
+    index.add(["b"], ["nothing about storage"])
+    index.delete(["c"])
+    assert index.search("documents") == []
+    assert len(index) == 2
+
+    for snapshot in (False, True):
+        if snapshot:
+            index.save()
+        reopened = BM25Index("docs", persist_dir=str(tmp_path))
+        assert len(reopened) == 2
+        assert "c" not in reopened
+        assert reopened.search("storage")[0][0] == "b"
+
+
+def test_compaction(tmp_path):
+    """Deleting most documents compacts the posting lists."""
+    index = make_index(tmp_path)
+    index.add(["d"], ["one more document"])
+    index.delete(["a", "b", "d"])
+    assert len(index._ids) == 1
+    assert index.search("indexing")[0][0] == "c"
+    reopened = BM25Index("docs", persist_dir=str(tmp_path))
+    assert reopened.search("indexing")[0][0] == "c"
+
+
+def test_reciprocal_rank_fusion():
+    """Documents ranked well by several lists come first."""
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "b"]], k=1)
+    assert [doc_id for doc_id, _ in fused] == ["c", "b", "a"]
+
+
+def test_scorer():
+    """The in-memory scorer ranks texts like the index."""
+    scorer = BM25Scorer(list(DOCS.values()))
+    scores = scorer.scores("E-1042 documents")
+    assert scores.argmax() == 2 and scores[0] == 0
+    assert not scorer.scores(None).any()
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Tests for the ChromaDB document store, on the NumPy backend.
+
+These run without an embedding model, using a small bag-of-words
+embedding.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from neo_sapiens import chroma_db_s
+from neo_sapiens.chroma_db_s import (
+    ChromaDB,
+    _read_chunks,
+    bounded_map,
+)
+from neo_sapiens.index_manifest import file_hash
+
+
+def embed(texts):
+    """Hash every word into one of 32 dimensions."""
+    vectors = np.zeros((len(texts), 32), dtype=np.float32)
+    for i, text in enumerate(texts):
+        for word in str(text).lower().split():
+            vectors[i, sum(map(ord, word)) % 32] += 1
+    return vectors
+
+
+def make_db(tmp_path, **kwargs):
+    kwargs.setdefault("embedding_function", embed)
+    kwargs.setdefault("workers", 2)
+    return ChromaDB(
+        output_dir="docs",
+        persist_dir=str(tmp_path / "chroma"),
+        backend="numpy",
+        **kwargs,
+    )
+
+
+def write_docs(folder, texts):
+    folder.mkdir(parents=True, exist_ok=True)
+    for name, text in texts.items():
+        (folder / name).write_text(text)
+
+
+def test_bounded_map_keeps_order_and_window():
+    """Results come in input order with a bounded number in flight."""
+    in_flight, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work(x):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.001 * (x % 3))
+        with lock:
+            in_flight[0] -= 1
+        return x * x
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(bounded_map(pool, work, range(50), window=4))
+    assert results == [x * x for x in range(50)]
+    assert peak[0] <= 4
+
+
+def test_traverse_directory_in_batches(tmp_path):
+    """Every file is ingested, in batches of `batch_size`."""
+    write_docs(
+        tmp_path / "docs",
+        {
+            f"{i}.txt": f"document number{i} topic{i}"
+            for i in range(5)
+        },
+    )
+    db = make_db(tmp_path, batch_size=2)
+    calls = []
+    add_many = db.add_many
+
+    def counting_add_many(documents, *args):
+        calls.append(len(documents))
+        return add_many(documents, *args)
+
+    db.add_many = counting_add_many
+    db.docs_folder = str(tmp_path / "docs")
+    assert db.traverse_directory() == 5
+    assert calls == [2, 2, 1]
+    assert db.query("number3 topic3")[0] == "document number3 topic3"
+
+
+def test_add_many(tmp_path):
+    """A batch of documents is added in one call under the given IDs."""
+    db = make_db(tmp_path, n_results=1)
+    ids = db.add_many(
+        ["red apples", "green pears"],
+        [{"kind": "a"}, {"kind": "b"}],
+        ["x", "y"],
+    )
+    assert ids == ["x", "y"]
+    assert db.query("pears") == ["green pears"]
+    assert db.query("pears", where={"kind": "a"}) == ["red apples"]
+
+
+def test_incremental_reindex(tmp_path, monkeypatch):
+    """Only changed files are re-embedded, whatever the folder spelling."""
+    monkeypatch.chdir(tmp_path)
+    write_docs(
+        tmp_path / "docs",
+        {"a.txt": "apples grow", "b.txt": "bananas ripen"},
+    )
+    db = make_db(tmp_path, docs_folder="docs")
+    assert len(db.collection) == 2
+
+    db.docs_folder = "./docs"
+    assert db.traverse_directory() == 0
+    db.docs_folder = str(tmp_path / "docs" / ".." / "docs")
+    assert db.traverse_directory() == 0
+
+    (tmp_path / "docs" / "a.txt").write_text("apricots dry")
+    (tmp_path / "docs" / "b.txt").unlink()
+    assert db.traverse_directory() == 1
+    assert len(db.collection) == 1
+    assert db.query("apricots") == ["apricots dry"]
+    assert list(db.manifest.files) == [
+        str(tmp_path / "docs" / "a.txt")
+    ]
+
+
+def test_read_chunks_reads_once(tmp_path, monkeypatch):
+    """Text files are hashed and chunked from a single read."""
+    path = tmp_path / "long.txt"
+    path.write_bytes(("héllo wörld\r\n" * 3000).encode("utf-8"))
+    opened = []
+    real_open = open
+
+    def counting_open(file, *args, **kwargs):
+        opened.append(file)
+        return real_open(file, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", counting_open)
+    source, content_hash, chunks = _read_chunks(str(path), 100, 10)
+    monkeypatch.undo()
+
+    assert opened == [str(path)]
+    assert source == str(path)
+    assert content_hash == file_hash(str(path))
+    assert len(chunks) > 1
+    assert "\r" not in chunks[0].text
+    assert chunks[0].text.startswith("héllo wörld\nhéllo")
+
+
+def test_query_many(tmp_path):
+    """A batch of queries is embedded once and answered in order."""
+    calls = []
+
+    def counting_embed(texts):
+        calls.append(list(texts))
+        return embed(texts)
+
+    db = make_db(
+        tmp_path,
+        embedding_function=counting_embed,
+        cache_embeddings=False,
+        n_results=1,
+    )
+    db.add_many(["red apples", "green pears", "blue plums"])
+    calls.clear()
+    results = db.query_many(["plums", "apples", "pears"])
+    assert results == [
+        ["blue plums"],
+        ["red apples"],
+        ["green pears"],
+    ]
+    assert calls == [["plums", "apples", "pears"]]
+    assert db.query_many([]) == []
+
+
+def test_query_many_dedupe(tmp_path):
+    """With dedupe, a document is only returned for its best query."""
+    db = make_db(tmp_path, n_results=2, hybrid=False)
+    db.add_many(["red apples", "red pears"])
+    results = db.query_many(
+        ["red apples", "red apples apples"], dedupe=True
+    )
+    returned = [doc for row in results for doc in row]
+    assert sorted(returned) == ["red apples", "red pears"]
+
+
+class Embedder:
+    """A class-based embedding function, created anew per instance."""
+
+    def __call__(self, input):
+        return embed(input)
+
+
+def test_collection_handles_are_shared(tmp_path):
+    """Instances with their own embedding function share one handle."""
+    first = make_db(
+        tmp_path,
+        embedding_function=Embedder(),
+        cache_embeddings=False,
+    )
+    handles = len(chroma_db_s._collections)
+    for _ in range(3):
+        db = make_db(
+            tmp_path,
+            embedding_function=Embedder(),
+            cache_embeddings=False,
+        )
+        assert db.collection is first.collection
+    assert len(chroma_db_s._collections) == handles
+
+    cached = make_db(tmp_path, embedding_function=Embedder())
+    assert cached.collection is not first.collection
+    assert (
+        make_db(tmp_path, embedding_function=Embedder()).collection
+        is cached.collection
+    )
+
+
+def test_query_results_are_cached_until_a_write(tmp_path):
+    """Repeated queries skip the search until the collection changes."""
+    calls = []
+
+    def counting_embed(texts):
+        calls.append(list(texts))
+        return embed(texts)
+
+    db = make_db(
+        tmp_path,
+        embedding_function=counting_embed,
+        cache_embeddings=False,
+        n_results=1,
+    )
+    db.add_many(["red apples", "green pears"])
+    calls.clear()
+    assert db.query("pears") == ["green pears"]
+    assert db.query("  PEARS ") == ["green pears"]
+    assert calls == [["pears"]]
+
+    db.add_many(["pears pears pears"])
+    assert db.query("pears") == ["pears pears pears"]
+    assert len(calls) == 3
+
+    uncached = make_db(
+        tmp_path,
+        embedding_function=counting_embed,
+        cache_embeddings=False,
+        cache_results=False,
+        n_results=1,
+    )
+    calls.clear()
+    uncached.query("pears")
+    uncached.query("pears")
+    assert len(calls) == 2
+
+
+def test_text_queries_return_image_sources(tmp_path):
+    """Image hits have no document, so their source path is returned."""
+    pytest.importorskip("PIL")
+    types = pytest.importorskip("chromadb.api.types")
+    from PIL import Image
+
+    class MultiModal(types.EmbeddingFunction):
+        def __init__(self):
+            pass
+
+        def __call__(self, input):
+            return [
+                (
+                    np.full(32, x.mean() + 1, dtype=np.float32)
+                    if isinstance(x, np.ndarray)
+                    else embed([x])[0]
+                )
+                for x in input
+            ]
+
+    path = tmp_path / "red.jpg"
+    Image.new("RGB", (640, 480), (200, 10, 10)).save(path)
+    db = ChromaDB(
+        output_dir="mixed",
+        persist_dir=str(tmp_path / "chroma"),
+        embedding_function=MultiModal(),
+        n_results=3,
+        workers=1,
+    )
+    db.add_many(["red apples", "green pears"])
+    db.add_images([str(path)])
+
+    assert str(path) in db.query("red apples")
+    for row in db.query_many(["red", "pears"]):
+        assert sorted(row) == sorted(
+            ["red apples", "green pears", str(path)]
+        )
+    image = np.zeros((300, 300, 3), dtype=np.uint8)
+    assert db.query(None, query_images=[image])[0] == str(path)
+
+
+def test_text_index_is_backfilled_once(tmp_path, monkeypatch):
+    """Text added without the keyword index is indexed on first use."""
+    plain = make_db(tmp_path, hybrid=False)
+    plain.add_many(["red apples"], ids=["text"])
+    plain.collection.add(
+        ids=["image"],
+        embeddings=embed(["picture"]),
+        metadatas=[{"source": "a.jpg"}],
+    )
+
+    db = make_db(tmp_path)
+    assert "text" in db.text_index and "image" not in db.text_index
+    db.text_index.delete(["text"])
+
+    scans = []
+    monkeypatch.setattr(
+        ChromaDB, "_backfill_text_index", lambda self: scans.append(1)
+    )
+    make_db(tmp_path)
+    assert scans == []
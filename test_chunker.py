@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming, token-aware chunker.
+"""
+
+from neo_sapiens.chunker import (
+    CHARS_PER_TOKEN,
+    chunk_stream,
+    is_streamable,
+    iter_blocks,
+)
+
+TEXT = "\n\n".join(
+    f"Paragraph {i}. " + " ".join(f"word{j}" for j in range(40))
+    for i in range(30)
+)
+
+
+def test_chunks_cover_the_text_with_offsets():
+    """Chunks fit the limit, overlap, and map back to the text."""
+    chunks = list(
+        chunk_stream([TEXT], chunk_tokens=50, overlap_tokens=5)
+    )
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert len(chunk.text) <= 50 * CHARS_PER_TOKEN
+        assert TEXT[chunk.start : chunk.end] == chunk.text
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.start < previous.end
+    assert chunks[0].start == 0
+    assert chunks[-1].end == len(TEXT)
+
+
+def test_chunks_end_at_boundaries():
+    """Chunks end at paragraph breaks when one is in their second half."""
+    chunks = list(
+        chunk_stream([TEXT], chunk_tokens=100, overlap_tokens=0)
+    )
+    assert all(chunk.text.endswith("\n\n") for chunk in chunks[:-1])
+
+
+def test_block_size_does_not_matter():
+    """A text streamed in small blocks gives the same chunks."""
+    blocks = [TEXT[i : i + 7] for i in range(0, len(TEXT), 7)]
+    assert list(chunk_stream(blocks, 50, 5)) == list(
+        chunk_stream([TEXT], 50, 5)
+    )
+
+
+def test_short_and_blank_text():
+    """Short texts are one chunk and blank texts none."""
+    assert [chunk.text for chunk in chunk_stream(["hello"])] == [
+        "hello"
+    ]
+    assert list(chunk_stream(["  \n", ""])) == []
+
+
+def test_iter_blocks(tmp_path):
+    """Files are decoded in blocks without splitting characters."""
+    path = tmp_path / "notes.md"
+    path.write_bytes("ünïcode\r\nline\n".encode("utf-8") * 100)
+    blocks = list(iter_blocks(str(path), block_size=5))
+    assert "".join(blocks) == "ünïcode\nline\n" * 100
+    assert is_streamable(str(path))
+    assert not is_streamable("report.pdf")
+
+
+def test_whitespace_runs_are_skipped():
+    """Long whitespace runs neither end the stream nor become chunks."""
+    text = " " * 3000 + "hello world"
+    for blocks in ([" " * 3000, "hello world"], [text]):
+        chunks = list(chunk_stream(blocks, 500, 50))
+        assert [chunk.text for chunk in chunks] == ["hello world"]
+        assert text[chunks[0].start : chunks[0].end] == "hello world"
+
+    text = "intro\n" + "\n" * 5000 + "outro"
+    chunks = list(chunk_stream([text], 100, 10))
+    assert all(chunk.text.strip() for chunk in chunks)
+    assert chunks[0].text.startswith("intro")
+    assert chunks[-1].text.endswith("outro")
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Tests for the map-reduce compression of oversized tasks.
+"""
+
+import json
+import re
+
+from neo_sapiens import hass_schema
+from neo_sapiens.artifact_store import ArtifactStore
+from neo_sapiens.context_compressor import ContextCompressor
+
+TOPICS = ["pricing", "shipping", "refunds", "marketing"]
+TASK = "\n\n".join(
+    f"Section on {topic}. "
+    + " ".join(f"{topic} detail{i}." for i in range(120))
+    for topic in TOPICS
+)
+ROLES = {
+    "Pricing Agent": "Pricing Agent: set the pricing of products",
+    "Refund Agent": "Refund Agent: handle refunds for customers",
+}
+
+
+def make_compressor(tmp_path, **kwargs):
+    store = ArtifactStore(root=str(tmp_path / "artifacts"))
+    return ContextCompressor(store=store, **kwargs), store
+
+
+def test_small_task_is_unchanged(tmp_path):
+    """Tasks within `max_tokens` need no digest."""
+    compressor, _ = make_compressor(tmp_path)
+    assert compressor.compress("Sell shoes", ROLES) == {}
+    assert not (tmp_path / "artifacts").exists()
+
+
+def test_digests_keep_relevant_chunks(tmp_path):
+    """Each role gets the chunks about its topic and the handle."""
+    compressor, store = make_compressor(
+        tmp_path, max_tokens=100, chunk_tokens=100, digest_tokens=200
+    )
+    digests = compressor.compress(TASK, ROLES)
+    pricing, refunds = (
+        digests["Pricing Agent"],
+        digests["Refund Agent"],
+    )
+    assert "pricing detail" in pricing and "refunds" not in pricing
+    assert "refunds detail" in refunds and "pricing" not in refunds
+
+    handle = re.search(r"artifact ([0-9a-f]{12})", pricing).group(1)
+    assert handle in refunds
+    assert store.grep(handle, "marketing detail119")
+
+
+def test_extractor_narrows_chunks(tmp_path):
+    """An extractor's answers replace the chunks, NONE drops them."""
+    prompts = []
+
+    def extractor(prompt):
+        prompts.append(prompt)
+        return "NONE" if "Refund Agent" in prompt else "prices: 10$"
+
+    compressor, _ = make_compressor(
+        tmp_path, max_tokens=100, chunk_tokens=100, digest_tokens=200
+    )
+    digests = compressor.compress(TASK, ROLES, extractor=extractor)
+    assert prompts
+    assert digests["Pricing Agent"].startswith("prices: 10$")
+    assert digests["Refund Agent"].startswith("Section on")
+
+
+class FakeAgent:
+    """Records the tools, memory and runs of an agent."""
+
+    def __init__(self, agent_name, tools, **kwargs):
+        self.agent_name = agent_name
+        self.tools = [
+            getattr(tool, "__name__", tool) for tool in tools
+        ]
+        self.memory = []
+        self.runs = []
+        self.short_memory = Conversation()
+
+    def add_message_to_memory(self, message):
+        self.memory.append(message)
+        self.short_memory.add("User", message)
+
+    def run(self, task):
+        self.runs.append(task)
+        return "done"
+
+
+class Conversation:
+    """The part of the swarms Conversation used by BossMemory."""
+
+    def __init__(self):
+        self.conversation_history = []
+
+    def add(self, role, content):
+        self.conversation_history.append(
+            {"role": role, "content": content}
+        )
+
+
+def test_digest_recipients_get_artifact_tools(monkeypatch):
+    """Workers given a digest can read the full task."""
+    monkeypatch.setattr(hass_schema, "Agent", FakeAgent)
+    monkeypatch.setattr(hass_schema, "network", None)
+    agents = [
+        hass_schema.AgentSchema(
+            name=name,
+            system_prompt="prompt",
+            rules="rules",
+            tools=[{"tool": "terminal"}],
+        )
+        for name in ROLES
+    ]
+    workers = hass_schema.create_worker_agents(
+        agents, context={"Pricing Agent": "digest"}
+    )
+    assert workers[0].tools == [
+        "terminal",
+        "read_artifact",
+        "grep_artifact",
+    ]
+    assert workers[0].memory == ["digest"]
+    assert workers[1].tools == ["terminal"]
+
+
+def test_boss_gets_the_whole_task(tmp_path, monkeypatch):
+    """Text past the first chunk of a large task reaches the boss."""
+    created = []
+
+    class Recorder(FakeAgent):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+    team = {
+        "plan": "Split the work",
+        "agents": [
+            {"name": name, "system_prompt": role, "rules": "rules"}
+            for name, role in ROLES.items()
+        ],
+    }
+    compressor, _ = make_compressor(
+        tmp_path, max_tokens=100, chunk_tokens=100, digest_tokens=200
+    )
+    monkeypatch.setattr(hass_schema, "Agent", Recorder)
+    monkeypatch.setattr(hass_schema, "Anthropic", None)
+    monkeypatch.setattr(hass_schema, "network", None)
+    monkeypatch.setattr(hass_schema, "context_compressor", compressor)
+    monkeypatch.setattr(
+        hass_schema,
+        "create_agents_by_boss",
+        lambda team_task: json.dumps(team),
+    )
+
+    assert hass_schema.build_swarm("team", TASK) == "done"
+    boss, pricing, refunds = created
+    assert boss.runs == [TASK]
+    assert boss.short_memory.task == TASK
+    assert "marketing detail119" in boss.memory[0]
+    assert "refunds detail" not in pricing.memory[0]
+    assert "refunds detail" in refunds.memory[0]
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Tests for the content-addressed embedding cache.
+"""
+
+import numpy as np
+import pytest
+
+from neo_sapiens.embedding_cache import (
+    EmbeddingCache,
+    embedding_model_id,
+    get_embedding_cache,
+)
+
+
+def embed_small(texts):
+    return np.array([[len(str(t)), 1.0] for t in texts])
+
+
+def embed_large(texts):
+    return np.array([[len(str(t)), 2.0, 3.0] for t in texts])
+
+
+class CountingEmbedding:
+    model_name = "mini"
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, input):
+        self.calls.append(list(input))
+        return [
+            (
+                np.array([float(x.mean()), float(x.std())])
+                if isinstance(x, np.ndarray)
+                else np.array([len(x), x.count("a")], dtype=float)
+            )
+            for x in input
+        ]
+
+
+def test_model_ids_are_distinct():
+    """Plain functions and models get their own IDs."""
+    assert embedding_model_id(embed_small) != embedding_model_id(
+        embed_large
+    )
+    assert embedding_model_id(CountingEmbedding()).endswith(
+        "CountingEmbedding:mini"
+    )
+
+
+def test_functions_do_not_share_a_cache(tmp_path):
+    """Two plain-function embedders never read each other's vectors."""
+    cache_dir = str(tmp_path)
+    small = get_embedding_cache(embed_small, cache_dir=cache_dir)
+    large = get_embedding_cache(embed_large, cache_dir=cache_dir)
+    assert small is not large
+    assert small(["abc"])[0].tolist() == [3.0, 1.0]
+    assert large(["abc"])[0].tolist() == [3.0, 2.0, 3.0]
+
+
+def test_dimension_mismatch_is_rejected(tmp_path):
+    """Appending vectors of another dimension raises."""
+    EmbeddingCache(embed_small, "model", str(tmp_path))(["abc"])
+    cache = EmbeddingCache(embed_large, "model", str(tmp_path))
+    with pytest.raises(ValueError, match="3 dimensions"):
+        cache(["other"])
+    assert cache(["abc"])[0].tolist() == [3.0, 1.0]
+
+
+def test_hits_and_persistence(tmp_path):
+    """Inputs are embedded once, even across instances."""
+    model = CountingEmbedding()
+    cache = EmbeddingCache(model, cache_dir=str(tmp_path))
+    first = cache(["banana", "apple", "banana"])
+    assert model.calls == [["banana", "apple"]]
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    reopened = EmbeddingCache(model, cache_dir=str(tmp_path))
+    assert len(reopened) == 2
+    assert np.array_equal(reopened(["apple"])[0], first[1])
+    assert len(model.calls) == 1
+
+
+def test_image_arrays_are_keyed_by_content(tmp_path):
+    """Images differing only in their center get their own vectors."""
+    model = CountingEmbedding()
+    cache = EmbeddingCache(model, cache_dir=str(tmp_path))
+    a = np.zeros((224, 224, 3), dtype=np.uint8)
+    b = a.copy()
+    b[100:120, 100:120] = 255
+    assert str(a) == str(b)
+    assert cache.key(a) != cache.key(b)
+    assert cache.key(a) != cache.key(a.astype(np.float32))
+    vectors = cache([a, b, a.copy()])
+    assert len(model.calls[0]) == 2
+    assert vectors[0][0] == 0 and vectors[1][0] > 0
+    assert np.array_equal(vectors[0], vectors[2])
+
+
+def test_appends_from_other_processes(tmp_path):
+    """Rows appended by another writer are picked up, not overwritten."""
+    model = CountingEmbedding()
+    first = EmbeddingCache(model, cache_dir=str(tmp_path))
+    second = EmbeddingCache(model, cache_dir=str(tmp_path))
+    first(["a"])
+    second(["bb"])
+    first(["ccc"])
+    assert second(["a"])[0].tolist() == [1.0, 1.0]
+    assert len(model.calls) == 3
+
+    reopened = EmbeddingCache(model, cache_dir=str(tmp_path))
+    assert [v.tolist() for v in reopened(["a", "bb", "ccc"])] == [
+        [1.0, 1.0],
+        [2.0, 0.0],
+        [3.0, 0.0],
+    ]
+
+
+def test_partial_row_is_dropped(tmp_path):
+    """A row cut short by a crash is ignored and overwritten."""
+    model = CountingEmbedding()
+    cache = EmbeddingCache(model, cache_dir=str(tmp_path))
+    cache(["a", "bb"])
+    with open(cache._vectors_path, "ab") as file:
+        file.write(b"\0\0\0")
+
+    reopened = EmbeddingCache(model, cache_dir=str(tmp_path))
+    assert len(reopened) == 2
+    reopened(["ccc"])
+    assert EmbeddingCache(model, cache_dir=str(tmp_path))(["ccc"])[
+        0
+    ].tolist() == [3.0, 0.0]
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the relevance-based few-shot example selector.
+"""
+
+import numpy as np
+
+from neo_sapiens.few_shot_prompts import (
+    few_shot_selector,
+    orchestrator_prompt_agent,
+)
+from neo_sapiens.few_shot_selector import (
+    FewShotSelector,
+    load_examples,
+)
+
+EXAMPLES = {
+    "hotel": (
+        "Hotel front desk agents handle guest check-in and rooms"
+    ),
+    "code": "Software developers write code, tests and reviews",
+    "cars": "Self-driving car perception, planning and control",
+}
+
+
+def test_selects_relevant_examples():
+    """The examples sharing terms with the objective come first."""
+    selector = FewShotSelector(EXAMPLES)
+    assert selector.select("Write code and tests", k=1) == [
+        EXAMPLES["code"]
+    ]
+    assert selector.select("check-in guests at a hotel", k=2)[0] == (
+        EXAMPLES["hotel"]
+    )
+
+
+def test_default_when_nothing_matches():
+    """Objectives without a known term, or None, use the defaults."""
+    selector = FewShotSelector(EXAMPLES)
+    for objective in ("zzz", None):
+        assert selector.select(
+            objective, k=2, default=["cars", "hotel"]
+        ) == [EXAMPLES["cars"], EXAMPLES["hotel"]]
+
+
+def test_best_match_is_kept_over_budget():
+    """The best example is selected even when it exceeds the budget."""
+    selector = FewShotSelector(EXAMPLES)
+    selected = selector.select("code tests", k=2, token_budget=1)
+    assert selected == [EXAMPLES["code"]]
+
+    examples = load_examples()
+    if "software_development_example" in examples:
+        assert few_shot_selector.select(
+            "software development team writing code", k=1
+        ) == [examples["software_development_example"]]
+
+
+def test_embedding_scores():
+    """An embedding function scores examples by cosine similarity."""
+
+    def embed(texts):
+        return np.array(
+            [
+                [text.count("code"), text.count("car")]
+                for text in texts
+            ],
+            dtype=np.float32,
+        )
+
+    selector = FewShotSelector(EXAMPLES, embedding_function=embed)
+    assert selector.select("car", k=1) == [EXAMPLES["cars"]]
+    assert not selector.scores(None).any()
+
+
+def test_orchestrator_prompt_without_team():
+    """A prompt is still built when no team is named."""
+    assert "examples" in orchestrator_prompt_agent(None)
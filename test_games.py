@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Headless tests for the bundled pygame games.
+
+These only use the simulation classes, so they need no display.
+"""
+
+import numpy as np
+import pytest
+
+from neo_sapiens import game, game_envs, swarm_game
+from neo_sapiens.frame_profiler import FrameProfiler
+from neo_sapiens.game_runtime import (
+    FIRE,
+    LEFT,
+    InputLog,
+    replay,
+    run_headless,
+)
+
+
+def test_swarm_bullets_destroy_enemies():
+    """A bullet inside an enemy removes both."""
+    state = swarm_game.SwarmGame()
+    state.enemies.spawn(100, 100, 0, 0)
+    state.bullets.spawn(120, 115, 0, 0)
+    state.check_collisions()
+    assert len(state.enemies) == 0
+    assert len(state.bullets) == 0
+
+
+def test_swarm_collisions_are_one_to_one():
+    """Each bullet destroys one enemy and each enemy stops one bullet."""
+    state = swarm_game.SwarmGame()
+    state.enemies.spawn(100, 100, 0, 0)
+    state.enemies.spawn(120, 110, 0, 0)
+    state.enemies.spawn(400, 100, 0, 0)
+    # Two bullets in the first enemy, one in the overlap of both
+    state.bullets.spawn(105, 105, 0, 0)
+    state.bullets.spawn(110, 105, 0, 0)
+    state.bullets.spawn(140, 120, 0, 0)
+    # On the edge of the third enemy, so a miss
+    state.bullets.spawn(400, 110, 0, 0)
+    state.check_collisions()
+    assert state.kills == 2
+    assert sorted(state.enemies.positions[:, 0]) == [400]
+    assert sorted(state.bullets.positions[:, 0]) == [110, 400]
+
+
+def test_swarm_runs_headless():
+    """Thousands of ticks run without a display."""
+    state = swarm_game.SwarmGame()
+    run_headless(state.step, 2000, swarm_game.autopilot)
+    assert state.frame == 2000
+    assert 0 <= state.player_x <= swarm_game.SCREEN_WIDTH - 50
+    assert (state.bullets.positions[:, 1] >= 0).all()
+
+
+def test_snake_hits_wall():
+    """The snake loses after leaving the screen and then stops."""
+    state = game.SnakeGame()
+    state.foodx = state.foody = -100
+    for _ in range(50):
+        state.step([LEFT])
+    assert state.state == game.LOST
+    x = state.x1
+    state.step([LEFT, FIRE])
+    assert state.x1 == x
+
+
+def test_snake_food_avoids_body():
+    """Food goes to the only free cell, and the game is won without one."""
+    state = game.SnakeGame()
+    state.occupied = {
+        (column * game.snake_block, row * game.snake_block)
+        for row in range(game.food_rows)
+        for column in range(game.food_columns)
+    }
+    state.occupied.discard((10, 20))
+    state.place_food()
+    assert (state.foodx, state.foody) == (10, 20)
+    state.occupied.add((10, 20))
+    state.place_food()
+    assert state.state == game.WON
+
+
+def test_swarm_vector_env_steps_games_independently():
+    """Each game of a vector env only sees its own enemies."""
+    envs = game_envs.SwarmVectorEnv(4, max_steps=50, seed=0)
+    observations = envs.reset()
+    assert observations.shape == (4, envs.observation_size)
+    for _ in range(49):
+        observations, rewards, dones, info = envs.step(
+            np.array([0, 1, 2, 3])
+        )
+    assert not dones.any()
+    env_ids = envs._env_ids(envs.enemies)
+    assert (
+        observations[:, 1:].sum(axis=1)
+        == np.bincount(env_ids, minlength=4)
+    ).all()
+    observations, rewards, dones, info = envs.step(np.zeros(4, int))
+    assert dones.all()
+    assert len(envs.enemies) == 0
+
+
+def test_swarm_vector_env_keeps_far_lanes_exact():
+    """Games in lanes past 2**24 pixels keep whole-pixel positions."""
+    n = 20000
+    envs = game_envs.SwarmVectorEnv(n, seed=0)
+    envs.reset()
+    lane = envs.lanes[-1]
+    assert lane + swarm_game.SCREEN_WIDTH > 2**24
+    envs.enemies.spawn(lane + 101, 100, 0, swarm_game.ENEMY_SPEED)
+    envs.enemies.spawn(lane + 301, 100, 0, swarm_game.ENEMY_SPEED)
+    envs.bullets.spawn(lane + 126, 115, 0, 0)
+    _, _, _, info = envs.step(np.zeros(n, dtype=int))
+    assert info["kills"][-1] == 1 and info["kills"].sum() == 1
+    placed = envs.enemies.positions[:, 1] > 0
+    assert (envs._env_ids(envs.enemies)[placed] == n - 1).all()
+    assert (envs.enemies.positions[placed, 0] - lane).tolist() == [
+        301
+    ]
+
+
+def test_snake_vector_env_resets_finished_games():
+    """Finished snake games are reset and report their end."""
+    with game_envs.ProcessVectorEnv(
+        game_envs.SnakeEnv, 3, workers=0
+    ) as envs:
+        observations = envs.reset()
+        assert observations.shape == (
+            3,
+            game_envs.SnakeEnv.observation_size,
+        )
+        for _ in range(45):
+            observations, rewards, dones = envs.step(np.ones(3, int))
+            if dones.any():
+                break
+        assert dones.all()
+        assert (rewards == -1).all()
+
+
+def test_recording_replays_identically(tmp_path):
+    """A saved input log re-simulates the same game, and only that game."""
+    state = swarm_game.SwarmGame(seed=3)
+    log = InputLog("swarm", 3)
+    run_headless(log.recorder(state), 300, swarm_game.autopilot)
+    log.save(str(tmp_path / "swarm.json"))
+
+    log = InputLog.load(str(tmp_path / "swarm.json"))
+    assert log.hashes[300] == state.state_hash()
+    replay(swarm_game.SwarmGame(seed=log.seed), log)
+    with pytest.raises(ValueError):
+        replay(swarm_game.SwarmGame(seed=4), log)
+
+
+def test_frame_profiler_keeps_recent_frames(tmp_path):
+    """The ring buffer keeps the last frames of every section."""
+    profiler = FrameProfiler(swarm_game.SECTIONS, frames=50)
+    state = swarm_game.SwarmGame(seed=1, profiler=profiler)
+    run_headless(
+        state.step, 120, swarm_game.autopilot, profiler=profiler
+    )
+    assert len(profiler.recent()) == 50
+    assert profiler.stats()["check_collisions"]["max"] > 0
+    profiler.to_csv(str(tmp_path / "profile.csv"))
+    rows = (tmp_path / "profile.csv").read_text().splitlines()
+    assert len(rows) == 51
+    assert rows[1].startswith("70,")
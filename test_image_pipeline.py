@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for image downsampling and the thumbnail loader.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+pytest.importorskip("PIL")
+
+from PIL import Image  # noqa: E402
+
+from neo_sapiens.image_pipeline import (  # noqa: E402
+    ThumbnailLoader,
+    downsample,
+    get_thumbnail_loader,
+)
+
+
+def test_downsample():
+    """Large images shrink to fit, keeping their aspect ratio."""
+    image = np.zeros((600, 300, 3), dtype=np.uint8)
+    assert downsample(image, 100).shape == (100, 50, 3)
+    small = np.zeros((50, 50, 3), dtype=np.uint8)
+    assert downsample(small, 100) is small
+
+
+def test_thumbnails_are_cached(tmp_path):
+    """Images are decoded once and re-made when the file changes."""
+    path = tmp_path / "photo.jpg"
+    Image.new("RGB", (800, 400), (0, 128, 255)).save(path)
+    loader = ThumbnailLoader(
+        size=64, thumbnail_dir=str(tmp_path / "thumbs")
+    )
+    [thumbnail] = loader([str(path)])
+    assert thumbnail.shape == (32, 64, 3)
+    cached = loader.thumbnail_path(str(path))
+    assert os.path.exists(cached)
+
+    os.remove(path)
+    Image.new("RGB", (100, 100)).save(path)
+    assert loader.thumbnail_path(str(path)) != cached
+    assert loader.load(str(path)).shape == (64, 64, 3)
+
+
+def test_loaders_are_shared(tmp_path):
+    """One loader serves each thumbnail directory and size."""
+    loader = get_thumbnail_loader(str(tmp_path), 64)
+    assert get_thumbnail_loader(str(tmp_path), 64) is loader
+    assert get_thumbnail_loader(str(tmp_path), 32) is not loader
+
+
+def test_repeated_paths_are_loaded_once(tmp_path):
+    """Duplicate paths in a batch or across threads do not race."""
+    path = tmp_path / "photo.png"
+    Image.new("RGB", (300, 300), (10, 200, 30)).save(path)
+    thumbs = tmp_path / "thumbs"
+    loader = ThumbnailLoader(size=64, thumbnail_dir=str(thumbs))
+    images = loader([str(path)] * 3)
+    assert len(images) == 3 and images[0] is images[2]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for _ in range(5):
+            for file in thumbs.iterdir():
+                file.unlink()
+            results = list(pool.map(loader.load, [str(path)] * 16))
+            assert all(r.shape == (64, 64, 3) for r in results)
+    assert [file.suffix for file in thumbs.iterdir()] == [".jpg"]
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for the token budgeted memory of the boss agent.
+"""
+
+from neo_sapiens.memory_manager import (
+    BossMemory,
+    compact_roster,
+    count_tokens,
+    first_sentence,
+)
+
+
+class Conversation:
+    """The part of the swarms Conversation used by BossMemory."""
+
+    def __init__(self):
+        self.conversation_history = []
+        self.autosave = False
+
+    def add(self, role, content):
+        self.conversation_history.append(
+            {"role": role, "content": content}
+        )
+
+    def return_history_as_string(self):
+        return "\n\n".join(
+            f"{message['role']}: {message['content']}"
+            for message in self.conversation_history
+        )
+
+
+class Agent:
+    def __init__(self, name, system_prompt):
+        self.name = name
+        self.system_prompt = system_prompt
+
+
+def make_memory(**kwargs):
+    conversation = Conversation()
+    conversation.add("System", "You are the boss.")
+    conversation.add("Roster", "- Coder: Writes code.")
+    return conversation, BossMemory(conversation, **kwargs)
+
+
+def test_compaction_keeps_pinned_and_recent():
+    """Old turns are summarized, pinned and recent turns are kept."""
+    conversation, memory = make_memory(
+        task="Build it", token_budget=200, batch_size=3, keep_recent=2
+    )
+    memory.add("User", "Build it")
+    for i in range(20):
+        memory.add("Boss", f"turn {i} " + "x" * 80)
+
+    history = conversation.conversation_history
+    assert memory.token_count() <= 200
+    assert history[0]["content"] == "You are the boss."
+    assert history[1]["content"] == "- Coder: Writes code."
+    assert history[2] is memory.summary
+    assert "Build it" in [message["content"] for message in history]
+    assert history[-1]["content"].startswith("turn 19")
+    assert history[-2]["content"].startswith("turn 18")
+
+
+def test_failing_summarizer_falls_back():
+    """A failing summarizer is replaced by the extractive summary."""
+
+    def summarizer(transcript):
+        raise RuntimeError("offline")
+
+    conversation, memory = make_memory(
+        token_budget=100, keep_recent=1, summarizer=summarizer
+    )
+    for i in range(10):
+        memory.add("Boss", f"turn {i} " + "y" * 60)
+    assert "Boss: turn" in memory.summary["content"]
+
+
+def test_attributes_are_forwarded():
+    """Reads and writes of other attributes reach the conversation."""
+    conversation, memory = make_memory()
+    memory.autosave = True
+    assert conversation.autosave is True
+    assert "autosave" not in vars(memory)
+    memory.token_budget = 10
+    assert memory.token_budget == 10
+    assert not hasattr(conversation, "token_budget")
+    assert len(memory) == 2
+    assert memory[0]["role"] == "System"
+
+
+def test_roster_and_helpers():
+    """Rosters keep one short line per agent."""
+    agents = [
+        Agent("Coder", "Writes code. Reviews it too."),
+        Agent("Tester", "t" * 200),
+    ]
+    roster = compact_roster(agents).split("\n")
+    assert roster[0] == "- Coder: Writes code."
+    assert roster[1].endswith("...")
+    assert len(first_sentence("t" * 200)) == 120
+    assert count_tokens("abcd" * 10) == 11
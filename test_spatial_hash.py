@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for the vectorized point-in-box collision grid.
+"""
+
+import numpy as np
+import pytest
+
+from neo_sapiens.spatial_hash import point_box_hits
+
+SIZE = (50, 30)
+
+
+def inside(points, boxes):
+    """The (n, m) brute-force matrix of points strictly in boxes."""
+    x, y = points[:, 0, None], points[:, 1, None]
+    left, top = boxes[None, :, 0], boxes[None, :, 1]
+    return (
+        (left < x)
+        & (x < left + SIZE[0])
+        & (top < y)
+        & (y < top + SIZE[1])
+    )
+
+
+def check_hits(points, boxes, cell_size=64):
+    hit_p, hit_b = point_box_hits(points, boxes, SIZE, cell_size)
+    contains = inside(points, boxes)
+    assert contains[hit_p, hit_b].all()
+    assert len(set(hit_p)) == len(hit_p)
+    assert len(set(hit_b)) == len(hit_b)
+    assert list(hit_p) == sorted(hit_p)
+    # A point left unmatched lost its first box to another point
+    missed = np.setdiff1d(np.flatnonzero(contains.any(axis=1)), hit_p)
+    assert np.isin(contains[missed].argmax(axis=1), hit_b).all()
+    return hit_p, hit_b
+
+
+@pytest.mark.parametrize("extent", [800, 10**7])
+def test_matches_brute_force(extent):
+    """Random scenes, dense and sparse, give valid one-to-one hits."""
+    rng = np.random.default_rng(extent)
+    for _ in range(50):
+        boxes = rng.uniform(0, extent, size=(200, 2))
+        points = np.concatenate(
+            [
+                boxes[:100] + rng.uniform(0, 60, size=(100, 2)),
+                rng.uniform(0, extent, size=(100, 2)),
+            ]
+        )
+        check_hits(points, boxes)
+
+
+def test_separate_boxes_are_all_hit():
+    """Without overlaps, every point in a box hits exactly that box."""
+    boxes = np.array([[i * 100.0, (i % 7) * 40.0] for i in range(30)])
+    points = boxes[::-1] + (25, 15)
+    hit_p, hit_b = check_hits(points, boxes)
+    assert list(hit_p) == list(range(30))
+    assert list(hit_b) == list(range(29, -1, -1))
+
+
+def test_edges_and_empty_inputs():
+    """Points on an edge miss, and empty inputs give no hits."""
+    boxes = np.array([[0.0, 0.0]])
+    points = np.array([[0.0, 10.0], [50.0, 10.0], [10.0, 30.0]])
+    assert [len(a) for a in check_hits(points, boxes)] == [0, 0]
+    assert [len(a) for a in check_hits(points[:0], boxes)] == [0, 0]
+    with pytest.raises(ValueError):
+        point_box_hits(points, boxes, SIZE, cell_size=20)
+
+
+def test_clustered_scene_is_bounded():
+    """Piled-up boxes are matched in at most `rounds` claim rounds."""
+    rng = np.random.default_rng(0)
+    boxes = 100 + rng.uniform(0, 5, size=(400, 2))
+    points = 100 + rng.uniform(10, 25, size=(400, 2))
+    assert inside(points, boxes).all()
+    for rounds in (1, 4):
+        hit_p, hit_b = point_box_hits(
+            points, boxes, SIZE, rounds=rounds
+        )
+        assert list(hit_p) == list(range(rounds))
+        assert list(hit_b) == list(range(rounds))
+    hit_p, _ = point_box_hits(points[:20], boxes, SIZE, rounds=20)
+    assert len(hit_p) == 20
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for the memoization of idempotent tool calls.
+"""
+
+import subprocess
+
+import pytest
+
+from neo_sapiens import tool_cache as tool_cache_module
+from neo_sapiens.tool_cache import (
+    ToolCache,
+    command_paths,
+    is_read_only_command,
+    normalize_command,
+)
+
+
+@pytest.fixture
+def terminal(tmp_path, monkeypatch):
+    """A terminal tool memoized on a fresh cache, run in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    cache = ToolCache()
+    calls = []
+
+    @cache.memoize(
+        "terminal",
+        ttl=30,
+        idempotent=is_read_only_command,
+        paths=command_paths,
+        normalize=normalize_command,
+    )
+    def run(code: str):
+        calls.append(code)
+        return subprocess.run(
+            code, shell=True, capture_output=True, text=True
+        ).stdout
+
+    run.cache = cache
+    run.calls = calls
+    return run
+
+
+def test_hit(terminal, tmp_path):
+    """A repeated read is served from the cache."""
+    (tmp_path / "a.txt").write_text("one")
+    assert terminal("cat a.txt") == "one"
+    assert terminal(" cat  a.txt ") == "one"
+    assert terminal.calls == ["cat a.txt"]
+    assert terminal.cache.hits == 1
+
+
+def test_ttl(terminal, tmp_path, monkeypatch):
+    """Results expire after their time to live."""
+    (tmp_path / "a.txt").write_text("one")
+    now = [1000.0]
+    monkeypatch.setattr(
+        tool_cache_module.time, "monotonic", lambda: now[0]
+    )
+    terminal("cat a.txt")
+    now[0] += 29
+    terminal("cat a.txt")
+    assert len(terminal.calls) == 1
+    now[0] += 2
+    terminal("cat a.txt")
+    assert len(terminal.calls) == 2
+
+
+def test_invalidate_on_write(terminal, tmp_path):
+    """A reported write evicts reads of that path, even through globs."""
+    (tmp_path / "a.py").write_text("one")
+    (tmp_path / "b.txt").write_text("other")
+    assert terminal("cat *.py") == "one"
+    assert terminal("cat b.txt") == "other"
+
+    (tmp_path / "a.py").write_text("two")
+    assert terminal.cache.invalidate_path(str(tmp_path / "a.py")) == 1
+    assert terminal("cat *.py") == "two"
+    assert terminal("cat b.txt") == "other"
+    assert terminal.calls.count("cat b.txt") == 1
+
+
+def test_mutating_command_invalidates(terminal, tmp_path):
+    """A command that is not read-only runs and evicts cached reads."""
+    (tmp_path / "a.txt").write_text("one")
+    assert terminal("ls") == "a.txt\n"
+    terminal("touch b.txt")
+    terminal("touch b.txt")
+    assert terminal.calls.count("touch b.txt") == 2
+    assert terminal("ls") == "a.txt\nb.txt\n"
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "cat a.txt > b.txt",
+        "ls; rm a.txt",
+        "cat $(ls)",
+        "rm a.txt",
+        "sed -i s/a/b/ a.txt",
+        "find . -delete",
+        "find . -okdir rm {} ;",
+        "find . -fprint0 out",
+        "find . -fprintf out %p",
+        "find . -fls out",
+        "tree -o out.txt",
+        "tree -ao out.txt",
+    ],
+)
+def test_unsafe_commands(code):
+    """Commands that can write are never treated as read-only."""
+    assert not is_read_only_command(code)
+
+
+def test_read_only_commands():
+    """Plain reads and pipelines of reads are cacheable."""
+    assert is_read_only_command("ls -la")
+    assert is_read_only_command("cat a.txt | grep foo | wc -l")
+    assert is_read_only_command("tree -L 2 --noreport")
+    assert is_read_only_command("find . -name '*.py'")
+
+
+def test_glob_paths(tmp_path, monkeypatch):
+    """Glob operands depend on the directory of their first wildcard."""
+    monkeypatch.chdir(tmp_path)
+    assert command_paths("cat src/*/x.py") == [str(tmp_path / "src")]
+    assert command_paths("ls") == [str(tmp_path)]
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the table-driven tool router.
+"""
+
+import inspect
+
+from neo_sapiens.tool_router import ToolRouter
+
+
+def add(a: int, b: int = 1):
+    """
+    Add two numbers.
+
+    Args:
+        a (int): The first number.
+        b (int): The second number.
+    """
+    return a + b
+
+
+def shout(text: str):
+    """Return the text in upper case."""
+    return text.upper()
+
+
+def make_router():
+    router = ToolRouter()
+    router.register("add", add)
+    router.register("shout", shout)
+    return router
+
+
+def test_route_validates_arguments():
+    """Arguments are coerced, defaulted and checked before dispatch."""
+    router = make_router()
+    assert router.route("add", {"a": "2", "b": 3}) == 5
+    assert router.route("add", {"a": 2}) == 3
+    assert router.route("add", {"a": "two"}).startswith(
+        "Error: Invalid arguments for add"
+    )
+    assert router.route("missing").startswith(
+        "Error: Unknown tool missing"
+    )
+
+
+def test_select_dispatches_through_router():
+    """Selected tools keep their signature and route their calls."""
+    router = make_router()
+    tools = router.select(["shout", "missing", "add", "add"])
+    assert [tool.__name__ for tool in tools] == ["shout", "add"]
+    assert inspect.signature(tools[1]) == inspect.signature(add)
+    assert tools[1].__doc__ == add.__doc__
+
+    assert tools[1]("2", b="5") == 7
+    assert tools[1]("x").startswith("Error: Invalid arguments")
+    assert tools[1]().startswith("Error: Invalid arguments")
+    assert len(router.select()) == 2
+
+
+def test_describe_is_cached_per_subset():
+    """Descriptions are built once per subset of tools."""
+    router = make_router()
+    description = router.describe(["shout", "add"])
+    assert description == (
+        "- add(a, b): Add two numbers.\n"
+        "- shout(text): Return the text in upper case."
+    )
+    assert router.describe(["add", "shout"]) is description
+    router.register("other", shout)
+    assert router.describe(["add", "shout"]) is not description
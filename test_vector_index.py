@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Tests for the NumPy vector index backend.
+
+These run without chromadb, using a small bag-of-words embedding.
+"""
+
+import numpy as np
+
+from neo_sapiens.vector_index import NumpyCollection, matches_where
+
+
+def embed(texts):
+    """Hash every word into one of 32 dimensions."""
+    vectors = np.zeros((len(texts), 32), dtype=np.float32)
+    for i, text in enumerate(texts):
+        for word in text.lower().split():
+            vectors[i, sum(map(ord, word)) % 32] += 1
+    return vectors
+
+
+def test_add_and_query(tmp_path):
+    """Nearest documents come first and filters are applied."""
+    collection = NumpyCollection(
+        "memories",
+        persist_dir=str(tmp_path),
+        embedding_function=embed,
+    )
+    collection.add(
+        ids=["a", "b", "c"],
+        documents=["hello world", "foo bar", "hello there"],
+        metadatas=[{"k": 1}, {"k": 2}, {"k": 1}],
+    )
+
+    results = collection.query(query_texts=["hello"], n_results=2)
+    assert sorted(results["ids"][0]) == ["a", "c"]
+
+    results = collection.query(
+        query_texts=["hello"], n_results=3, where={"k": 2}
+    )
+    assert results["ids"] == [["b"]]
+
+
+def test_persistence_and_delete(tmp_path):
+    """Deletes and replacements survive reopening the index."""
+    collection = NumpyCollection(
+        "memories",
+        persist_dir=str(tmp_path),
+        embedding_function=embed,
+    )
+    collection.add(ids=["a", "b"], documents=["hello", "foo"])
+    collection.delete(ids=["a"])
+    collection.add(ids=["b"], documents=["bar"])
+
+    reopened = NumpyCollection(
+        "memories",
+        persist_dir=str(tmp_path),
+        embedding_function=embed,
+    )
+    assert reopened.count() == 1
+    assert reopened.get()["documents"] == ["bar"]
+
+
+def test_ivf_finds_exact_match(tmp_path):
+    """The IVF quantizer still returns a stored vector for itself."""
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(2000, 16)).astype(np.float32)
+    collection = NumpyCollection(
+        "big", persist_dir=str(tmp_path), ivf_threshold=1000
+    )
+    collection.add(
+        ids=[str(i) for i in range(len(vectors))], embeddings=vectors
+    )
+
+    results = collection.query(
+        query_embeddings=vectors[:5], n_results=1
+    )
+    assert results["ids"] == [["0"], ["1"], ["2"], ["3"], ["4"]]
+
+
+def test_matches_where():
+    """Chroma style operators are supported."""
+    metadata = {"source": "a.md", "chunk": 3}
+    assert matches_where(metadata, {"source": "a.md"})
+    assert matches_where(metadata, {"chunk": {"$gte": 3}})
+    assert not matches_where(
+        metadata,
+        {"$and": [{"chunk": {"$lt": 3}}, {"source": "a.md"}]},
+    )
+
+
+def test_vectors_without_records_are_dropped(tmp_path):
+    """Vectors written before a crash lost their records are discarded."""
+    vectors = np.eye(4, dtype=np.float32)
+    collection = NumpyCollection("crash", persist_dir=str(tmp_path))
+    collection.add(ids=["a", "b"], embeddings=vectors[:2])
+    # A crash between the vector write and the record write
+    with open(collection._vectors_path, "ab") as file:
+        file.write(vectors[3].tobytes() + b"\0\0")
+
+    reopened = NumpyCollection("crash", persist_dir=str(tmp_path))
+    assert len(reopened.vectors) == 2
+    reopened.add(ids=["c"], embeddings=vectors[2:3])
+
+    reopened = NumpyCollection("crash", persist_dir=str(tmp_path))
+    results = reopened.query(
+        query_embeddings=vectors[:3], n_results=1
+    )
+    assert results["ids"] == [["a"], ["b"], ["c"]]
+
+
+def test_quantized_queries_match_exact(tmp_path):
+    """Quantized indexes re-rank to the exact neighbours and persist."""
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(600, 16)).astype(np.float32)
+    ids = [str(i) for i in range(len(vectors))]
+    exact = NumpyCollection("exact", persist_dir=str(tmp_path))
+    exact.add(ids=ids, embeddings=vectors)
+    expected = exact.query(query_embeddings=vectors[:20], n_results=3)
+
+    for quantization in ("int8", "pq"):
+        collection = NumpyCollection(
+            quantization,
+            persist_dir=str(tmp_path),
+            quantization=quantization,
+            pq_subspaces=4,
+            rerank=10,
+        )
+        collection.add(ids=ids, embeddings=vectors)
+        results = collection.query(
+            query_embeddings=vectors[:20], n_results=3
+        )
+        assert collection._codes.dtype == np.uint8
+        assert [row[0] for row in results["ids"]] == ids[:20]
+        hits = sum(
+            len(set(a) & set(b))
+            for a, b in zip(results["ids"], expected["ids"])
+        )
+        assert hits >= 0.9 * 60
+
+        reopened = NumpyCollection(
+            quantization,
+            persist_dir=str(tmp_path),
+            quantization=quantization,
+            pq_subspaces=4,
+            rerank=10,
+        )
+        assert len(reopened._codes) == len(vectors)
+        assert (
+            reopened.query(
+                query_embeddings=vectors[:20], n_results=3
+            )["ids"]
+            == results["ids"]
+        )